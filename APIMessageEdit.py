@@ -40,30 +40,24 @@ def change_portfoilo_message(file_path, StocksTable, StockPortfolioTable,
     :return: new contest message
     """
 
-    StocksTable['Sale date'] = pd.to_datetime(StocksTable['Sale date']).normalize()
-    StocksTable['Buy date'] = pd.to_datetime(StocksTable['Buy date']).normalize()
+    def latest_for(sale_day):
+        # Rows for one sale day, newest estimate per stock, without the presentation columns
+        table = StocksTable.copy()
+        table['Sale date'] = pd.to_datetime(table['Sale date'], errors="coerce").dt.normalize()
+        table['Buy date'] = pd.to_datetime(table['Buy date'], errors="coerce").dt.normalize()
+        table['estimate forecast date'] = pd.to_datetime(table['estimate forecast date'], errors="coerce")
+        table = table[table['Sale date'] == pd.Timestamp(sale_day).normalize()]
+        table = table.sort_values(['Stocks Name', 'estimate forecast date'], ascending=[True, False])
+        table = table.drop_duplicates('Stocks Name', keep='first')
+        return table.drop(columns=["currently in stock portfolio", "portfolio percent"], errors="ignore")
 
     current_potrfoilo = StockPortfolioTable.to_string(index=False)
-
-
-    StocksTableForcast = StocksTable.loc[StocksTable['Sale date'] == saleData].values[0]
-    StocksTableForcast['estimate forecast date'] = \
-    StocksTableForcast.to_datetime[StocksTableForcast['estimate forecast date']]
-    df_sorted = StocksTableForcast.sort_values(['Stocks Name', 'estimate forecast date'],ascending=[True, False])
-    StocksTable= df_sorted.drop_duplicates('Stocks Name', keep= 'first')
-    StocksTableStr = StocksTable.drop(["currently in stock portfolio", "portfolio percent"]).to_string(index=False)
-
-    StocksTableUpdateForcast = StocksTable.loc[StocksTable['Sale date'] == newsaleData].values[0]
-    StocksTableUpdateForcast['estimate forecast date'] = \
-    StocksTableUpdateForcast.to_datatime[StocksTableUpdateForcast['estimate forecast date']]
-    df_sorted = StocksTableUpdateForcast.sort_values(['Stocks Name', 'estimate forecast date'],ascending=[True, False])
-    StocksTableUpdate= df_sorted.drop_duplicates('Stocks Name', keep= 'first')
-    StocksTableUpdateStr = StocksTableUpdate.drop(["currently in stock portfolio", "portfolio percent"]).to_string(index=False)
-
+    StocksTableStr = latest_for(saleData).to_string(index=False)
+    StocksTableUpdateStr = latest_for(newsaleData).to_string(index=False)
 
     replacements_dict = {
-        "Sale date": saleData,
-        "New sale data": newsaleData,
+        "Sale date": str(saleData),
+        "New sale data": str(newsaleData),
         "Portfolio management": current_potrfoilo,
         "StocksTable": StocksTableStr,
         "UpdateStocksTable": StocksTableUpdateStr,
@@ -94,6 +88,16 @@ def read_deepLookStock_info_response(content):
     data = json.loads(json_text)
     return data["A1"],data["A2"],data["A3"],data["A4"],data["A5"],data["A6"],data["A7"],data["A8"],data["A9"],data["A10"],data["A11"],data["A12"],data["A13"],data["A14"],data["A15"],data["A16"],data["A17"],data["A18"],data["A19"],data["A20"]
 
+def read_deep_answers(content, keys):
+    """
+    Parse a deep-look JSON reply that answers only some questions.
+    :param content: chat completion response
+    :param keys: question keys expected in the reply (e.g. ["A16", ..., "A20"])
+    :return: {key: answer}
+    """
+    data = json.loads(content.choices[0].message.content)
+    return {k: data[k] for k in keys}
+
 def read_portfolio_invest(content):
     json_text = content.choices[0].message.content
     data = json.loads(json_text)
@@ -1,10 +1,16 @@
+from __future__ import annotations
 from datetime import datetime, timedelta
+from typing import TYPE_CHECKING, Optional
 import pandas as pd
 from  brokai.APIMessageEdit import *  # assumes helpers like change_stock_message, read_* are defined here
-from openai import OpenAI
-import yfinance as yf
+from brokai.dataContext import DataContext
+from brokai.priceStore import PriceStore
+from brokai.symbolMaster import normalize_ticker
 import os
 
+if TYPE_CHECKING:  # openai / yfinance are imported on first use (slow imports)
+    from openai import OpenAI
+
 class StockManagement:
     """
     Orchestrates:
@@ -17,27 +23,132 @@ class StockManagement:
       • StocksTable.xlsx         -> (AI forecast outputs; columns used below)
       • DeepTable.xlsx           -> (AI deep-analysis outputs; A1..A20 etc.)
       • StockPortfolioTable.xlsx -> (AI portfolio suggestions; used in get_portfolio_invest)
+      • price_store/<SYMBOL>.npy -> local daily OHLCV history (see PriceStore)
+
+    Tables live in a DataContext (pass one in to share it with clientManagement) and
+    are only read from disk the first time they are used; the OpenAI client is created
+    on first use as well, so constructing this class is cheap. The table attributes are
+    copy-on-write views — change tables through self.context (append_row/set/save).
     """
 
     def __init__(self, AI_key,
                  stock_lists="stock_lists.xlsx",
                  stocksTable="StocksTable.xlsx",
                  deepTable="DeepTable.xlsx",
-                 StockPortfolioTable="StockPortfolioTable.xlsx"):
+                 StockPortfolioTable="StockPortfolioTable.xlsx",
+                 price_store="price_store",
+                 context: DataContext = None):
         """
-        Load working tables and create an OpenAI client.
+        Attach the working tables (lazily) and open the local price store.
 
-        NOTE: If any file is missing, pd.read_excel will raise FileNotFoundError.
-              If you want a softer behavior, guard with os.path.exists and create empty frames.
+        NOTE: If any file is missing, pd.read_excel will raise FileNotFoundError
+              the first time that table is accessed.
         """
-        # Consider wrapping with exists checks if these files may not exist yet
-        self.stock_lists = pd.read_excel(stock_lists)
-        self.stocksTable = pd.read_excel(stocksTable)
-        self.deepTable = pd.read_excel(deepTable)
-        self.StockPortfolioTable = pd.read_excel(StockPortfolioTable)
-
-        # OpenAI client for chat completions
-        self.client = OpenAI(api_key=AI_key)
+        # Shared, lazily loaded table handles (see DataContext)
+        self.context = context or DataContext(stock_lists, stocksTable, deepTable, StockPortfolioTable)
+
+        # Local daily OHLCV history; read before going to Yahoo (grounding, valuation, backtests)
+        self.price_store = PriceStore(price_store)
+
+        # OpenAI client for chat completions (built on first access, see `client`)
+        self._AI_key = AI_key
+        self._client = None
+        self._risk_cache = None
+        self._intraday = None
+        self._deep_answers = None
+        self._news = None
+        self._influencers = None
+        self._provenance = None
+
+    # ---------- Lazy handles ----------
+    @property
+    def client(self) -> OpenAI:
+        if self._client is None:
+            from openai import OpenAI
+            self._client = OpenAI(api_key=self._AI_key)
+        return self._client
+
+    @property
+    def risk_cache(self):
+        """Precomputed return matrices / covariances per market (riskCache.RiskCache)."""
+        if self._risk_cache is None:
+            from brokai.riskCache import RiskCache
+            self._risk_cache = RiskCache(self.price_store)
+        return self._risk_cache
+
+    @property
+    def intraday(self):
+        """Today's 1-minute bars + derived features, reused for 60s (intraday.IntradayCache)."""
+        if self._intraday is None:
+            from brokai.intraday import IntradayCache
+            self._intraday = IntradayCache()
+        return self._intraday
+
+    @property
+    def deep_answers(self):
+        """Statement-grounded deep-look answers by fundamentals fingerprint (deepLook.DeepAnswerCache)."""
+        if self._deep_answers is None:
+            from brokai.deepLook import DeepAnswerCache
+            self._deep_answers = DeepAnswerCache()
+        return self._deep_answers
+
+    @property
+    def news(self):
+        """Deduplicated, ticker-tagged news per symbol for forecast prompts (newsFeed.NewsIndex)."""
+        if self._news is None:
+            from brokai.newsFeed import NewsIndex
+            self._news = NewsIndex(self.stock_lists)
+            self.context.subscribe("stock_lists", lambda name, df: self._news.set_universe(df))
+        return self._news
+
+    @property
+    def influencers(self):
+        """Post -> price-move event study per author, fed by self.news (influencers.InfluencerStudy)."""
+        if self._influencers is None:
+            from brokai.influencers import InfluencerStudy
+            self._influencers = InfluencerStudy(self.price_store)
+            self.news.subscribers.append(self._influencers.on_item)
+        return self._influencers
+
+    @property
+    def provenance(self):
+        """Compressed, content-addressed prompt/response records per Serial number (provenance.ProvenanceStore)."""
+        if self._provenance is None:
+            from brokai.provenance import ProvenanceStore
+            self._provenance = ProvenanceStore()
+        return self._provenance
+
+    @property
+    def stock_lists(self) -> pd.DataFrame:
+        return self.context.view("stock_lists")
+
+    @stock_lists.setter
+    def stock_lists(self, df: pd.DataFrame):
+        self.context.set("stock_lists", df)
+
+    @property
+    def stocksTable(self) -> pd.DataFrame:
+        return self.context.view("stocksTable")
+
+    @stocksTable.setter
+    def stocksTable(self, df: pd.DataFrame):
+        self.context.set("stocksTable", df)
+
+    @property
+    def deepTable(self) -> pd.DataFrame:
+        return self.context.view("deepTable")
+
+    @deepTable.setter
+    def deepTable(self, df: pd.DataFrame):
+        self.context.set("deepTable", df)
+
+    @property
+    def StockPortfolioTable(self) -> pd.DataFrame:
+        return self.context.view("StockPortfolioTable")
+
+    @StockPortfolioTable.setter
+    def StockPortfolioTable(self, df: pd.DataFrame):
+        self.context.set("StockPortfolioTable", df)
 
     def printHistoryStockForcast(self, StockName: str) -> None:
         """
@@ -90,10 +201,9 @@ class StockManagement:
             already = ((self.stock_lists["Name"] == Name)).any()
 
             if not already:
-                # Append and persist
-                self.stock_lists.loc[len(self.stock_lists)] = [Ticker, Name, Market, Sector]
-                self.stock_lists.to_excel("stock_lists.xlsx", index=False)
-                self.stock_lists = pd.read_excel("stock_lists.xlsx")
+                # Append and persist (through the shared context; no re-read)
+                self.context.append_row("stock_lists", [Ticker, Name, Market, Sector])
+                self.context.save("stock_lists")
                 print("The stock has been added to the stock list.")
             else:
                 print("This stock already exists in the stock list.")
@@ -103,7 +213,7 @@ class StockManagement:
         # You could return a sentinel here if you prefer.
 
     def get_forcast_stock(self, client: OpenAI, stock_name: str,
-                          buy_date: datetime, sale_date: datetime, serialNum: str) -> None:
+                          buy_date: datetime, sale_date: datetime, serialNum: str) -> Optional[dict]:
         """
         Ask the LLM for an initial forecast for a given stock (with dates), grounded with
         yfinance financial statements, and append the result to StocksTable.xlsx.
@@ -115,8 +225,18 @@ class StockManagement:
             sale_date: scenario sale time
             serialNum: run tracker for joining output rows
 
+        Returns:
+            The appended row as {column: value}, or None if the stock was skipped
+            (lets callers rank results as they arrive without re-reading the table).
+
         Side effects:
-            - Writes/updates self.stocksTable and saves to "StocksTable.xlsx"
+            - Appends to the context's stocksTable and saves it to its workbook
+            - Records the grounding, prompt, raw reply and parsed fields in
+              self.provenance under serialNum
+
+        Notes:
+            - When news has been ingested (self.news), the newest items tagged to this
+              stock are added under '=== Recent News ===' within a small token budget.
         """
         file_path = "ChatQuastions/StockInitialForcast.txt"
         estimate_forecast_date = datetime.now().replace(second=0, microsecond=0)
@@ -128,10 +248,12 @@ class StockManagement:
         # --- Guard: avoid index errors if not found ---
         if df.empty:
             print(f"[WARN] Ticker '{stock_name}' not found in stock_lists. Skipping forecast.")
-            return
+            return None
 
         # Pass ticker and market to yfinance grounding
         FinancialStat = self.getFinancialStatements(df["Ticker"].iloc[0], df["Market"].iloc[0])
+        if self._news is not None:
+            FinancialStat += self._news.prompt_block(normalize_ticker(df["Ticker"].iloc[0], df["Market"].iloc[0]))
 
         # Compose the final prompt
         content = change_stock_message(file_path, stock_name, buy_date, sale_date, estimate_forecast_date)
@@ -147,9 +269,13 @@ class StockManagement:
 
         # Parse outputs (helper must return up_down, confidence_level, stop_loss)
         up_down, confidence_level, stop_loss = read_stockInital_info_response(response)
+        self.provenance.record("forecast", serialNum, stock_name, FinancialStat, content, reply,
+                               {"up/down": up_down, "confidence level": confidence_level,
+                                "stop-loss": stop_loss},
+                               template=file_path, model="gpt-3.5-turbo")
 
         # Append a new row. Column order MUST match your actual file schema.
-        self.stocksTable.loc[len(self.stocksTable)] = [
+        row = [
             serialNum,
             stock_name,
             up_down,
@@ -161,10 +287,12 @@ class StockManagement:
             [],   # placeholders (you had two list columns)
             []
         ]
-        self.stocksTable.to_excel("StocksTable.xlsx", index=False)
-        self.stocksTable = pd.read_excel("StocksTable.xlsx")
+        self.context.append_row("stocksTable", row)
+        self.context.save("stocksTable")
+        return dict(zip(self.context.get("stocksTable").columns, row))
 
-    def deepStock(self, client: OpenAI, stock_name: str, buy_date: datetime, serialNum: str) -> None:
+    def deepStock(self, client: OpenAI, stock_name: str, buy_date: datetime, serialNum: str,
+                  reuse: bool = True) -> None:
         """
         Ask the LLM for a deep analysis (20 questions A1..A20), grounded with yfinance statements,
         and append the result to DeepTable.xlsx.
@@ -173,9 +301,19 @@ class StockManagement:
             stock_name: input name/ticker as expected by your template
             buy_date: timestamp to include in prompt for context
             serialNum: run ID to link rows to this call
+            reuse: reuse statement-grounded answers while the statements are unchanged
 
         Side effects:
-            - Updates self.deepTable and writes to "DeepTable.xlsx"
+            - Appends to the context's deepTable and saves it to its workbook
+            - Updates self.deep_answers after a full deep look
+            - Records the grounding, prompt, raw reply and answers in self.provenance
+
+        Notes:
+            - Answers to deepLook.STATEMENT_QUESTIONS are cached per symbol under the
+              fingerprint of the income statement / balance sheet / cash flow. While it
+              matches, only deepLook.MARKET_QUESTIONS are re-asked, with the prices and
+              intraday block only (no statements in the prompt).
+            - When Yahoo returns no statements at all nothing is cached or reused.
         """
         file_path = "ChatQuastions/deeplookStock.txt"
 
@@ -187,122 +325,151 @@ class StockManagement:
             print(f"[WARN] Name '{stock_name}' not found in stock_lists. Skipping deepStock.")
             return
 
-        # Ground with yfinance
-        FinancialStat = self.getFinancialStatements(df["Ticker"].iloc[0], df["Market"].iloc[0])
+        from brokai.deepLook import QUESTIONS
+
+        # Ground with yfinance (statements split from the price/intraday block)
+        symbol = normalize_ticker(df["Ticker"].iloc[0], df["Market"].iloc[0])
+        fingerprint, statements_text, market_text = self._financial_sections(df["Ticker"].iloc[0],
+                                                                             df["Market"].iloc[0])
+        cached = self.deep_answers.get(symbol, fingerprint) if reuse and fingerprint is not None else None
 
         # Prompt and LLM call
         content = change_stock_message(file_path, stock_name, buy_date)
+        if cached is not None:
+            keys = [q for q in QUESTIONS if q not in cached]
+            grounding = market_text
+            content = (f"{content}\n\n"
+                       f"Answer ONLY {', '.join(keys)}; the other answers are unchanged. "
+                       f"Reply with a JSON object containing exactly these keys.")
+        else:
+            grounding = f"{statements_text}{market_text}"
+        user = f"{grounding}\n\n{content}"
         response = client.chat.completions.create(
             model="gpt-3.5-turbo",
             messages=[
                 {"role": "system", "content": "You are a precise financial data analyst."},
-                {"role": "user", "content": f"{FinancialStat}\n\n{content}"}
+                {"role": "user", "content": user}
             ]
         )
         reply = response.choices[0].message.content
         print(reply)
 
-        # Parse 20 answers
-        (A1,A2,A3,A4,A5,A6,A7,A8,A9,A10,
-         A11,A12,A13,A14,A15,A16,A17,A18,A19,A20) = read_deepLookStock_info_response(response)
+        # Parse the 20 answers (statement answers from the cache when reused)
+        if cached is not None:
+            answers = dict(cached, **read_deep_answers(response, keys))
+        else:
+            answers = dict(zip(QUESTIONS, read_deepLookStock_info_response(response)))
+            if fingerprint is not None:  # no statements fetched -> nothing to reuse against
+                self.deep_answers.put(symbol, fingerprint, answers)
 
-        # Append and persist  (FIX: filename casing -> "DeepTable.xlsx" to match your init)
-        self.deepTable.loc[len(self.deepTable)] = [
-            serialNum, stock_name,
-            A1,A2,A3,A4,A5,A6,A7,A8,A9,A10,
-            A11,A12,A13,A14,A15,A16,A17,A18,A19,A20
-        ]
-        self.deepTable.to_excel("DeepTable.xlsx", index=False)   # FIX from "deepTable.xlsx"
-        self.deepTable = pd.read_excel("DeepTable.xlsx")
+        self.provenance.record("deep_look", serialNum, stock_name, grounding, content, reply,
+                               dict(answers, reused=cached is not None), template=file_path, model="gpt-3.5-turbo")
+
+        # Append and persist to the context's DeepTable path
+        self.context.append_row("deepTable", [serialNum, stock_name] + [answers[q] for q in QUESTIONS])
+        self.context.save("deepTable")
 
     def get_portfolio_invest(self, client: OpenAI, sale_date: datetime,
-                              max_stock_incest: int, desired_confidence: int):
-        """
-        Ask the LLM to construct a portfolio (tickers + weights) using your current
-        StocksTable and StockPortfolioTable as context.
-
-        NOTE: This function had several typos/bugs in your original:
-          - self.StocksTable (capital S) but class uses self.stocksTable
-          - .to_datatime -> should be pd.to_datetime
-          - df_sorted computed from 'StocksTableForcast' Series (wrong); probably you want to filter/sort a DataFrame
-          - Drop/merge lines mixed Series/DataFrame
-        I kept the structure but added 'FIX:' comments where needed. You should finish/adjust the
-        DataFrame operations according to your actual intended logic.
+                              max_stock_incest: int, desired_confidence: int,
+                              method: str = "mean_variance", max_weight: float = 1.0,
+                              narrative: bool = False) -> pd.DataFrame:
         """
-        file_path = "ChatQuastions/InvestmentPortfolioManagment.txt"
-
-        # FIX: use self.stocksTable (lowercase s) + self.StockPortfolioTable
-        content = change_portfoilo_message(
-            file_path,
-            self.stocksTable,               # FIX
-            self.StockPortfolioTable,       # FIX
-            saleData=sale_date,
-            newsaleData=datetime.now() + timedelta(weeks=1),
-            max_stocks_invest=max_stock_incest,     # FIX: name corrected
-            desired_confidance=desired_confidence    # (keep original param name expected by template)
-        )
-
-        response = client.chat.completions.create(
-            model="gpt-3.5-turbo",
-            messages=[{"role": "user", "content": content}]
-        )
-        reply = response.choices[0].message.content
-        print(reply)
-
-        # Parse dict like {weight%: "Ticker"} or {"Ticker": "weight%"} depending on your helper
-        invest_stock_dict = read_portfolio_invest(response)  # <- ensure this returns a dict
-
-        # Build a DataFrame of the allocation
-        values_list = list(invest_stock_dict.values())
-        key_list = list(invest_stock_dict.keys())
-        invest_stock_df = pd.DataFrame({
-            'Stocks Name': values_list,     # or 'Ticker' depending on your helper
-            "portfolio split": key_list
-        })
-
-        # --- The rest of your code below was operating on a Series / wrong column names ---
-        # Keep as comments with FIX notes so you can align with your actual schema:
-
-        # Example of filtering your forecasts for the given sale_date:
-        # (Make sure 'Sale date' column exists and is datetime)
-        # tmp = self.stocksTable.copy()
-        # tmp["Sale date"] = pd.to_datetime(tmp["Sale date"], errors="coerce")
-        # st_for_sale = tmp[tmp["Sale date"] == sale_date]
+        Build a portfolio (tickers + weights) from the latest StocksTable forecasts with the
+        deterministic optimiser (optimizer.PortfolioOptimizer) — no prompt-size limits.
 
-        # # If you intend to keep only latest estimate per stock:
-        # st_for_sale["estimate forecast date"] = pd.to_datetime(st_for_sale["estimate forecast date"], errors="coerce")
-        # df_sorted = st_for_sale.sort_values(["Stocks Name", "estimate forecast date"], ascending=[True, False])
-        # stocks_latest = df_sorted.drop_duplicates("Stocks Name", keep="first")
-
-        # # Optional: drop presentation-only column if exists
-        # stocks_latest = stocks_latest.drop(columns=["portfolio percent"], errors="ignore")
+        Args:
+            client: OpenAI client; only used when narrative=True.
+            sale_date: use forecasts for this sale date (falls back to the newest forecast
+                       per stock if none match).
+            max_stock_incest: maximum number of stocks in the portfolio.
+            desired_confidence: minimum 'Confidence level' for a stock to be eligible.
+            method: "mean_variance" or "risk_parity".
+            max_weight: cap per stock as a fraction (e.g. 0.3).
+            narrative: also ask the LLM to explain the allocation (stored in df.attrs["narrative"]).
 
-        # # Merge with the AI portfolio allocation proposal
-        # df_merge = pd.merge(stocks_latest, invest_stock_df, on="Stocks Name", how="inner")
-        # return df_merge
+        Returns:
+            DataFrame ['Stocks Name', 'symbol', 'portfolio split' (%), 'Confidence level',
+            'Stock volatility forecast', 'expected_return', 'volatility', 'risk_contribution'].
 
-        # For now, just return the allocation table (so this function returns something consistent)
+        Notes:
+            - Expected return per stock = forecast % move x confidence; covariance is a
+              Ledoit-Wolf estimate from the local price store's daily returns.
+        """
+        from brokai.optimizer import PortfolioOptimizer
+
+        optimizer = PortfolioOptimizer(self.price_store, self.stock_lists, risk_cache=self.risk_cache)
+        table = self.stocksTable
+        invest_stock_df = optimizer.allocate(table, max_stocks=max_stock_incest,
+                                             min_confidence=desired_confidence, method=method,
+                                             sale_date=sale_date, max_weight=max_weight, fetch_missing=True)
+        if invest_stock_df.empty and sale_date is not None:
+            invest_stock_df = optimizer.allocate(table, max_stocks=max_stock_incest,
+                                                 min_confidence=desired_confidence, method=method,
+                                                 max_weight=max_weight, fetch_missing=True)
+
+        if narrative and client is not None and not invest_stock_df.empty:
+            file_path = "ChatQuastions/InvestmentPortfolioManagment.txt"
+            content = change_portfoilo_message(
+                file_path,
+                table,
+                self.StockPortfolioTable,
+                saleData=sale_date,
+                newsaleData=datetime.now() + timedelta(weeks=1),
+                max_stocks_invest=max_stock_incest,
+                desired_confidance=desired_confidence
+            )
+            response = client.chat.completions.create(
+                model="gpt-3.5-turbo",
+                messages=[{"role": "user", "content":
+                           f"{content}\n\nThe allocation below was computed by a {method} optimiser. "
+                           f"Explain it briefly; do not change the weights.\n\n"
+                           f"{invest_stock_df.to_string(index=False)}"}]
+            )
+            invest_stock_df.attrs["narrative"] = response.choices[0].message.content
+            print(invest_stock_df.attrs["narrative"])
+
+        print(invest_stock_df)
         return invest_stock_df
 
     def getFinancialStatements(self, Ticker: str, market="US") -> str:
         """
-        Fetch financial statements and last ~30 minutes of 1m bars from Yahoo Finance,
-        and return a human-readable text block to embed in LLM prompts.
+        Fetch financial statements from Yahoo Finance, plus the recent daily bars from the
+        local price store and a compact intraday summary (VWAP, range, 5/15/30 min
+        returns, volume z-score), and return a human-readable text block to embed in
+        LLM prompts.
 
         Args:
             Ticker: raw ticker without suffix (e.g., 'TEVA' not 'TEVA.TA')
-            market: "US" or "IL"; IL adds '.TA' suffix for Yahoo
+            market: "US", "IL", ... (see symbolMaster.EXCHANGE_SUFFIXES; IL adds '.TA')
 
         Returns:
-            str: Text blob including Income Statement, Balance Sheet, Cash Flow, Intraday sample.
+            str: Text blob including Income Statement, Balance Sheet, Cash Flow,
+                 Daily Prices (last 10 sessions) and Intraday Summary.
 
         Notes:
-            - Yahoo uses trailing '.TA' for Tel Aviv tickers
+            - Yahoo uses trailing '.TA' for Tel Aviv tickers (and .L, .TO, ... elsewhere)
             - Some tickers may return empty DataFrames; we still format them
+            - Intraday features come from self.intraday, so a forecast and a deep look for
+              the same ticker within a minute share one download
+        """
+        _, statements_text, market_text = self._financial_sections(Ticker, market)
+        return statements_text + market_text
+
+    def _financial_sections(self, Ticker: str, market="US"):
         """
-        # Add .TA for IL market (simple rule — adjust if you support more exchanges)
-        if market == "IL":
-            Ticker = f"{Ticker}.TA"
+        getFinancialStatements() in two parts plus a fingerprint of the statements.
+
+        Returns:
+            (fingerprint, statements_text, market_text) — statements_text holds the
+            Income Statement / Balance Sheet / Cash Flow, market_text the daily prices and
+            the intraday summary; fingerprint is deepLook.statements_fingerprint()
+            (None when every statement is empty).
+        """
+        import yfinance as yf
+        from brokai.deepLook import statements_fingerprint
+
+        # Vendor symbol from the symbol master (suffix table per market, e.g. IL -> .TA)
+        Ticker = normalize_ticker(Ticker, market)
 
         ticker = yf.Ticker(Ticker)
 
@@ -311,15 +478,19 @@ class StockManagement:
         balance_sheet = ticker.balance_sheet
         cash_flow = ticker.cashflow
 
-        # 1-minute intraday prices (sample last ~30 rows)
-        intraday_prices = ticker.history(period="1d", interval="1m")
+        # Daily closes come from the local store (only the missing days are downloaded)
+        self.price_store.ensure(Ticker)
+        daily_prices = self.price_store.frame(Ticker).tail(10)
+
+        # Intraday: compact features from the cached 1-minute bars (tail-only top-ups)
+        intraday_summary = self.intraday.summary_text(Ticker)
 
         def df_to_text(df: pd.DataFrame) -> str:
             if isinstance(df, pd.DataFrame) and not df.empty:
                 return df.to_string(index=True)
             return "(no data)"
 
-        data_text = f"""
+        statements_text = f"""
 === Income Statement ===
 {df_to_text(income_statement)}
 
@@ -328,11 +499,51 @@ class StockManagement:
 
 === Cash Flow ===
 {df_to_text(cash_flow)}
+"""
+        market_text = f"""
+=== Daily Prices (last 10 sessions) ===
+{df_to_text(daily_prices)}
 
-=== Intraday Prices (1 min) ===
-{df_to_text(intraday_prices.tail(30))}  # last ~30 minutes
+=== Intraday Summary (1 min bars) ===
+{intraday_summary}
 """
-        return data_text
+        return statements_fingerprint(income_statement, balance_sheet, cash_flow), statements_text, market_text
+
+    def backtest_forecasts(self, serialNum: str = None, fetch_missing: bool = True):
+        """
+        Score past StocksTable forecasts against realised prices from the local price store.
+
+        Args:
+            serialNum: restrict to one run (Serial number); None scores the whole table.
+            fetch_missing: top up the price store for the needed date ranges first.
+
+        Returns:
+            (scored_df, summary_dict, calibration_df) — see backtest.ForecastBacktester.
+        """
+        from brokai.backtest import ForecastBacktester
+
+        if serialNum is not None:
+            table = self.context.keyed("stocksTable", ("Serial number",)).frame(serialNum)
+        else:
+            table = self.stocksTable
+
+        bt = ForecastBacktester(self.price_store, self.stock_lists)
+        scored = bt.score(table, fetch_missing=fetch_missing)
+        summary = bt.summary(scored)
+        print(summary)
+        return scored, summary, bt.calibration(scored)
+
+    def refresh_risk_cache(self, fetch_missing: bool = True):
+        """
+        Extend the per-market return matrices / covariances with the days that arrived
+        since the last refresh (run once a day, e.g. after the price store top-up).
+
+        Returns:
+            {market: {"symbols", "rows", "new_rows"}}
+        """
+        cache = self.risk_cache
+        cache.stock_lists = self.stock_lists
+        return cache.build_all(fetch_missing=fetch_missing)
 
     # -------- new model --------
     def Client_add_stock_to_list(self, client: OpenAI, Ticker: str):
@@ -360,9 +571,8 @@ class StockManagement:
         if (exists == 'yes'):
             already = ((self.stock_lists["Name"] == Name)).any()
             if not already:
-                self.stock_lists.loc[len(self.stock_lists)] = [Ticker, Name, Market, Sector]
-                self.stock_lists.to_excel("stock_lists.xlsx", index=False)
-                self.stock_lists = pd.read_excel("stock_lists.xlsx")
+                self.context.append_row("stock_lists", [Ticker, Name, Market, Sector])
+                self.context.save("stock_lists")
                 print("The stock has been added to the stock list.")
             else:
                 print("This stock already exists in the stock list.")
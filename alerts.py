@@ -0,0 +1,260 @@
+from datetime import datetime
+from typing import Optional, Dict, List, Any, Callable, Mapping
+import numpy as np
+import pandas as pd
+import json
+import os
+from brokai.symbolMaster import symbol_map
+
+# Rule columns of the holdings x rules level matrix
+RULES = ("stop_loss", "target", "drawdown")
+STOP_LOSS, TARGET, DRAWDOWN = range(len(RULES))
+
+
+# ---------- Forecast levels ----------
+def forecast_levels(stocks_table: Optional[pd.DataFrame], stock_lists: Optional[pd.DataFrame],
+                    symbols: np.ndarray, avg_cost: np.ndarray, stop_loss_mode: str = "percent",
+                    min_confidence: float = 0.0) -> np.ndarray:
+    """
+    (H, 2) stop / target prices per holding from the latest confident StocksTable forecast
+    of its symbol (NaN = none).
+
+    'Stocks Name' holds a ticker or a company name; both are resolved to Yahoo symbols
+    through stock_lists (symbolMaster.symbol_map), like the optimiser and backtester.
+      - stop: 'Recommended stop-loss' as % below avg cost (stop_loss_mode="percent") or a price
+      - target: 'Stock volatility forecast' (expected % move) above avg cost when > 0
+    """
+    out = np.full((len(symbols), 2), np.nan)
+    if stocks_table is None or stocks_table.empty or len(symbols) == 0:
+        return out
+    from brokai.optimizer import PortfolioOptimizer
+    latest = PortfolioOptimizer.latest_forecasts(stocks_table, min_confidence=min_confidence)
+    if latest.empty:
+        return out
+    names = latest["Stocks Name"].astype(str).to_numpy()
+    sym_map = symbol_map(stock_lists, pd.unique(names))
+    stop = pd.to_numeric(latest["Recommended stop-loss"], errors="coerce").to_numpy(dtype="f8")
+    move = pd.to_numeric(latest["Stock volatility forecast"], errors="coerce").to_numpy(dtype="f8")
+    index = {sym_map[n]: i for i, n in enumerate(names)}
+    rows = np.fromiter((index.get(str(t).upper(), -1) for t in symbols), dtype=np.intp, count=len(symbols))
+    have = rows >= 0
+    s, m = stop[rows[have]], move[rows[have]]
+    if stop_loss_mode == "percent":
+        out[have, 0] = avg_cost[have] * (1.0 - np.abs(s) / 100.0)
+    else:
+        out[have, 0] = s
+    out[have, 1] = np.where(m > 0, avg_cost[have] * (1.0 + m / 100.0), np.nan)
+    return out
+
+
+# ---------- Sinks ----------
+class JsonlAlertSink:
+    """
+    Append alerts as JSON lines to a local file (one line per alert).
+    """
+
+    def __init__(self, path: str = "alerts.jsonl"):
+        self.path = path
+        folder = os.path.dirname(path)
+        if folder:
+            os.makedirs(folder, exist_ok=True)
+
+    def __call__(self, alerts: List[Dict[str, Any]]) -> None:
+        with open(self.path, "a", encoding="utf-8") as fh:
+            for a in alerts:
+                fh.write(json.dumps(a, default=str) + "\n")
+
+
+# ---------- Engine ----------
+class AlertEngine:
+    """
+    Stop-loss / target / drawdown rules for every (client, holding), evaluated on each
+    price update.
+
+    State (one row per open holding, struct-of-arrays):
+      - sym[h], client[h], qty[h], avg_cost[h]
+      - levels[h, r]  : rule levels (NaN = rule off)
+                          stop_loss -> price at/below which to alert
+                          target    -> price at/above which to alert
+                          drawdown  -> percent below the holding's peak price
+      - peak[h]       : highest price seen since load (drawdown reference)
+      - fired[h, r]   : rule currently triggered; an alert is emitted only on the
+                        False -> True edge, and the rule re-arms once the price recovers
+    Holdings are grouped by symbol (CSR offsets), so a tick evaluates only that symbol's
+    holders and a snapshot evaluates the holders of the symbols that moved, each with a
+    handful of vectorised comparisons over the holdings x rules matrix.
+
+    Stop/target levels come from the latest StocksTable forecast per symbol whose
+    'Confidence level' >= min_confidence (see forecast_levels):
+      - 'Recommended stop-loss' as % below avg cost (stop_loss_mode="percent") or a price
+      - 'Stock volatility forecast' (expected % move) as a target above avg cost when > 0
+    Avg cost comes from split-adjusted lots, so it is in the same share basis as the ticks.
+    """
+
+    def __init__(self, sinks: Optional[List[Callable[[List[Dict[str, Any]]], None]]] = None,
+                 stop_loss_mode: str = "percent", max_drawdown_pct: Optional[float] = 15.0,
+                 min_confidence: float = 0.0):
+        """
+        Args:
+            sinks: callables receiving each batch of new alerts (e.g. JsonlAlertSink()).
+            stop_loss_mode: "percent" (% below avg cost) or "price" (absolute level).
+            max_drawdown_pct: default drawdown rule for every holding (None = off).
+            min_confidence: forecasts below this confidence do not arm stop/target rules.
+        """
+        assert stop_loss_mode in ("percent", "price"), "stop_loss_mode must be percent or price"
+        self.sinks = list(sinks or [])
+        self.stop_loss_mode = stop_loss_mode
+        self.max_drawdown_pct = max_drawdown_pct
+        self.min_confidence = min_confidence
+        self.set_holdings(pd.DataFrame(columns=["client_id", "ticker", "qty", "avg_cost"]))
+
+    # ---------- Holdings ----------
+    def set_holdings(self, holdings: pd.DataFrame, stocks_table: Optional[pd.DataFrame] = None,
+                     stock_lists: Optional[pd.DataFrame] = None) -> None:
+        """
+        Replace the holdings universe.
+
+        Args:
+            holdings: [client_id, ticker, qty, avg_cost] (+ optional stop_loss, target,
+                      drawdown_pct columns overriding the forecast/default levels).
+            stocks_table: StocksTable frame for forecast-driven stop/target levels.
+            stock_lists: universe table resolving 'Stocks Name' (ticker or company name)
+                         to the holdings' Yahoo symbols.
+        """
+        h = holdings[holdings["qty"].astype(float) > 1e-12] if len(holdings) else holdings
+        tickers = h["ticker"].astype(str).str.upper().to_numpy()
+        self.symbols, sym = np.unique(tickers, return_inverse=True)
+        self.slot = {s: i for i, s in enumerate(self.symbols)}
+        self.client_ids, client = np.unique(h["client_id"].astype(str).to_numpy(), return_inverse=True)
+
+        # Group holdings by symbol: rows of slot s are order[offsets[s]:offsets[s + 1]]
+        self.order = np.argsort(sym, kind="stable")
+        self.offsets = np.searchsorted(sym[self.order], np.arange(self.symbols.size + 1))
+        self.sym, self.client = sym.astype(np.intp), client.astype(np.intp)
+        self.qty = h["qty"].to_numpy(dtype="f8")
+        self.avg_cost = h["avg_cost"].to_numpy(dtype="f8")
+
+        levels = np.full((len(h), len(RULES)), np.nan)
+        levels[:, [STOP_LOSS, TARGET]] = forecast_levels(stocks_table, stock_lists, self.symbols[self.sym],
+                                                         self.avg_cost, self.stop_loss_mode, self.min_confidence)
+        if self.max_drawdown_pct is not None:
+            levels[:, DRAWDOWN] = self.max_drawdown_pct
+        for r, col in zip((STOP_LOSS, TARGET, DRAWDOWN), ("stop_loss", "target", "drawdown_pct")):
+            if col in h.columns:
+                given = pd.to_numeric(h[col], errors="coerce").to_numpy(dtype="f8")
+                levels[:, r] = np.where(np.isnan(given), levels[:, r], given)
+        self.levels = levels
+
+        self.prices = np.full(self.symbols.size, np.nan)
+        self.peak = np.full(len(h), np.nan)
+        self.fired = np.zeros((len(h), len(RULES)), dtype=bool)
+
+    def load_portfolio(self, portfolio, stocks_table: Optional[pd.DataFrame] = None,
+                       client_ids: Optional[List[str]] = None,
+                       stock_lists: Optional[pd.DataFrame] = None) -> int:
+        """
+        Load split-adjusted open holdings from the FIFO engine (default: every client in
+        portfolio.trades; clients with oversold histories are skipped).
+        Returns the number of holdings loaded.
+        """
+        if client_ids is None:
+            client_ids = [cid for (cid,) in portfolio.trade_table.groups(1)]
+        frames = [portfolio.open_holdings(cid, skip_oversold=True) for cid in client_ids]
+        frames = [f for f in frames if not f.empty]
+        holdings = (pd.concat(frames, ignore_index=True) if frames
+                    else pd.DataFrame(columns=["client_id", "ticker", "qty", "avg_cost"]))
+        self.set_holdings(holdings[["client_id", "ticker", "qty", "avg_cost"]], stocks_table, stock_lists)
+        return len(holdings)
+
+    # ---------- Evaluation ----------
+    def _evaluate(self, rows: Optional[np.ndarray], when: datetime) -> List[Dict[str, Any]]:
+        """
+        Evaluate the given holding rows (None = every holding, in place without gathers).
+        """
+        if rows is None:
+            rows = slice(None)
+            n = self.sym.size
+        else:
+            n = rows.size
+        if n == 0:
+            return []
+        px = self.prices[self.sym[rows]]
+        peak = np.fmax(self.peak[rows], px)
+        self.peak[rows] = peak
+        lv = self.levels[rows]
+
+        hit = np.empty((n, len(RULES)), dtype=bool)
+        hit[:, STOP_LOSS] = px <= lv[:, STOP_LOSS]           # NaN level/price -> False
+        hit[:, TARGET] = px >= lv[:, TARGET]
+        dd_level = peak * (1.0 - lv[:, DRAWDOWN] / 100.0)
+        hit[:, DRAWDOWN] = px <= dd_level
+
+        new = hit & ~self.fired[rows]
+        self.fired[rows] = hit
+        r_idx, rule = np.nonzero(new)
+        if r_idx.size == 0:
+            return []
+
+        h = r_idx if isinstance(rows, slice) else rows[r_idx]
+        level = np.where(rule == DRAWDOWN, dd_level[r_idx], lv[r_idx, rule])
+        stamp = when.isoformat(timespec="seconds")
+        alerts = [{
+            "time": stamp,
+            "client_id": str(self.client_ids[self.client[i]]),
+            "ticker": str(self.symbols[self.sym[i]]),
+            "rule": RULES[r],
+            "price": float(p),
+            "level": round(float(l), 6),
+            "qty": float(self.qty[i]),
+            "avg_cost": round(float(self.avg_cost[i]), 6),
+        } for i, r, p, l in zip(h, rule, px[r_idx], level)]
+        for sink in self.sinks:
+            sink(alerts)
+        return alerts
+
+    def _rows_for(self, slots: np.ndarray) -> Optional[np.ndarray]:
+        if slots.size == self.symbols.size:
+            return None  # everything moved
+        if slots.size == 0:
+            return np.empty(0, dtype=np.intp)
+        return np.concatenate([self.order[self.offsets[s]:self.offsets[s + 1]] for s in slots])
+
+    def on_tick(self, symbol: str, price: float, when: Optional[datetime] = None) -> List[Dict[str, Any]]:
+        """
+        One symbol moved: evaluate its holders only. Returns the new alerts.
+        """
+        slot = self.slot.get(str(symbol).upper())
+        if slot is None:
+            return []
+        self.prices[slot] = price
+        return self._evaluate(self.order[self.offsets[slot]:self.offsets[slot + 1]], when or datetime.now())
+
+    def on_snapshot(self, prices: Mapping[str, float], when: Optional[datetime] = None) -> List[Dict[str, Any]]:
+        """
+        Many symbols moved ({symbol: price}): update the price vector and evaluate the
+        holders of every symbol whose price changed. Returns the new alerts.
+        """
+        slots = np.fromiter((self.slot.get(str(s).upper(), -1) for s in prices), dtype=np.intp, count=len(prices))
+        values = np.fromiter(prices.values(), dtype="f8", count=len(prices))
+        known = slots >= 0
+        slots, values = slots[known], values[known]
+        moved = self.prices[slots] != values  # NaN (first price) counts as moved
+        self.prices[slots] = values
+        return self._evaluate(self._rows_for(np.unique(slots[moved])), when or datetime.now())
+
+    def state(self) -> pd.DataFrame:
+        """
+        One row per holding: levels, last price, peak and which rules are currently triggered.
+        """
+        frame = pd.DataFrame({
+            "client_id": self.client_ids[self.client] if self.client.size else [],
+            "ticker": self.symbols[self.sym] if self.sym.size else [],
+            "qty": self.qty,
+            "avg_cost": self.avg_cost,
+            "price": self.prices[self.sym] if self.sym.size else [],
+            "peak": self.peak,
+        })
+        for r, name in enumerate(RULES):
+            frame[f"{name}_level"] = self.levels[:, r]
+            frame[f"{name}_triggered"] = self.fired[:, r]
+        return frame
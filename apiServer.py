@@ -0,0 +1,324 @@
+from collections import OrderedDict
+from typing import Optional, Dict, Any, Tuple, Callable, List
+from urllib.parse import urlsplit, parse_qs, unquote
+import pandas as pd
+import asyncio
+import hashlib
+import json
+import time
+import os
+
+REASONS = {200: "OK", 202: "Accepted", 304: "Not Modified", 400: "Bad Request",
+           404: "Not Found", 405: "Method Not Allowed", 413: "Payload Too Large",
+           500: "Internal Server Error"}
+
+
+# ---------- Helpers ----------
+def _json_bytes(value: Any) -> bytes:
+    """
+    Serialise a route result (DataFrame -> list of records) to JSON bytes.
+    """
+    if isinstance(value, pd.DataFrame):
+        return value.to_json(orient="records", date_format="iso").encode("utf-8")
+    return json.dumps(value, default=str).encode("utf-8")
+
+
+def _etag(*parts: Any) -> str:
+    return '"' + hashlib.sha1("|".join(map(str, parts)).encode("utf-8")).hexdigest()[:20] + '"'
+
+
+# ---------- Server ----------
+class ApiServer:
+    """
+    Minimal asyncio HTTP/1.1 service over one warm clientManagement per process.
+
+    Routes (JSON):
+      GET  /health
+      GET  /clients/{id}/holdings          open positions (compute_positions)
+      GET  /clients/{id}/realized          realized PnL ledger
+      GET  /clients/{id}/equity?start=..&end=..  daily equity curve (equity_curve)
+      GET  /forecasts/{serial}             StocksTable rows for a Serial number
+      GET  /provenance/{serial}            prompt/response records behind those rows
+      GET  /exposure?sector=..&market=..   holders per sector/market (holdings index)
+      POST /recommendations                body = Recommended_stocks params -> job id
+      POST /grade                          body = {"stock_name": ...}       -> job id
+      GET  /jobs/{id}                      job status (+ result when done)
+
+    Caching:
+      - Responses carry an ETag built from the portfolio's trades_version, the price
+        store version and a price bucket (price_ttl seconds) — or the StocksTable version
+        for forecasts — and are cached by that ETag, so a repeat GET re-serves bytes and
+        If-None-Match answers 304 without touching pandas.
+      - Connections are kept alive (HTTP/1.1 default), and the StockManagement behind
+        the manager keeps its OpenAI client and PriceStore warm across requests.
+
+    Blocking pandas/yfinance work runs in a worker thread. The asyncio lock only stops
+    concurrent requests from computing the same body twice; the portfolio itself is
+    guarded by its own threading lock (portfolio.lock), which the JobQueue worker
+    threads take as well.
+    """
+
+    def __init__(self, manager, job_queue=None, price_ttl: float = 60.0,
+                 cache_size: int = 1024, idle_timeout: float = 30.0,
+                 max_body: int = 1 << 20):
+        """
+        Args:
+            manager: clientManagement instance (warm; shared by every request).
+            job_queue: JobQueue for the LLM routes (POST /recommendations, /grade).
+            price_ttl: seconds a holdings response is considered price-fresh.
+            cache_size: max cached response bodies (LRU).
+            idle_timeout: seconds before an idle keep-alive connection is closed.
+            max_body: largest accepted request body in bytes (larger -> 413, connection closed).
+        """
+        self.manager = manager
+        self.job_queue = job_queue
+        self.price_ttl = price_ttl
+        self.cache_size = cache_size
+        self.idle_timeout = idle_timeout
+        self.max_body = max_body
+        self._cache: "OrderedDict[str, bytes]" = OrderedDict()
+        self._lock = asyncio.Lock()
+        self.stats = {"requests": 0, "not_modified": 0, "cache_hits": 0}
+
+    # ---------- Versions ----------
+    def _price_version(self) -> Tuple[int, int]:
+        store = getattr(self.manager.AImanage, "price_store", None)
+        return (getattr(store, "version", 0), int(time.time() // self.price_ttl))
+
+    def _trades_version(self) -> Tuple[int, int]:
+        # Corporate actions restate holdings/realized without touching the trade table
+        portfolio = self.manager.clientManagement
+        return (portfolio.trades_version, portfolio.corporate_actions.version)
+
+    # ---------- Cache ----------
+    def _cache_get(self, etag: str) -> Optional[bytes]:
+        body = self._cache.get(etag)
+        if body is not None:
+            self._cache.move_to_end(etag)
+        return body
+
+    def _cache_put(self, etag: str, body: bytes) -> None:
+        self._cache[etag] = body
+        self._cache.move_to_end(etag)
+        while len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+
+    async def _cached(self, make_etag: Callable[[], str], headers: Dict[str, str],
+                      compute: Callable, *args) -> Tuple[int, bytes, Dict[str, str]]:
+        """
+        Conditional GET: 304 on If-None-Match, cached bytes on a hit, else compute + cache.
+
+        The ETag is re-derived after computing, because computing can itself move a
+        version (e.g. the price store topping up a symbol); the body is filed under
+        the ETag that describes it.
+        """
+        etag = make_etag()
+        if headers.get("if-none-match") == etag:
+            self.stats["not_modified"] += 1
+            return 304, b"", {"ETag": etag}
+        body = self._cache_get(etag)
+        if body is not None:
+            self.stats["cache_hits"] += 1
+            return 200, body, {"ETag": etag}
+
+        async with self._lock:
+            # Another request may have filled it while we waited for the lock
+            etag = make_etag()
+            body = self._cache_get(etag)
+            if body is not None:
+                self.stats["cache_hits"] += 1
+                return 200, body, {"ETag": etag}
+            body = _json_bytes(await asyncio.to_thread(compute, *args))
+            etag = make_etag()
+            self._cache_put(etag, body)
+        return 200, body, {"ETag": etag}
+
+    # ---------- Routes ----------
+    def _holdings(self, client_id: str) -> pd.DataFrame:
+        return self.manager.clientManagement.get_client_holdings(client_id)
+
+    def _realized(self, client_id: str) -> pd.DataFrame:
+        portfolio = self.manager.clientManagement
+        # Hold the lock across both calls: a job thread's compute_positions in between
+        # would replace the ledger with another client's
+        with portfolio.lock:
+            portfolio.compute_positions(client_id)
+            return portfolio.realized_pnl(client_id)
+
+    def _equity(self, client_id: str, start: Optional[str], end: Optional[str]) -> pd.DataFrame:
+        return self.manager.clientManagement.equity_curve(client_id, start=start, end=end)
+
+    def _forecasts(self, serial: str) -> pd.DataFrame:
+        return self.manager.context.keyed("stocksTable", ("Serial number",)).frame(serial)
+
+    def _provenance(self, serial: str, symbol: Optional[str]) -> List[Dict[str, Any]]:
+        return self.manager.AImanage.provenance.for_serial(serial, symbol)
+
+    def _exposure(self, sector: Optional[str], market: Optional[str]) -> Dict[str, Dict[str, float]]:
+        portfolio = self.manager.clientManagement
+        if sector is not None:
+            return portfolio.sector_exposure(sector, market)
+        return portfolio.holdings_index.exposure(market=market)
+
+    async def dispatch(self, method: str, target: str, headers: Dict[str, str],
+                       body: bytes) -> Tuple[int, bytes, Dict[str, str]]:
+        """
+        Route one request. Returns (status, body bytes, extra headers).
+        """
+        url = urlsplit(target)
+        parts = [unquote(p) for p in url.path.strip("/").split("/") if p]
+        query = {k: v[0] for k, v in parse_qs(url.query).items()}
+
+        if method == "GET":
+            if parts == ["health"]:
+                return 200, b'{"status": "ok"}', {}
+            if len(parts) == 3 and parts[0] == "clients" and parts[2] == "holdings":
+                cid = parts[1]
+                return await self._cached(lambda: _etag("holdings", cid, *self._trades_version(), *self._price_version()),
+                                          headers, self._holdings, cid)
+            if len(parts) == 3 and parts[0] == "clients" and parts[2] == "realized":
+                cid = parts[1]
+                return await self._cached(lambda: _etag("realized", cid, *self._trades_version()),
+                                          headers, self._realized, cid)
+            if len(parts) == 3 and parts[0] == "clients" and parts[2] == "equity":
+                cid, start, end = parts[1], query.get("start"), query.get("end")
+                return await self._cached(lambda: _etag("equity", cid, start, end, *self._trades_version(),
+                                                        *self._price_version()),
+                                          headers, self._equity, cid, start, end)
+            if len(parts) == 2 and parts[0] == "forecasts":
+                serial = parts[1]
+                return await self._cached(lambda: _etag("forecasts", serial, self.manager.context.version("stocksTable")),
+                                          headers, self._forecasts, serial)
+            if len(parts) == 2 and parts[0] == "provenance":
+                serial, symbol = parts[1], query.get("symbol")
+                store = self.manager.AImanage.provenance
+                return await self._cached(lambda: _etag("provenance", serial, symbol, len(store.entries(serial))),
+                                          headers, self._provenance, serial, symbol)
+            if parts == ["exposure"]:
+                sector, market = query.get("sector"), query.get("market")
+                return await self._cached(lambda: _etag("exposure", sector, market, *self._trades_version(),
+                                                        self.manager.context.version("stock_lists")),
+                                          headers, self._exposure, sector, market)
+            if len(parts) == 2 and parts[0] == "jobs" and self.job_queue is not None:
+                status = self.job_queue.status(parts[1])
+                if status is None:
+                    return 404, b'{"error": "unknown job"}', {}
+                status["result"] = self.job_queue.result(parts[1])
+                return 200, _json_bytes(status), {}
+            return 404, b'{"error": "not found"}', {}
+
+        if method == "POST":
+            if self.job_queue is None:
+                return 404, b'{"error": "job queue not configured"}', {}
+            try:
+                params = json.loads(body or b"{}")
+            except ValueError:
+                return 400, b'{"error": "body must be JSON"}', {}
+            if not isinstance(params, dict):
+                return 400, b'{"error": "body must be a JSON object"}', {}
+            try:
+                priority = int(params.pop("priority", 0))
+            except (TypeError, ValueError):
+                return 400, b'{"error": "priority must be an integer"}', {}
+            if parts == ["recommendations"]:
+                job_id = self.job_queue.submit("recommend", params, priority=priority)
+                return 202, _json_bytes({"job_id": job_id}), {"Location": f"/jobs/{job_id}"}
+            if parts == ["grade"]:
+                if "stock_name" not in params:
+                    return 400, b'{"error": "stock_name is required"}', {}
+                job_id = self.job_queue.submit("deep_look", params, priority=priority)
+                return 202, _json_bytes({"job_id": job_id}), {"Location": f"/jobs/{job_id}"}
+            return 404, b'{"error": "not found"}', {}
+
+        return 405, b'{"error": "method not allowed"}', {}
+
+    # ---------- HTTP/1.1 plumbing ----------
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        try:
+            while True:
+                try:
+                    request_line = await asyncio.wait_for(reader.readline(), self.idle_timeout)
+                except asyncio.TimeoutError:
+                    break
+                if not request_line:
+                    break
+                try:
+                    method, target, version = request_line.decode("latin-1").split()
+                except ValueError:
+                    break
+
+                headers: Dict[str, str] = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b"\r\n", b"\n", b""):
+                        break
+                    k, _, v = line.decode("latin-1").partition(":")
+                    headers[k.strip().lower()] = v.strip()
+                try:
+                    length = int(headers.get("content-length", 0) or 0)
+                except ValueError:
+                    length = -1
+
+                self.stats["requests"] += 1
+                keep_alive = (version == "HTTP/1.1" and headers.get("connection", "").lower() != "close") \
+                    or headers.get("connection", "").lower() == "keep-alive"
+                if length < 0:
+                    # The body cannot be skipped, so the connection is closed after replying
+                    status, payload, extra = 400, b'{"error": "invalid Content-Length"}', {}
+                    keep_alive = False
+                elif length > self.max_body:
+                    status, payload, extra = 413, b'{"error": "request body too large"}', {}
+                    keep_alive = False
+                else:
+                    body = await reader.readexactly(length) if length else b""
+                    try:
+                        status, payload, extra = await self.dispatch(method.upper(), target, headers, body)
+                    except Exception as e:  # one bad request must not kill the connection loop
+                        status, payload, extra = 500, _json_bytes({"error": f"{type(e).__name__}: {e}"}), {}
+
+                head = [f"HTTP/1.1 {status} {REASONS.get(status, '')}",
+                        f"Content-Length: {len(payload)}",
+                        f"Connection: {'keep-alive' if keep_alive else 'close'}"]
+                if status != 304:
+                    head.append("Content-Type: application/json")
+                head += [f"{k}: {v}" for k, v in extra.items()]
+                writer.write(("\r\n".join(head) + "\r\n\r\n").encode("latin-1") + payload)
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    async def start(self, host: str = "127.0.0.1", port: int = 8080) -> asyncio.AbstractServer:
+        """
+        Bind and start serving; returns the asyncio server (await server.serve_forever()).
+        """
+        return await asyncio.start_server(self._handle, host, port)
+
+
+async def serve(host: str = "127.0.0.1", port: int = 8080) -> None:
+    """
+    Build one warm StockManagement/clientManagement/JobQueue and serve forever.
+    Reads the OpenAI key from the OPENAI_API_KEY environment variable.
+    """
+    from brokai.StockManagement import StockManagement
+    from brokai.clientManagement import clientManagement
+    from brokai.jobQueue import JobQueue
+
+    sm = StockManagement(os.environ.get("OPENAI_API_KEY", ""))
+    manager = clientManagement(sm)
+    queue = JobQueue(manager)
+    queue.start()
+    server = await ApiServer(manager, queue).start(host, port)
+    print(f"brokai API listening on http://{host}:{port}")
+    try:
+        async with server:
+            await server.serve_forever()
+    finally:
+        queue.shutdown(wait=False)
+
+
+if __name__ == "__main__":
+    asyncio.run(serve(os.environ.get("BROKAI_HOST", "127.0.0.1"), int(os.environ.get("BROKAI_PORT", "8080"))))
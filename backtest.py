@@ -0,0 +1,233 @@
+from typing import Optional, Dict, List, Any
+import numpy as np
+import pandas as pd
+from brokai.priceStore import PriceStore
+from brokai.symbolMaster import symbol_map
+
+# Confidence buckets used for calibration (right-inclusive, like pd.cut)
+DEFAULT_CONFIDENCE_BINS = [0, 50, 60, 70, 80, 90, 100]
+
+SCORED_COLUMNS = [
+    "Serial number", "Stocks Name", "symbol", "direction", "Confidence level",
+    "Buy date", "Sale date", "entry_price", "exit_price", "return_to_sale",
+    "hit", "stop_price", "stop_triggered", "return_with_stop", "valid"
+]
+
+
+# ---------- Helpers ----------
+def _direction(values: pd.Series) -> np.ndarray:
+    """
+    Map the 'Stock volatility forecast' column to +1 (up) / -1 (down) / 0 (unknown).
+    Accepts numbers (sign is used) or 'up'/'down' strings as returned by the LLM.
+    """
+    num = pd.to_numeric(values, errors="coerce").to_numpy(dtype="f8")
+    out = np.sign(np.nan_to_num(num))
+    # Only parse text for the rows that are not numeric
+    text_rows = np.flatnonzero(np.isnan(num))
+    if text_rows.size:
+        text = values.iloc[text_rows].astype(str).str.strip().str.lower()
+        out[text_rows[text.str.startswith("up").to_numpy()]] = 1
+        out[text_rows[text.str.startswith("down").to_numpy()]] = -1
+    return out.astype(np.int8)
+
+
+def _ffill_columns(m: np.ndarray) -> np.ndarray:
+    """
+    Forward-fill NaNs down each column without a Python loop.
+    """
+    idx = np.where(~np.isnan(m), np.arange(m.shape[0])[:, None], 0)
+    np.maximum.accumulate(idx, axis=0, out=idx)
+    return m[idx, np.arange(m.shape[1])]
+
+
+def _range_min(m: np.ndarray, lo: np.ndarray, hi: np.ndarray, col: np.ndarray) -> np.ndarray:
+    """
+    Vectorised min of m[lo:hi+1, col] for many (lo, hi, col) queries via a sparse table.
+    NaNs are ignored (np.fmin). Build is O(T log T) per column, each query O(1).
+    """
+    out = np.full(lo.shape, np.nan)
+    if lo.size == 0:
+        return out
+    table = [m]
+    while (1 << len(table)) <= m.shape[0]:
+        half = 1 << (len(table) - 1)
+        prev = table[-1]
+        table.append(np.fmin(prev[:-half], prev[half:]))
+
+    k = np.floor(np.log2(hi - lo + 1)).astype(int)
+    for level in np.unique(k):
+        sel = k == level
+        t = table[level]
+        out[sel] = np.fmin(t[lo[sel], col[sel]], t[hi[sel] - (1 << level) + 1, col[sel]])
+    return out
+
+
+# ---------- Backtester ----------
+class ForecastBacktester:
+    """
+    Score StocksTable forecasts against realised prices from the local PriceStore.
+
+    For every forecast row (all rows at once, NumPy only):
+      - entry = close on the first session on/after 'Buy date'
+      - exit  = close on the last session on/before 'Sale date'
+      - hit   = realised direction matches the forecast direction
+      - stop  = 'Recommended stop-loss' checked against the lowest low in the holding window
+
+    Use calibration() / threshold_sweep() on the scored frame to tune
+    confidencePresentage in clientManagement.Recommended_stocks.
+    """
+
+    def __init__(self, price_store: PriceStore, stock_lists: Optional[pd.DataFrame] = None,
+                 stop_loss_mode: str = "percent"):
+        """
+        Args:
+            price_store: PriceStore to read OHLCV from (read first; top-up only if asked).
+            stock_lists: universe table [Ticker, Name, Market, Sector] used to resolve
+                         'Stocks Name' (ticker or name) to a Yahoo symbol.
+            stop_loss_mode: "percent" -> stop-loss is % below entry (e.g. 8 = -8%),
+                            "price"   -> stop-loss is an absolute price level.
+        """
+        assert stop_loss_mode in ("percent", "price"), "stop_loss_mode must be percent or price"
+        self.price_store = price_store
+        self.stock_lists = stock_lists
+        self.stop_loss_mode = stop_loss_mode
+
+    def score(self, stocks_table: pd.DataFrame, fetch_missing: bool = False) -> pd.DataFrame:
+        """
+        Join every forecast row to its realised price path and score it.
+
+        Args:
+            stocks_table: StocksTable-shaped DataFrame.
+            fetch_missing: top up the price store for the needed ranges first (network).
+
+        Returns:
+            DataFrame with SCORED_COLUMNS (one row per forecast; 'valid' is False when the
+            price history does not cover the window yet).
+        """
+        if stocks_table.empty:
+            return pd.DataFrame(columns=SCORED_COLUMNS)
+
+        names = stocks_table["Stocks Name"].astype(str).to_numpy()
+        codes, uniq = pd.factorize(names)
+        sym_map = symbol_map(self.stock_lists, uniq)
+        symbols = [sym_map[n] for n in uniq]
+
+        buy = pd.to_datetime(stocks_table["Buy date"], errors="coerce").to_numpy().astype("datetime64[D]")
+        sale = pd.to_datetime(stocks_table["Sale date"], errors="coerce").to_numpy().astype("datetime64[D]")
+        if np.isnat(buy).all() or np.isnat(sale).all():
+            start = end = None
+        else:
+            start, end = np.nanmin(buy), np.nanmax(sale)
+
+        if fetch_missing:
+            for s in symbols:
+                self.price_store.ensure(s, start, end)
+
+        dates, close = self.price_store.close_matrix(symbols, start, end, field="close")
+        _, low = self.price_store.close_matrix(symbols, start, end, field="low")
+
+        n = len(stocks_table)
+        entry = np.full(n, np.nan)
+        exit_px = np.full(n, np.nan)
+        min_low = np.full(n, np.nan)
+        valid = np.zeros(n, dtype=bool)
+
+        if dates.size:
+            close = _ffill_columns(close)
+            lo = np.searchsorted(dates, buy, side="left")
+            hi = np.searchsorted(dates, sale, side="right") - 1
+            valid = (~np.isnat(buy)) & (~np.isnat(sale)) & (lo <= hi) & (lo < dates.size) & (hi >= 0)
+            v = np.flatnonzero(valid)
+            entry[v] = close[lo[v], codes[v]]
+            exit_px[v] = close[hi[v], codes[v]]
+            min_low[v] = _range_min(low, lo[v], hi[v], codes[v])
+            valid &= ~np.isnan(entry) & ~np.isnan(exit_px)
+
+        ret = exit_px / entry - 1.0
+        direction = _direction(stocks_table["Stock volatility forecast"])
+        hit = valid & (np.sign(ret) == direction) & (direction != 0)
+
+        stop = pd.to_numeric(stocks_table["Recommended stop-loss"], errors="coerce").to_numpy(dtype="f8")
+        stop_price = entry * (1.0 - np.abs(stop) / 100.0) if self.stop_loss_mode == "percent" else stop
+        stop_triggered = valid & ~np.isnan(stop_price) & (min_low <= stop_price)
+        ret_with_stop = np.where(stop_triggered, stop_price / entry - 1.0, ret)
+
+        return pd.DataFrame({
+            "Serial number": stocks_table["Serial number"].to_numpy(),
+            "Stocks Name": names,
+            "symbol": np.asarray(symbols, dtype=object)[codes],
+            "direction": direction,
+            "Confidence level": pd.to_numeric(stocks_table["Confidence level"], errors="coerce").to_numpy(),
+            "Buy date": buy,
+            "Sale date": sale,
+            "entry_price": entry,
+            "exit_price": exit_px,
+            "return_to_sale": ret,
+            "hit": hit,
+            "stop_price": stop_price,
+            "stop_triggered": stop_triggered,
+            "return_with_stop": ret_with_stop,
+            "valid": valid,
+        })
+
+    # ---------- Reports ----------
+    @staticmethod
+    def summary(scored: pd.DataFrame) -> Dict[str, Any]:
+        """
+        Headline numbers over valid rows: count, hit rate, mean returns, stop-loss trigger rate.
+        """
+        v = scored[scored["valid"]]
+        if v.empty:
+            return {"rows": 0, "hit_rate": None, "mean_return": None,
+                    "mean_return_with_stop": None, "stop_trigger_rate": None}
+        return {
+            "rows": int(len(v)),
+            "hit_rate": float(v["hit"].mean()),
+            "mean_return": float(v["return_to_sale"].mean()),
+            "mean_return_with_stop": float(v["return_with_stop"].mean()),
+            "stop_trigger_rate": float(v["stop_triggered"].mean()),
+        }
+
+    @staticmethod
+    def calibration(scored: pd.DataFrame, bins: Optional[List[int]] = None) -> pd.DataFrame:
+        """
+        Hit rate per confidence bucket. A calibrated model has hit_rate ≈ mean_confidence / 100.
+        """
+        bins = bins or DEFAULT_CONFIDENCE_BINS
+        v = scored[scored["valid"]]
+        bucket = pd.cut(v["Confidence level"], bins=bins, include_lowest=True)
+        out = v.groupby(bucket, observed=False).agg(
+            rows=("hit", "size"),
+            mean_confidence=("Confidence level", "mean"),
+            hit_rate=("hit", "mean"),
+            mean_return=("return_to_sale", "mean"),
+            stop_trigger_rate=("stop_triggered", "mean"),
+        )
+        return out.reset_index().rename(columns={"Confidence level": "confidence_bucket"})
+
+    @staticmethod
+    def threshold_sweep(scored: pd.DataFrame, thresholds: Optional[List[int]] = None) -> pd.DataFrame:
+        """
+        What a given confidencePresentage would have kept: rows, hit rate and mean return
+        for every forecast with 'Confidence level' >= threshold.
+        """
+        thresholds = thresholds if thresholds is not None else list(range(50, 100, 5))
+        v = scored[scored["valid"]]
+        conf = v["Confidence level"].to_numpy(dtype="f8")
+        hit = v["hit"].to_numpy(dtype="f8")
+        ret = v["return_to_sale"].to_numpy(dtype="f8")
+
+        # Sort once by confidence (descending) and read every threshold off cumulative sums
+        order = np.argsort(-conf, kind="stable")
+        c_sorted = conf[order]
+        cum_hit = np.concatenate([[0.0], np.cumsum(hit[order])])
+        cum_ret = np.concatenate([[0.0], np.cumsum(ret[order])])
+        counts = np.searchsorted(-c_sorted, -np.asarray(thresholds, dtype="f8"), side="right")
+
+        with np.errstate(invalid="ignore", divide="ignore"):
+            return pd.DataFrame({
+                "threshold": thresholds,
+                "rows": counts,
+                "hit_rate": np.where(counts > 0, cum_hit[counts] / counts, np.nan),
+                "mean_return": np.where(counts > 0, cum_ret[counts] / counts, np.nan),
+            })
@@ -1,26 +1,18 @@
 # client_portfolio.py
 from dataclasses import dataclass
-from typing import Optional, List, Dict, Any
-from brokai.StockManagement import StockManagement
+from typing import Optional, List, Dict, Any, Tuple
 from datetime import datetime, timedelta
 import pandas as pd
-import yfinance as yf
+import threading
 import os
 import random
 import string
 import os  # (duplicate import is harmless, you can remove this)
 
 # ---------- Helpers ----------
-def normalize_ticker(ticker: str, market: str) -> str:
-    """
-    Normalize a user/DB ticker to the Yahoo Finance symbol for the given market.
-    - Adds '.TA' suffix for Israeli (TASE) tickers because Yahoo uses that pattern.
-    """
-    t = str(ticker).strip().upper()
-    m = str(market).strip().upper()
-    if m == "IL" and not t.endswith(".TA"):
-        t += ".TA"
-    return t
+# normalize_ticker lives in the symbol master (one suffix table for every market);
+# re-exported here because the rest of the package imports it from this module.
+from brokai.symbolMaster import normalize_ticker
 
 def latest_close_yf(ticker: str) -> Optional[float]:
     """
@@ -29,6 +21,7 @@ def latest_close_yf(ticker: str) -> Optional[float]:
     Returns None if no data.
     """
     try:
+        import yfinance as yf  # imported on first price lookup (slow import)
         tk = yf.Ticker(ticker)
         # Try 1-minute intraday (works only for active sessions / recently active symbols)
         intraday = tk.history(period="1d", interval="1m")
@@ -80,6 +73,7 @@ class NewModelClientPortfolio:
     - Compute realized PnL (closed lots) and unrealized PnL (open lots)
     - Persist a per-client Excel workbook (Trades / Holdings / RealizedPnL / Totals)
     - (Optional) Register tickers in your AI universe via StockManagement
+    - Maintain ticker/market/sector -> holders indexes (self.holdings_index) as trades arrive
 
     NOTE:
     - This class assumes 'xlsxwriter' is installed for Excel writing.
@@ -103,10 +97,106 @@ class NewModelClientPortfolio:
         # Keep a handle to your AI management layer
         self.AImanage = StockManagement
 
+        # Bumped on every change to self.trades (cache keys / HTTP ETags build on it)
+        self.trades_version = 0
+        # KeyedTable indexes over trades / realized ledger (zero-copy slices by client, ticker)
+        self._trade_table = None
+        self._trade_table_key = None
+        self._adjusted_table = None
+        self._adjusted_table_key = None
+        self._ledger_table = None
+        self._ledger_table_src = None
+        # Clients whose workbook was already merged into memory in this process
+        self._loaded_clients = set()
+        # Realized PnL carried by compacted log snapshots, for trades no longer in memory
+        self._carried: Dict[str, pd.DataFrame] = {}
+        # Serialises every change to trades / realized_ledger: API handlers and JobQueue
+        # worker threads share this object (re-entrant: compute_positions loads clients)
+        self.lock = threading.RLock()
+
+        # Inverted holdings index (ticker/market/sector -> clients); sectors are joined from
+        # stock_lists on the first sector query so building this class does not load the universe
+        from brokai.holdingsIndex import HoldingsIndex  # local import: holdingsIndex imports this module
+        self._holdings_index = HoldingsIndex()
+        self._holdings_index_key = None
+        self._universe_joined = False
+        context = getattr(StockManagement, "context", None)
+        if context is not None:
+            # Re-join sectors lazily whenever the universe table changes
+            context.subscribe("stock_lists", lambda name, df: setattr(self, "_universe_joined", False))
+
         # Folder for per-client Excel files
         self.storage_dir = "clients_portfolios"
         os.makedirs(self.storage_dir, exist_ok=True)
 
+        # Durable source of truth for trades: append-only event log + snapshots per client
+        # (the workbook is an export written by save_client_excel)
+        from brokai.tradeLog import TradeLog
+        self.trade_log = TradeLog(os.path.join(self.storage_dir, "logs"))
+
+        # Splits / cash dividends applied to trades before FIFO matching (table is optional)
+        from brokai.corporateActions import CorporateActions
+        self.corporate_actions = CorporateActions(os.path.join(self.storage_dir, "corporate_actions.csv"))
+
+    # ---------- Keyed views ----------
+    @property
+    def trade_table(self):
+        """
+        KeyedTable of self.trades by (client_id, ticker), rebuilt after trades change.
+        """
+        key = (self.trades_version, id(self.trades), len(self.trades))
+        if self._trade_table is None or self._trade_table_key != key:
+            from brokai.keyedTables import KeyedTable
+            self._trade_table = KeyedTable(self.trades, ("client_id", "ticker"))
+            self._trade_table_key = key
+        return self._trade_table
+
+    @property
+    def adjusted_table(self):
+        """
+        KeyedTable of self.trades restated in today's shares (corporate_actions.adjust_trades),
+        by (client_id, ticker). Every open-lot consumer FIFO-matches on this table, so lots
+        are always in the same share basis as the prices they are valued at.
+        Rebuilt when trades, the corporate-actions table or the calendar day change.
+        """
+        actions = self.corporate_actions
+        key = (self.trades_version, id(self.trades), len(self.trades), actions.version, datetime.now().date())
+        if self._adjusted_table is None or self._adjusted_table_key != key:
+            from brokai.keyedTables import KeyedTable
+            self._adjusted_table = KeyedTable(actions.adjust_trades(self.trades), ("client_id", "ticker"))
+            self._adjusted_table_key = key
+        return self._adjusted_table
+
+    @property
+    def holdings_index(self):
+        """
+        HoldingsIndex of open quantities in today's shares, fed from adjusted_table.
+        Trades update it incrementally; every loaded client is rebuilt when the
+        corporate-actions table or the calendar day change (a split going ex restates
+        every holder of that ticker).
+        """
+        key = (self.corporate_actions.version, datetime.now().date())
+        if self._holdings_index_key != key:
+            with self.lock:
+                if self._holdings_index_key != key:
+                    table = self.adjusted_table
+                    clients = set(self.trades["client_id"]) | set(self._holdings_index.by_client)
+                    for cid in clients:
+                        self._holdings_index.rebuild_client(cid, table.frame(cid))
+                    self._holdings_index_key = key
+        return self._holdings_index
+
+    @property
+    def ledger_table(self):
+        """
+        KeyedTable of the realized ledger by client_id (rebuilt per compute_positions run).
+        """
+        if self._ledger_table is None or self._ledger_table_src is not self.realized_ledger:
+            from brokai.keyedTables import KeyedTable
+            self._ledger_table = KeyedTable(self.realized_ledger, ("client_id",))
+            self._ledger_table_src = self.realized_ledger
+        return self._ledger_table
+
     # ---------- Paths ----------
     def _client_path(self, client_id: str) -> str:
         """
@@ -116,42 +206,73 @@ class NewModelClientPortfolio:
         return os.path.join(self.storage_dir, f"{safe_id}_portfolio.xlsx")
 
     # ---------- Load existing client workbook (if any) ----------
-    def ensure_client_loaded(self, client_id: str):
+    def ensure_client_loaded(self, client_id: str, reload: bool = False):
         """
-        Merge a client's saved Trades from their Excel workbook into memory (deduped).
+        Merge a client's saved trades into memory (deduped).
+
+        Source: the client's trade log (snapshot + tail replay) if one exists; otherwise the
+        'Trades' sheet of their Excel workbook, which is then imported into the log. Read
+        once per client per process (all later writes go through this object anyway);
+        pass reload=True to pick up edits made outside the process.
 
         Side-effects:
-            - If 'clients_portfolios/<client>_portfolio.xlsx' exists, reads 'Trades' sheet
-              and appends into self.trades, dropping exact duplicates across all columns.
+            - Appends into self.trades, dropping exact duplicates across all columns.
+            - A compacted snapshot loads as its open lots (BUY rows) plus carried realized
+              PnL (self._carried), which compute_positions adds to the ledger.
+        """
+        with self.lock:
+            if client_id in self._loaded_clients and not reload:
+                return
+            self._loaded_clients.add(client_id)
+
+            trades = self.trade_log.recover(client_id)
+            if trades is None:
+                trades = self._read_workbook_trades(client_id)
+                if trades is None:
+                    return
+                # One-time migration: the workbook's trades become the first log events
+                self.trade_log.append_many(client_id, trades)
+            else:
+                carried = self.trade_log.carried(client_id)
+                if carried.empty:
+                    self._carried.pop(client_id, None)
+                else:
+                    self._carried[client_id] = carried
+            if trades.empty:
+                return
+
+            self.trades = pd.concat([self.trades, trades], ignore_index=True)
+            # De-duplicate by all trade columns (acts like id-less upsert)
+            # ignore_index keeps labels 0..n-1 so add_trade's loc[len(...)] never overwrites a row
+            self.trades.drop_duplicates(
+                subset=["client_id","ticker","market","side","qty","price","trade_time"],
+                inplace=True, ignore_index=True
+            )
+            self.trades_version += 1
+            self.holdings_index.rebuild_client(client_id, self.adjusted_table.frame(client_id))
+
+    def _read_workbook_trades(self, client_id: str) -> Optional[pd.DataFrame]:
+        """
+        'Trades' sheet of the client's workbook, or None if there is no (non-empty) sheet.
         """
         path = self._client_path(client_id)
         if not os.path.exists(path):
-            return
-
+            return None
         xl = pd.read_excel(path, sheet_name=None)
-        if "Trades" not in xl:
-            return
-
+        if "Trades" not in xl or xl["Trades"].empty:
+            return None
         trades = xl["Trades"].copy()
-        if trades.empty:
-            return
-
         if "trade_time" in trades.columns:
             trades["trade_time"] = pd.to_datetime(trades["trade_time"])
-
-        self.trades = pd.concat([self.trades, trades], ignore_index=True)
-        # De-duplicate by all trade columns (acts like id-less upsert)
-        self.trades.drop_duplicates(
-            subset=["client_id","ticker","market","side","qty","price","trade_time"],
-            inplace=True
-        )
+        return trades
 
     # ---------- CRUD ----------
     def add_trade(self, client_id: str, ticker: str, market: str,
                   side: str, qty: float, price: float,
                   trade_time: Optional[datetime] = None):
         """
-        Add a new BUY/SELL to the in-memory trades table (no file I/O).
+        Add a new BUY/SELL to the in-memory trades table and append it to the client's
+        trade log (one short line; fsync is batched, see TradeLog).
 
         Raises:
             AssertionError if side invalid or qty/price non-positive.
@@ -160,23 +281,36 @@ class NewModelClientPortfolio:
             Call save_client_excel(client_id) after batches if you pass autosave=False
             in add_trade_for_client() for performance.
         """
-        side_u = str(side).strip().upper()
-        assert side_u in ("BUY","SELL"), "side must be BUY or SELL"
-        assert qty > 0 and price >= 0, "qty>0 and price>=0 required"
-        trade_time = trade_time or datetime.utcnow()
-
-        t_norm = normalize_ticker(ticker, market)
-        row = {
-            "client_id": client_id,
-            "ticker": t_norm,
-            "market": str(market).strip().upper(),
-            "side": side_u,
-            "qty": float(qty),
-            "price": float(price),
-            "trade_time": trade_time
-        }
-        # Append without concat warning
-        self.trades.loc[len(self.trades)] = row
+        with self.lock:
+            side_u = str(side).strip().upper()
+            assert side_u in ("BUY","SELL"), "side must be BUY or SELL"
+            assert qty > 0 and price >= 0, "qty>0 and price>=0 required"
+            trade_time = trade_time or datetime.utcnow()
+            # The log must start from the client's full history (imports a legacy workbook once)
+            self.ensure_client_loaded(client_id)
+
+            t_norm = normalize_ticker(ticker, market)
+            row = {
+                "client_id": client_id,
+                "ticker": t_norm,
+                "market": str(market).strip().upper(),
+                "side": side_u,
+                "qty": float(qty),
+                "price": float(price),
+                "trade_time": trade_time
+            }
+            # Bring the index up to date before the row lands, so a rebuild cannot count it twice
+            index = self.holdings_index
+            # Append without concat warning
+            self.trades.loc[len(self.trades)] = row
+            self.trades_version += 1
+            # The index holds today's shares, like adjusted_table
+            shares = row["qty"] * self.corporate_actions.split_factor(t_norm, [trade_time], datetime.now())[0]
+            index.apply(client_id, t_norm, row["market"], shares if side_u == "BUY" else -shares)
+
+            self.trade_log.append(client_id, row)
+            if self.trade_log.needs_snapshot(client_id):
+                self.trade_log.snapshot(client_id, *self._compact(client_id))
 
     def add_trade_for_client(self, client_id: str, ticker: str, market: str,
                              side: str, qty: float, price: float,
@@ -184,27 +318,32 @@ class NewModelClientPortfolio:
                              autosave: bool = True):
         """
         Convenience: load client's prior Trades (if any), register the ticker in your
-        AI stock list, add trade, and optionally refresh & save the Excel workbook.
+        AI stock list, add trade, and optionally make it durable right away.
 
         Side-effects:
             - Calls AImanage.Client_add_stock_to_list(self.AImanage.client, ticker)
               so your universe stays updated in stock_lists.xlsx
-            - When autosave=True, writes the 4-sheet workbook to disk.
+            - When autosave=True, fsyncs the client's trade log (the workbook is only
+              rewritten by save_client_excel, e.g. for reporting).
         """
         self.ensure_client_loaded(client_id)
         # Register the ticker with your AI universe (you can remove this if not wanted)
         self.AImanage.Client_add_stock_to_list(self.AImanage.client, ticker)
         # Record the trade in memory
         self.add_trade(client_id, ticker, market, side, qty, price, trade_time)
-        # Persist (recompute positions + write workbook)
+        # Persist (one fsync of the log; no workbook rewrite)
         if autosave:
-            self.save_client_excel(client_id)
+            self.trade_log.flush(client_id)
 
     # ---------- FIFO & PnL ----------
-    def _fifo_match(self, client_id: str, ticker: str) -> Dict[str, Any]:
+    def _fifo_match(self, client_id: str, ticker: str, trades: Optional[pd.DataFrame] = None) -> Dict[str, Any]:
         """
         Internal: FIFO match SELLs to prior BUY lots to compute realized PnL.
 
+        Args:
+            trades: trade frame to match on (defaults to this group's split-adjusted slice
+                    of adjusted_table; compute_positions/equity_curve pass their own).
+
         Returns:
             {
                 "open_lots": [ {qty, price, time, market}, ... ]  # remaining BUY lots
@@ -214,8 +353,11 @@ class NewModelClientPortfolio:
         Raises:
             ValueError if a SELL exceeds available BUY quantity (shorts not allowed here).
         """
-        df = self.trades[(self.trades.client_id == client_id) & (self.trades.ticker == ticker)].copy()
-        df = df.sort_values("trade_time")
+        if trades is None:
+            df = self.adjusted_table.frame(client_id, ticker)
+        else:
+            df = trades[(trades.client_id == client_id) & (trades.ticker == ticker)]
+        df = df.sort_values("trade_time", kind="stable")
 
         open_lots: List[Dict[str, Any]] = []
         realized_rows: List[Dict[str, Any]] = []
@@ -259,12 +401,97 @@ class NewModelClientPortfolio:
                        pd.DataFrame(columns=["client_id","ticker","market","trade_time","qty_sold","proceeds","cost","realized_pnl"]))
         return {"open_lots": open_lots, "realized": realized_df}
 
-    def compute_positions(self, client_id: Optional[str] = None) -> pd.DataFrame:
+    def open_lots(self, client_id: str, skip_oversold: bool = False) -> Dict[str, List[Dict[str, Any]]]:
+        """
+        {ticker: [{qty, price, time, market}, ...]} of the client's remaining FIFO lots in
+        today's shares (split-adjusted, see adjusted_table). The one entry point for
+        holdings consumers (price feed, alerts, simulator, log snapshots).
+
+        Args:
+            skip_oversold: leave out tickers whose history sells more than it bought
+                           instead of raising ValueError.
+        """
+        with self.lock:
+            self.ensure_client_loaded(client_id)
+            table = self.adjusted_table
+            lots: Dict[str, List[Dict[str, Any]]] = {}
+            for tkr in pd.unique(table.frame(client_id)["ticker"]):
+                try:
+                    open_lots = self._fifo_match(client_id, tkr, table.frame(client_id, tkr))["open_lots"]
+                except ValueError:
+                    if not skip_oversold:
+                        raise
+                    continue
+                if open_lots:
+                    lots[tkr] = open_lots
+            return lots
+
+    def open_holdings(self, client_id: str, skip_oversold: bool = False) -> pd.DataFrame:
+        """
+        open_lots() aggregated per ticker -> [client_id, ticker, market, qty, cost_basis, avg_cost].
+        """
+        rows = []
+        for tkr, lots in self.open_lots(client_id, skip_oversold).items():
+            qty = float(sum(l["qty"] for l in lots))
+            if qty > 1e-12:
+                cost = float(sum(l["qty"] * l["price"] for l in lots))
+                rows.append((client_id, tkr, lots[-1]["market"], qty, cost, cost / qty))
+        return pd.DataFrame(rows, columns=["client_id", "ticker", "market", "qty", "cost_basis", "avg_cost"])
+
+    def _compact(self, client_id: str) -> Tuple[pd.DataFrame, pd.DataFrame]:
+        """
+        The client's book reduced to what a log snapshot must keep (see TradeLog.snapshot):
+
+            lots:     open FIFO lots as BUY rows, restated back to the share basis of the
+                      day they were bought so corporate actions replay on them like on any
+                      trade (raw trades kept for tickers that cannot be FIFO-matched)
+            realized: one row per ticker with the realized PnL the lots no longer produce:
+                      FIFO sales + dividends on the full history - dividends on the lots,
+                      plus anything already carried from an earlier snapshot
+        """
+        cols = ["client_id", "ticker", "market", "side", "qty", "price", "trade_time"]
+        actions = self.corporate_actions
+        now = datetime.now()
+        trades = self.trade_table.frame(client_id)
+        table = self.adjusted_table
+
+        lot_rows, raw, parts = [], [], []
+        for tkr in pd.unique(trades["ticker"]):
+            try:
+                fifo = self._fifo_match(client_id, tkr, table.frame(client_id, tkr))
+            except ValueError:
+                raw.append(self.trade_table.frame(client_id, tkr)[cols])
+                continue
+            parts.append(fifo["realized"])
+            lots = fifo["open_lots"]
+            if lots:
+                factor = actions.split_factor(tkr, [l["time"] for l in lots], now)
+                lot_rows += [(client_id, tkr, l["market"], "BUY", l["qty"] / f, l["price"] * f, l["time"])
+                             for l, f in zip(lots, factor)]
+        lots = pd.concat([pd.DataFrame(lot_rows, columns=cols)] + raw, ignore_index=True)
+
+        div_full, div_lots = actions.dividends(trades, now), actions.dividends(lots, now)
+        if not div_lots.empty:
+            div_lots = div_lots.assign(proceeds=-div_lots["proceeds"], realized_pnl=-div_lots["realized_pnl"])
+        parts += [div_full, div_lots, self._carried.get(client_id)]
+        parts = [p for p in parts if p is not None and not p.empty]
+        if not parts:
+            return lots, self.realized_ledger.iloc[0:0]
+        realized = (pd.concat(parts, ignore_index=True)
+                      .groupby(["client_id", "ticker"], sort=True)
+                      .agg(market=("market", "last"), trade_time=("trade_time", "max"),
+                           qty_sold=("qty_sold", "sum"), proceeds=("proceeds", "sum"),
+                           cost=("cost", "sum"), realized_pnl=("realized_pnl", "sum"))
+                      .reset_index())
+        return lots, realized[self.realized_ledger.columns]
+
+    def compute_positions(self, client_id: Optional[str] = None, workers: Optional[int] = None) -> pd.DataFrame:
         """
         Rebuild realized PnL and compute current open positions with market values.
 
         Steps per (client_id, ticker):
-            - FIFO-match to populate self.realized_ledger
+            - Restate trades in today's shares (splits from self.corporate_actions)
+            - FIFO-match to populate self.realized_ledger (+ one row per cash dividend received)
             - Aggregate remaining lots -> qty, avg_cost, cost_basis
             - Fetch last price via yfinance -> market_value
             - Compute unrealized_pnl
@@ -277,78 +504,151 @@ class NewModelClientPortfolio:
         Notes:
             - If client_id is None, computes for all clients (and fills realized_ledger for all).
             - This function reaches out to Yahoo; consider rate limiting for large universes.
+            - Dividend rows in the ledger have qty_sold 0 and cost 0 (proceeds = realized_pnl = cash).
+            - Clients loaded from a compacted log snapshot also get one carried row per ticker
+              for the sales/dividends before the snapshot (see _compact).
+            - workers > 1 runs the FIFO stage on a process pool (positionsPool.parallel_fifo):
+              clients are sharded, trades shipped through shared memory, and the output is
+              identical to the serial path.
         """
-        # Load prior saved trades (no-op if workbook missing)
-        self.ensure_client_loaded(client_id)
+        with self.lock:
+            # Load prior saved trades (no-op if workbook missing)
+            self.ensure_client_loaded(client_id)
+
+            df = self.trades if client_id is None else self.trade_table.frame(client_id)
+
+            positions: List[Dict[str, Any]] = []
+            # Rebuild the realized ledger from scratch deterministically; it replaces
+            # self.realized_ledger in one assignment, so readers never see a partial ledger
+            ledger = pd.DataFrame(columns=self.realized_ledger.columns)
+
+            if df.empty:
+                self.realized_ledger = ledger
+                return pd.DataFrame(columns=[
+                    "client_id","ticker","market","qty","avg_cost","cost_basis",
+                    "last_price","market_value","unrealized_pnl"
+                ])
+
+            # One vectorised pass over all holders; a no-op when no action touches these tickers
+            adjusted = self.corporate_actions.adjust_trades(df)
+
+            # FIFO per (client, ticker) -> (client_id, ticker, market, open qty, open cost)
+            opened: List[Tuple[str, str, str, float, float]] = []
+            if workers and workers > 1 and df["client_id"].nunique() > 1:
+                from brokai.positionsPool import parallel_fifo
+                groups, realized = parallel_fifo(adjusted, workers=workers)
+                if not realized.empty:
+                    ledger = realized
+                opened = list(groups.itertuples(index=False, name=None))
+            else:
+                from brokai.keyedTables import KeyedTable
+                table = KeyedTable(adjusted, ("client_id", "ticker"))
+                realized_parts = []
+                for cid, tkr in table.groups():
+                    group = table.frame(cid, tkr)
+                    fifo = self._fifo_match(cid, tkr, group)
+                    if not fifo["realized"].empty:
+                        realized_parts.append(fifo["realized"])
+
+                    # Aggregate remaining open lots
+                    lots = fifo["open_lots"]
+                    qty = float(sum(l["qty"] for l in lots)) if lots else 0.0
+                    total_cost = float(sum(l["qty"] * l["price"] for l in lots)) if qty > 0 else 0.0
+
+                    # Take latest market label for this ticker (slices keep the original row order)
+                    market_val = group.market.iloc[-1]
+                    opened.append((cid, tkr, market_val, qty, total_cost))
+                if realized_parts:
+                    ledger = pd.concat(realized_parts, ignore_index=True)
+
+            for cid, tkr, market_val, qty, total_cost in opened:
+                avg_cost = total_cost / qty if qty > 0 else 0.0
+
+                # Price & market value (None -> 0 MV)
+                last_px = latest_close_yf(tkr)
+                mkt_val = qty * last_px if (last_px is not None and qty > 0) else 0.0
+                unreal = mkt_val - total_cost
+
+                positions.append({
+                    "client_id": cid,
+                    "ticker": tkr,
+                    "market": market_val,
+                    "qty": qty,
+                    "avg_cost": round(avg_cost, 6),
+                    "cost_basis": round(total_cost, 2),
+                    "last_price": None if last_px is None else round(float(last_px), 6),
+                    "market_value": round(mkt_val, 2),
+                    "unrealized_pnl": round(unreal, 2)
+                })
 
-        df = self.trades.copy()
-        if client_id is not None:
-            df = df[df.client_id == client_id]
+            dividends = self.corporate_actions.dividends(df)
+            carried = [c for cid, c in self._carried.items() if client_id is None or cid == client_id]
+            frames = [f for f in [ledger, dividends] + carried if not f.empty]
+            if len(frames) > 1:
+                ledger = pd.concat(frames, ignore_index=True)
+            elif frames:
+                ledger = frames[0]
+            self.realized_ledger = ledger
+
+            pos_df = pd.DataFrame(positions)
+            if not pos_df.empty:
+                pos_df = pos_df.sort_values(["client_id","ticker"]).reset_index(drop=True)
+            return pos_df
+
+    def equity_curve(self, client_id: Optional[str] = None, start=None, end=None) -> pd.DataFrame:
+        """
+        Point-in-time daily valuation of a client's (or every client's) book.
 
-        positions: List[Dict[str, Any]] = []
-        # Reset realized ledger and rebuild from scratch deterministically
-        self.realized_ledger = pd.DataFrame(columns=self.realized_ledger.columns)
+        Trades are restated in the share basis of the stored closes (PriceStore.basis_day:
+        Yahoo adjusts the whole series for splits up to the download, even past `end`),
+        FIFO-matched once for the realized ledger, then replayed against the PriceStore
+        close matrix in one vectorised pass (see equityCurve.iter_equity_curves).
 
-        if df.empty:
-            return pd.DataFrame(columns=[
-                "client_id","ticker","market","qty","avg_cost","cost_basis",
-                "last_price","market_value","unrealized_pnl"
-            ])
-
-        for (cid, tkr), _ in df.groupby(["client_id", "ticker"]):
-            fifo = self._fifo_match(cid, tkr)
-
-            # Append realized rows for this ticker
-            if not fifo["realized"].empty:
-                if self.realized_ledger.empty:
-                    self.realized_ledger = fifo["realized"].copy()
-                else:
-                    self.realized_ledger = pd.concat([self.realized_ledger, fifo["realized"]], ignore_index=True)
+        Returns:
+            DataFrame [client_id, date, market_value, cost_basis, unrealized_pnl,
+            realized_pnl, total_pnl, drawdown] — one row per client per trading day.
 
-            # Aggregate remaining open lots
-            lots = fifo["open_lots"]
-            qty = float(sum(l["qty"] for l in lots)) if lots else 0.0
-            if qty > 0:
-                total_cost = float(sum(l["qty"] * l["price"] for l in lots))
-                avg_cost = total_cost / qty
-            else:
-                total_cost = 0.0
-                avg_cost = 0.0
-
-            # Price & market value (None -> 0 MV)
-            last_px = latest_close_yf(tkr)
-            mkt_val = qty * last_px if (last_px is not None and qty > 0) else 0.0
-            unreal = mkt_val - total_cost
-
-            # Take latest market label for this ticker
-            market_val = df[(df.client_id == cid) & (df.ticker == tkr)].market.iloc[-1]
-
-            positions.append({
-                "client_id": cid,
-                "ticker": tkr,
-                "market": market_val,
-                "qty": qty,
-                "avg_cost": round(avg_cost, 6),
-                "cost_basis": round(total_cost, 2),
-                "last_price": None if last_px is None else round(float(last_px), 6),
-                "market_value": round(mkt_val, 2),
-                "unrealized_pnl": round(unreal, 2)
-            })
-
-        pos_df = pd.DataFrame(positions)
-        if not pos_df.empty:
-            pos_df = pos_df.sort_values(["client_id","ticker"]).reset_index(drop=True)
-        return pos_df
+        Notes:
+            - Uses local price history only; top up the PriceStore first for fresh closes.
+            - Realized PnL includes cash dividends from self.corporate_actions.
+            - Clients loaded from a compacted log snapshot are replayed from their full
+              log history (TradeLog.history), not from the compacted lots.
+        """
+        from brokai.equityCurve import equity_curves, CURVE_COLUMNS
+
+        df = self._full_trades(client_id)
+        if df.empty:
+            return pd.DataFrame(columns=CURVE_COLUMNS)
+
+        price_store = getattr(self.AImanage, "price_store", None)
+        if price_store is None:
+            from brokai.priceStore import PriceStore
+            price_store = PriceStore()
+
+        # Stored closes are split-adjusted as of their download, not as of `end`: restate
+        # each symbol's trades in the share basis of its stored bars
+        basis = {}
+        for tkr in pd.unique(df["ticker"].astype(str).str.upper()):
+            day = price_store.basis_day(tkr)
+            if day is not None:
+                basis[tkr] = pd.Timestamp(day)
+        from brokai.keyedTables import KeyedTable
+        adjusted = self.corporate_actions.adjust_trades(df, basis)
+        table = KeyedTable(adjusted, ("client_id", "ticker"))
+        ledgers = [self._fifo_match(cid, tkr, table.frame(cid, tkr))["realized"] for cid, tkr in table.groups()]
+        ledgers.append(self.corporate_actions.dividends(df, end))
+        ledgers = [l for l in ledgers if not l.empty]
+        realized = pd.concat(ledgers, ignore_index=True) if ledgers else self.realized_ledger.iloc[0:0]
+        return equity_curves(adjusted, realized, price_store, start=start, end=end)
 
     def realized_pnl(self, client_id: Optional[str] = None) -> pd.DataFrame:
         """
         Return the realized PnL ledger (rebuilt by the latest compute_positions()).
         If client_id is provided, filter the ledger to that client.
         """
-        df = self.realized_ledger.copy()
-        if client_id is not None:
-            df = df[df.client_id == client_id].reset_index(drop=True)
-        return df
+        if client_id is None:
+            return self.realized_ledger.copy(deep=False)
+        return self.ledger_table.frame(client_id)
 
     # ---------- Client views ----------
     def get_client_holdings(self, client_id: str) -> pd.DataFrame:
@@ -360,19 +660,56 @@ class NewModelClientPortfolio:
             return pos
         return pos[pos["qty"] > 0].reset_index(drop=True)
 
+    def _join_universe(self):
+        """
+        Attach sectors from the AI layer's stock_lists to the holdings index
+        (again after every stock_lists change notified by the DataContext).
+        """
+        if not self._universe_joined and getattr(self.AImanage, "stock_lists", None) is not None:
+            self.holdings_index.set_universe(self.AImanage.stock_lists)
+            self._universe_joined = True
+
+    def clients_holding(self, ticker: str, market: Optional[str] = None) -> Dict[str, float]:
+        """
+        {client_id: open qty} for a ticker, straight from the holdings index (no recompute).
+        """
+        return self.holdings_index.holders(ticker, market)
+
+    def sector_exposure(self, sector: str, market: Optional[str] = None) -> Dict[str, Dict[str, float]]:
+        """
+        {client_id: {ticker: qty}} for clients holding anything in the sector (optionally one market).
+        """
+        self._join_universe()
+        return self.holdings_index.exposure(sector=sector, market=market)
+
+    def _full_trades(self, client_id: Optional[str] = None) -> pd.DataFrame:
+        """
+        Every trade the client (or all clients) ever made, as originally entered.
+
+        Clients loaded from a compacted log snapshot only keep their open lots in
+        self.trades; their rows come from the log history (TradeLog.history) instead.
+        """
+        self.ensure_client_loaded(client_id)
+        df = self.trades if client_id is None else self.trade_table.frame(client_id)
+        compacted = [cid for cid in self._carried if client_id is None or cid == client_id]
+        if compacted:
+            df = pd.concat([df[~df["client_id"].isin(compacted)]] +
+                           [self.trade_log.history(cid) for cid in compacted], ignore_index=True)
+        return df
+
     def get_client_universe(self, client_id: str) -> List[str]:
         """
-        List all tickers the client has ever traded (based on self.trades).
+        List all tickers the client has ever traded (full trade history).
         """
-        df = self.trades[self.trades.client_id == client_id]
-        return sorted(df["ticker"].unique().tolist())
+        return sorted(self._full_trades(client_id)["ticker"].unique().tolist())
 
     def get_client_trades(self, client_id: str, ticker: Optional[str] = None) -> pd.DataFrame:
         """
         All trades for a client, optionally filtered by ticker (normalized for that client's market).
-        Sorted ascending by trade_time.
+        Sorted ascending by trade_time. Compacted clients are read from their full log
+        history, so the workbook's Trades sheet and the printed trade history stay complete.
         """
-        df = self.trades[self.trades.client_id == client_id].copy()
+        df = self._full_trades(client_id)
         if ticker:
             df = df[df["ticker"] == normalize_ticker(ticker, df["market"].iloc[0] if not df.empty else "US")]
         return df.sort_values("trade_time").reset_index(drop=True)
@@ -407,15 +744,20 @@ class NewModelClientPortfolio:
         """
         Overwrite a client's workbook with fresh Trades, Holdings, RealizedPnL, and Totals.
         Side-effect: calls client_portfolio_snapshot() which recomputes positions and realized ledger.
+
+        The workbook is written to a temp file and renamed over the old one, so a crash
+        mid-write never leaves a half-written workbook (the trade log stays authoritative).
         """
         snap = self.client_portfolio_snapshot(client_id)  # recompute fresh
         path = path or self._client_path(client_id)
+        tmp = f"{path}.tmp.xlsx"
 
-        with pd.ExcelWriter(path, engine="xlsxwriter") as xw:
+        with pd.ExcelWriter(tmp, engine="xlsxwriter") as xw:
             self.get_client_trades(client_id).to_excel(xw, sheet_name="Trades", index=False)
             snap["holdings_df"].to_excel(xw, sheet_name="Holdings", index=False)
             snap["realized_df"].to_excel(xw, sheet_name="RealizedPnL", index=False)
             pd.DataFrame([snap["totals"]]).to_excel(xw, sheet_name="Totals", index=False)
+        os.replace(tmp, path)
 
     # ---------- Pretty print ----------
     def pretty_portfolio_print(self, client_id: str):
@@ -1,10 +1,13 @@
 import pandas as pd
 import os
 from brokai.StockManagement import StockManagement
-from brokai.client import NewModelClientPortfolio
+from brokai.dataContext import DataContext
 from datetime import datetime, timedelta
+from typing import Optional, Callable, List
+import heapq
 import random
 import string
+import time
 
 # ------------------------------
 # Utility: create a short random run/serial ID
@@ -15,6 +18,70 @@ def generate_serial(length: int = 12) -> str:
     return ''.join(random.choices(characters, k=length))
 
 
+# ------------------------------
+# Utility: bounded heap that keeps the best K forecast rows as they arrive
+# ------------------------------
+def _forecast_rank(value) -> float:
+    """
+    'Stock volatility forecast' as a number for ranking: numbers as-is,
+    'up...' -> 1, 'down...' -> -1, anything else -> 0.
+    """
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        text = str(value).strip().lower()
+        return 1.0 if text.startswith("up") else -1.0 if text.startswith("down") else 0.0
+
+
+class StreamingTopK:
+    """
+    Live top-K of forecast rows keyed on (Stock volatility forecast, Confidence level),
+    both descending — the order Recommended_stocks reports.
+
+    push() is O(log k) and keeps at most k rows, so a scan never needs to re-read or
+    sort the StocksTable to know its current best candidates. Ties keep the earlier row.
+    """
+
+    def __init__(self, k: int = 3, min_confidence: float = 0):
+        self.k = k
+        self.min_confidence = min_confidence
+        self._heap: List[tuple] = []   # min-heap of (forecast, confidence, -seq, row)
+        self._seq = 0
+
+    def push(self, row: Optional[dict]) -> bool:
+        """
+        Offer one forecast row; returns True if it entered the top-K.
+        Rows below min_confidence (or None, i.e. skipped forecasts) are ignored.
+        """
+        if row is None:
+            return False
+        confidence = pd.to_numeric(row.get("Confidence level"), errors="coerce")
+        if pd.isna(confidence) or confidence < self.min_confidence:
+            return False
+        item = (_forecast_rank(row.get("Stock volatility forecast")), float(confidence), -self._seq, row)
+        self._seq += 1
+        if len(self._heap) < self.k:
+            heapq.heappush(self._heap, item)
+            return True
+        if item[:3] > self._heap[0][:3]:
+            heapq.heapreplace(self._heap, item)
+            return True
+        return False
+
+    def __len__(self) -> int:
+        return len(self._heap)
+
+    def count_at_least(self, confidence: float) -> int:
+        return sum(1 for item in self._heap if item[1] >= confidence)
+
+    def rows(self) -> List[dict]:
+        """Current top-K rows, best first."""
+        return [item[3] for item in sorted(self._heap, key=lambda it: it[:3], reverse=True)]
+
+    def frame(self, columns=None) -> pd.DataFrame:
+        return pd.DataFrame(self.rows(), columns=columns)
+
+
 class clientManagement:
     """
     High-level manager that ties your AI layer (StockManagement) to:
@@ -29,37 +96,72 @@ class clientManagement:
         • 'stock_lists.xlsx' contains the universe you want to scan (with columns like Sector, Market, Name)
     - It also calls self.load_data() / self.save_data() in delete_stock(), which are NOT defined here.
       If you still want delete_stock() to edit some client-stock mapping file, add those methods or remove delete_stock().
+    - Tables are read through the same DataContext as AImanage (lazily, once, as
+      copy-on-write views), and the NewModelClientPortfolio is only built the first time
+      it is needed.
     """
 
     def __init__(self,
                  AImanage: StockManagement,
                  stock_lists: str = "stock_lists.xlsx",
                  stocksTable: str = "StocksTable.xlsx",
-                 deepLook: str = "DeepTable.xlsx"):
+                 deepLook: str = "DeepTable.xlsx",
+                 context: DataContext = None):
         """
-        Initialize the manager.
+        Initialize the manager (no workbook is read here).
 
         Args:
             AImanage: your StockManagement instance (AI brain).
             stock_lists: path to the XLSX with your stock universe to scan.
             stocksTable: path to the XLSX where AI forecasts are written.
             deepLook: path to the XLSX where deep analysis is written.
-        """
-        # Portfolio frontend you wrote elsewhere; used to fetch current holdings by client.
-        self.clientManagement = NewModelClientPortfolio(AImanage)
+            context: DataContext to read tables through; must be AImanage.context (the
+                     default), since get_forcast_stock / deepStock write through it.
 
+        Raises:
+            ValueError: if context is another DataContext, or the paths above differ from
+                        AImanage's (forecasts would land in tables this object never reads;
+                        build the StockManagement with those paths instead).
+        """
         # Schema this class historically used for a separate client<->stock mapping sheet.
         # (Not directly used below unless you add load_data/save_data again.)
         self.columns = ["ClientID", "Ticker", "Name", "BuyDate"]
 
-        # Pre-load the data files you refer to later.
-        # If a file is missing, you may want to guard with os.path.exists to avoid FileNotFoundError.
-        self.stock_lists = pd.read_excel(stock_lists)
-        self.stocksTable = pd.read_excel(stocksTable)
-        self.deepLook = pd.read_excel(deepLook)
+        # One set of table handles: AImanage appends forecasts to its context and this
+        # class reads them back from the same one
+        if context is not None and context is not AImanage.context:
+            raise ValueError("clientManagement must share AImanage.context")
+        if not AImanage.context.matches(stock_lists=stock_lists, stocksTable=stocksTable, deepTable=deepLook):
+            raise ValueError("clientManagement table paths differ from AImanage's; "
+                             "pass them to StockManagement instead")
+        self.context = AImanage.context
 
         # Keep a reference to the AI
         self.AImanage = AImanage
+        self._portfolio = None
+
+    # ------------------------------
+    # Lazy handles
+    # ------------------------------
+    @property
+    def clientManagement(self):
+        """Portfolio frontend (NewModelClientPortfolio); built on first use."""
+        if self._portfolio is None:
+            from brokai.client import NewModelClientPortfolio
+            self._portfolio = NewModelClientPortfolio(self.AImanage)
+        return self._portfolio
+
+    @property
+    def stock_lists(self) -> pd.DataFrame:
+        return self.context.view("stock_lists")
+
+    @property
+    def stocksTable(self) -> pd.DataFrame:
+        return self.context.view("stocksTable")
+
+    @property
+    def deepLook(self) -> pd.DataFrame:
+        return self.context.view("deepTable")
 
     # ------------------------------
     # OPTIONAL — Helper so your existing self.generate_serial() calls keep working.
@@ -106,66 +208,87 @@ class clientManagement:
                            sector: str = "ALL",
                            market: str = "US",
                            sale_date: datetime = None,
-                           confidencePresentage: int = 70):
+                           confidencePresentage: int = 70,
+                           serialNum: str = None,
+                           progress=None,
+                           top_k: Optional[int] = None,
+                           screen_weights: dict = None,
+                           k: int = 3,
+                           deadline: float = None,
+                           enough_confidence: float = None,
+                           on_update: Callable[[pd.DataFrame], None] = None):
         """
-        Run AI forecasts for every stock in stock_lists that matches (sector, market),
-        then pull the top 3 recommendations from StocksTable.xlsx for this run.
+        Run AI forecasts for every stock in stock_lists that matches (sector, market), or
+        with top_k only for the top_k survivors of a cheap price/valuation screen, and keep
+        the best k results for this run in a bounded heap as each forecast completes.
 
         Args:
             sector: filter by sector; "ALL" means do not filter.
             market: "US", "IL", etc. Must match the 'Market' column in stock_lists.
             sale_date: horizon end date used in get_forcast_stock(). Defaults to +365 days.
             confidencePresentage: minimum 'Confidence level' to keep in the final list.
+            serialNum: run identifier to tag rows with; generated if not given.
+            progress: optional callback(done, total) called after each forecast
+                      (the job queue uses it for progress and cancellation).
+            top_k: how many screened candidates go to the LLM; None (default) skips the
+                   screen and forecasts every match, as before screening existed.
+            screen_weights: factor weight overrides for screening.UniverseScreener
+                            (momentum, volatility, liquidity; valuation columns of
+                            stock_lists such as pe / pb only count when weighted here).
+            k: how many recommendations to return.
+            deadline: seconds after which the scan stops and returns the current top-k.
+            enough_confidence: stop early once k candidates reach this confidence level.
+            on_update: optional callback(top_k_frame) called whenever the live top-k changes.
 
         Returns:
-            DataFrame of the top 3 recommendations (sorted by 'Stock volatility forecast' then 'Confidence level').
+            DataFrame of the top k recommendations with confidence >= confidencePresentage
+            (sorted by 'Stock volatility forecast' then 'Confidence level').
 
         Side effects:
-            - Calls self.AImanage.get_forcast_stock(...) for each (sector, market) match.
-            - Reads 'StocksTable.xlsx' to retrieve rows for this run (matched by timestamp+serial).
+            - Tops up the price store for the matches (only missing days are downloaded).
+            - Calls self.AImanage.get_forcast_stock(...) for each screened candidate
+              (each call appends its row to the shared StocksTable; nothing is re-read here).
         """
         sale_date = sale_date or (datetime.now() + timedelta(days=365))
-        SN = self.generate_serial()  # run identifier so you can filter rows that belong to THIS pass
+        SN = serialNum or self.generate_serial()  # run identifier so you can filter rows that belong to THIS pass
         df = self.stock_lists
         predict_time = datetime.now().replace(second=0, microsecond=0)
 
-        # Kick off forecasts for eligible rows in your universe sheet
-        for _, row in df.iterrows():
-            if ((row['Sector'] == sector or sector == "ALL") and row['Market'] == market):
-                self.AImanage.get_forcast_stock(
-                    self.AImanage.client,
-                    row['Name'],
-                    predict_time,
-                    sale_date,
-                    SN
-                )
-
-        # Pull back the results for THIS run from the AI output file
-        df2 = pd.read_excel("StocksTable.xlsx")
-        # match the 'Buy date' formatting convention used by your AI output writer
-        run_key = predict_time.strftime('%Y-%m-%d %H:%M.%f')[:-3]
-
-        recStock = df2[
-            (df2['Buy date'] == run_key) &
-            (df2["Confidence level"] >= confidencePresentage) &
-            (df2["Serial number"] == SN)
-        ]
-
-        sorted_recStock = recStock.sort_values(
-            ["Stock volatility forecast", "Confidence level"],
-            ascending=[False, False]
-        )
-
-        print(sorted_recStock.head(3))
-        # Refresh the in-memory stock_lists from file if that's your convention
-        self.stock_lists = pd.read_excel("StocksTable.xlsx")
-
-        return sorted_recStock.head(3)
+        # Eligible rows in your universe sheet, pre-filtered by the quantitative screen
+        eligible = df[((df['Sector'] == sector) | (sector == "ALL")) & (df['Market'] == market)]
+        if top_k is not None and len(eligible) > top_k:
+            from brokai.screening import UniverseScreener  # lazy, like the portfolio handle
+            eligible = UniverseScreener(self.AImanage.price_store, screen_weights).top_k(eligible, top_k)
+
+        # Kick off forecasts for the candidates; results stream into a bounded heap
+        best = StreamingTopK(k, min_confidence=confidencePresentage)
+        started = time.monotonic()
+        for i, (_, row) in enumerate(eligible.iterrows(), start=1):
+            result = self.AImanage.get_forcast_stock(
+                self.AImanage.client,
+                row['Ticker'],  # get_forcast_stock looks the row up by Ticker
+                predict_time,
+                sale_date,
+                SN
+            )
+            if best.push(result) and on_update is not None:
+                on_update(best.frame())
+            if progress is not None:
+                progress(i, len(eligible))
+            # Early exit: out of time, or already k candidates at the "enough" bar
+            if deadline is not None and time.monotonic() - started >= deadline:
+                break
+            if enough_confidence is not None and best.count_at_least(enough_confidence) >= k:
+                break
+
+        top = best.frame(columns=self.context.get("stocksTable").columns)
+        print(top)
+        return top
 
     # ------------------------------
     # Predict for a client based on CURRENT HOLDINGS
     # ------------------------------
-    def Clientpredict(self, ID, sale_date: datetime = None):
+    def Clientpredict(self, ID, sale_date: datetime = None, serialNum: str = None, progress=None):
         """
         Run AI forecasts for ALL open holdings of a given client, as reported by
         NewModelClientPortfolio.get_client_holdings(ID), and return the rows for this run.
@@ -173,22 +296,24 @@ class clientManagement:
         Args:
             ID: client identifier (string or int).
             sale_date: horizon end date; defaults to +30 days.
+            serialNum: run identifier to tag rows with; generated if not given.
+            progress: optional callback(done, total) called after each forecast.
 
         Returns:
-            DataFrame of all forecast rows from 'StocksTable.xlsx' for this run (matched by Serial number).
+            DataFrame of all forecast rows from the shared StocksTable for this run (matched by Serial number).
 
         Assumptions:
             - self.clientManagement.get_client_holdings(ID) returns a DataFrame with at least a 'ticker' column.
             - self.AImanage.get_forcast_stock(...) writes rows into 'StocksTable.xlsx' including 'Serial number'.
         """
         sale_date = sale_date or (datetime.now() + timedelta(days=30))
-        SN = generate_serial()  # using module-level helper here (both are fine)
+        SN = serialNum or generate_serial()  # using module-level helper here (both are fine)
 
         # Get current holdings for the client from your portfolio layer
         df = self.clientManagement.get_client_holdings(ID)
 
         # For each holding, run a forecast from NOW -> sale_date
-        for _, row in df.iterrows():
+        for i, (_, row) in enumerate(df.iterrows(), start=1):
             # Here you use 'ticker' directly (vs. 'Name'); make sure your AI expects a ticker.
             self.AImanage.get_forcast_stock(
                 self.AImanage.client,
@@ -197,43 +322,42 @@ class clientManagement:
                 sale_date,
                 SN
             )
+            if progress is not None:
+                progress(i, len(df))
 
-        # Return only the rows for this run
-        df2 = pd.read_excel("StocksTable.xlsx")
+        # Return only the rows for this run (shared table; no re-read from disk)
+        df2 = self.stocksTable
         RelStock = df2[df2['Serial number'] == SN]
         print(RelStock)
 
-        # Optional: refresh in-memory copy if you rely on it elsewhere
-        self.stock_lists = pd.read_excel("StocksTable.xlsx")
-
         return RelStock
 
     # ------------------------------
     # Deep grade for a single stock
     # ------------------------------
-    def StockGrade(self, stock_name: str) -> str:
+    def StockGrade(self, stock_name: str, serialNum: str = None) -> str:
         """
         Run the deep analysis for a single stock, sum A1..A20, and map to a status label.
 
         Args:
             stock_name: name/ticker to analyze (must be what your AI expects).
+            serialNum: run identifier to tag the DeepTable row with; generated if not given.
 
         Returns:
             A text label ("Stock Status: Excellent/Strong/Stable/Weak/Very Weak") based on total points.
 
         Side effects:
             - Calls self.AImanage.deepStock(...) which should write one row into 'DeepTable.xlsx' for this run.
-            - Reads 'DeepTable.xlsx' and filters rows by this run's Serial number.
+            - Reads the shared DeepTable and filters rows by this run's Serial number.
         """
-        SN = self.generate_serial()
+        SN = serialNum or self.generate_serial()
         today_time = datetime.now().replace(second=0, microsecond=0)
 
         # Trigger the AI deep analysis (expected to write into DeepTable.xlsx with the same SN)
         self.AImanage.deepStock(self.AImanage.client, stock_name, today_time, SN)
 
-        # Read results for just this run
-        self.deepLook = pd.read_excel("DeepTable.xlsx")
-        df = pd.read_excel("DeepTable.xlsx")
+        # Read results for just this run (shared table; no re-read from disk)
+        df = self.deepLook
         df = df[df['Serial number'] == SN]
 
         # Safety: ensure we actually got a row
@@ -250,5 +374,13 @@ class clientManagement:
             return "Stock Status: Excellent"
         elif grade >= 14:
             print("Stock Status: Strong")
-
-
+            return "Stock Status: Strong"
+        elif grade >= 10:
+            print("Stock Status: Stable")
+            return "Stock Status: Stable"
+        elif grade >= 6:
+            print("Stock Status: Weak")
+            return "Stock Status: Weak"
+        else:
+            print("Stock Status: Very Weak")
+            return "Stock Status: Very Weak"
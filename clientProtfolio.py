@@ -1,6 +1,7 @@
 import pandas as pd
 import os
 from brokai.StockManagement import StockManagement
+from brokai.dataContext import DataContext
 from datetime import datetime, timedelta
 import random
 import string
@@ -10,18 +11,33 @@ import string
 class clientProtfolio:
     
 
-    def __init__(self, AImanage : StockManagement, stock_lists = "stock_lists.xlsx" , stocksTable = "StocksTable.xlsx", deepLook = "DeepTable.xlsx", StockPortfolioTable = "StockPortfolioTable.xlsx" , clientProtfolio="client_portfolio.xlsx"):
+    def __init__(self, AImanage : StockManagement, stock_lists = "stock_lists.xlsx" , stocksTable = "StocksTable.xlsx", deepLook = "DeepTable.xlsx", StockPortfolioTable = "StockPortfolioTable.xlsx" , clientProtfolio="client_portfolio.xlsx", context : DataContext = None):
         self.clientProtfolio= clientProtfolio 
         self.columns= ["ClientID", "Ticker", "Name" ,"BuyDate"]
-        self.stock_lists= pd.read_excel(stock_lists)
-        self.stocksTable= pd.read_excel(stocksTable)
-        self.deepLook= pd.read_excel(deepLook)
+        # read tables through the shared context (same one as AImanage unless other files are given)
+        if context is None:
+            context = AImanage.context
+            if not context.matches(stock_lists=stock_lists, stocksTable=stocksTable, deepTable=deepLook, StockPortfolioTable=StockPortfolioTable):
+                context = DataContext(stock_lists, stocksTable, deepLook, StockPortfolioTable)
+        self.context= context
         self.AImanage= AImanage 
         # Create the Excel file if it doesn't exist
         if not os.path.exists(self.clientProtfolio):
             df = pd.DataFrame(columns=self.columns)
             df.to_excel(self.clientProtfolio, index=False)
 
+    @property
+    def stock_lists(self):
+        return self.context.view("stock_lists")
+
+    @property
+    def stocksTable(self):
+        return self.context.view("stocksTable")
+
+    @property
+    def deepLook(self):
+        return self.context.view("deepTable")
+
     def load_data(self):
         return pd.read_excel(self.clientProtfolio)
     
@@ -64,12 +80,11 @@ class clientProtfolio:
         for _,row in df.iterrows():
             if ((row['Sector'] == sector or sector == "ALL" ) and row['Market'] == market ):
                 self.AImanage.get_forcast_stock(self.AImanage.client, row['Name'],predict_time, sale_date, SN)
-        df2 = pd.read_excel("StocksTable.xlsx")
-        recStock = df2[((df2['Buy date']) == predict_time.strftime('%Y-%m-%d %H:%M.%f')[:-3]) & (df2["Confidence level"] >= confidencePresentage) & (df2["Serial number"] == SN) ] 
+        df2 = self.stocksTable
+        recStock = df2[(pd.to_datetime(df2['Buy date'], errors="coerce") == predict_time) & (df2["Confidence level"] >= confidencePresentage) & (df2["Serial number"] == SN) ] 
         sorted_recStock = recStock.sort_values(["Stock volatility forecast","Confidence level" ], ascending=[False,False])
         
         print(sorted_recStock.head(3))
-        self.stock_lists= pd.read_excel("StocksTable.xlsx")
 
         return sorted_recStock.head(3)
         
@@ -80,10 +95,9 @@ class clientProtfolio:
             if row['ClientID'] == ID:
                 self.AImanage.get_forcast_stock(self.AImanage.client, row['Name'], row['BuyDate'], sale_date, SN)
 
-        df2 = pd.read_excel("StocksTable.xlsx")
+        df2 = self.stocksTable
         RelStock = df2[(df2['Serial number']) == SN] 
         print(RelStock)
-        self.stock_lists= pd.read_excel("StocksTable.xlsx")
 
         return RelStock
 
@@ -91,8 +105,7 @@ class clientProtfolio:
         SN = self.generate_serial()
         today_time = datetime.now().replace(second=0, microsecond=0)
         self.AImanage.deepStock(self.AImanage.client, stock_name, today_time, SN)
-        self.deepLook = pd.read_excel("DeepTable.xlsx")
-        df = pd.read_excel("DeepTable.xlsx")
+        df = self.deepLook
         df = df[(df['Serial number']) == SN]
         grade = df.loc[:, 'A1':'A20'].sum(axis=1).iloc[0]
         if grade >= 17:
@@ -0,0 +1,263 @@
+from typing import Optional, Dict, Tuple, List
+from datetime import datetime
+import numpy as np
+import pandas as pd
+import os
+
+ACTION_COLUMNS = ["symbol", "ex_date", "kind", "value"]
+SPLIT, DIVIDEND = "split", "dividend"
+
+
+def yahoo_actions(symbol: str) -> pd.DataFrame:
+    """
+    Splits and cash dividends for a Yahoo symbol as an ACTION_COLUMNS frame
+    (empty on errors / no data).
+
+    Yahoo reports dividends per *today's* share (already divided by every later split);
+    they are restated here as cash per share on their own ex date, which is what the
+    table stores (see unadjust_dividends).
+    """
+    try:
+        import yfinance as yf
+        actions = yf.Ticker(symbol).actions
+    except Exception:
+        return pd.DataFrame(columns=ACTION_COLUMNS)
+    if not isinstance(actions, pd.DataFrame) or actions.empty:
+        return pd.DataFrame(columns=ACTION_COLUMNS)
+    idx = actions.index
+    if getattr(idx, "tz", None) is not None:
+        idx = idx.tz_localize(None)
+    rows = []
+    for day, div, split in zip(idx.normalize(), actions.get("Dividends", 0), actions.get("Stock Splits", 0)):
+        if split:
+            rows.append((symbol, day, SPLIT, float(split)))
+        if div:
+            rows.append((symbol, day, DIVIDEND, float(div)))
+    return unadjust_dividends(pd.DataFrame(rows, columns=ACTION_COLUMNS))
+
+
+def unadjust_dividends(actions: pd.DataFrame) -> pd.DataFrame:
+    """
+    Restate split-adjusted dividends (per share as of the newest split) as cash per share
+    on each ex date: d_ex = d_adjusted * product of split ratios with a later ex date.
+    A 0.2 dividend reported before a 4-for-1 split becomes 0.8 per pre-split share.
+    """
+    if actions.empty:
+        return actions
+    out = actions.copy()
+    for _, g in out.groupby("symbol", sort=False):
+        splits = g[g["kind"] == SPLIT]
+        if splits.empty:
+            continue
+        split_days = pd.to_datetime(splits["ex_date"]).values.astype("datetime64[D]")
+        order = np.argsort(split_days, kind="stable")
+        split_days = split_days[order]
+        ratios = splits["value"].to_numpy(dtype="f8")[order]
+        # suffix[i] = product of ratios[i:], with a trailing 1.0 for "no later split"
+        suffix = np.concatenate([np.cumprod(ratios[::-1])[::-1], [1.0]])
+        divs = g.index[g["kind"] == DIVIDEND]
+        div_days = pd.to_datetime(out.loc[divs, "ex_date"]).values.astype("datetime64[D]")
+        later = np.searchsorted(split_days, div_days, side="right")
+        out.loc[divs, "value"] = out.loc[divs, "value"].to_numpy(dtype="f8") * suffix[later]
+    return out
+
+
+class CorporateActions:
+    """
+    Splits and cash dividends per symbol, applied to trades before FIFO matching.
+
+    Table (CSV/XLSX, loadable locally; see ACTION_COLUMNS):
+      symbol   -> Yahoo symbol (e.g. 'AAPL', 'TEVA.TA')
+      ex_date  -> first day the stock trades split-adjusted / ex-dividend
+      kind     -> 'split' (value = new shares per old share, 2.0 for 2-for-1, 0.1 for 1-for-10)
+                  or 'dividend' (value = cash per share on the ex date, NOT split-adjusted;
+                  yahoo_actions() converts Yahoo's adjusted figures on fetch)
+
+    For one (symbol, as_of) the engine builds, once, the prefix product of split ratios
+    S(d) and the prefix sum of dividends expressed per as_of share; then every trade of
+    every holder is adjusted with two searchsorted calls:
+      qty_as_of   = qty * S(as_of) / S(trade day)
+      price_as_of = price * S(trade day) / S(as_of)      (cost and proceeds unchanged)
+    and dividend cash per holder is the dot product of shares held on each ex date with
+    the dividends paid. Factors are cached per (symbol, as_of), so revaluing history on
+    many dates stays cheap.
+    """
+
+    def __init__(self, path: Optional[str] = "corporate_actions.csv", actions: Optional[pd.DataFrame] = None):
+        """
+        Args:
+            path: CSV or XLSX with ACTION_COLUMNS (read if it exists; save() writes it).
+            actions: initial table (overrides reading the file).
+        """
+        self.path = path
+        if actions is None and path and os.path.exists(path):
+            actions = pd.read_excel(path) if path.endswith((".xlsx", ".xls")) else pd.read_csv(path)
+        self.table = pd.DataFrame(columns=ACTION_COLUMNS)
+        self._by_symbol: Dict[str, pd.DataFrame] = {}
+        self._factors: Dict[Tuple[str, np.datetime64], Tuple[np.ndarray, ...]] = {}
+        # Bumped on every table change (adjusted-trade caches key on it)
+        self.version = 0
+        if actions is not None and not actions.empty:
+            self.extend(actions)
+
+    # ---------- Table ----------
+    def extend(self, actions: pd.DataFrame) -> None:
+        """
+        Merge actions into the table (duplicates dropped) and invalidate cached factors.
+        """
+        new = actions[ACTION_COLUMNS].copy()
+        new["symbol"] = new["symbol"].astype(str).str.strip().str.upper()
+        new["ex_date"] = pd.to_datetime(new["ex_date"]).dt.normalize()
+        new["kind"] = new["kind"].astype(str).str.strip().str.lower()
+        new["value"] = new["value"].astype(float)
+        bad = ~new["kind"].isin([SPLIT, DIVIDEND])
+        if bad.any():
+            raise ValueError(f"Unknown corporate action kind(s): {sorted(new.loc[bad, 'kind'].unique())}")
+        frames = [f for f in (self.table, new) if not f.empty]
+        self.table = (pd.concat(frames, ignore_index=True)
+                      .drop_duplicates(ignore_index=True)
+                      .sort_values(["symbol", "ex_date"], kind="stable", ignore_index=True))
+        self._by_symbol = {s: g for s, g in self.table.groupby("symbol", sort=False)}
+        self._factors.clear()
+        self.version += 1
+
+    def add(self, symbol: str, ex_date, kind: str, value: float) -> None:
+        self.extend(pd.DataFrame([[symbol, ex_date, kind, value]], columns=ACTION_COLUMNS))
+
+    def fetch(self, symbols: List[str]) -> int:
+        """
+        Pull splits/dividends from Yahoo for the symbols; returns the number of rows now known for them.
+        """
+        frames = [yahoo_actions(s) for s in symbols]
+        frames = [f for f in frames if not f.empty]
+        if frames:
+            self.extend(pd.concat(frames, ignore_index=True))
+        return int(self.table["symbol"].isin([str(s).upper() for s in symbols]).sum())
+
+    def save(self, path: Optional[str] = None) -> None:
+        path = path or self.path
+        if path.endswith((".xlsx", ".xls")):
+            self.table.to_excel(path, index=False)
+        else:
+            self.table.to_csv(path, index=False)
+
+    def has(self, symbol: str) -> bool:
+        return str(symbol).upper() in self._by_symbol
+
+    # ---------- Factors ----------
+    def _factors_for(self, symbol: str, as_of) -> Tuple[np.ndarray, ...]:
+        """
+        (split_days, split_prefix, div_days, div_per_asof_share_prefix, S(as_of)) for actions
+        with ex_date <= as_of, cached per (symbol, as_of day).
+        """
+        day = np.datetime64(pd.Timestamp(as_of).normalize().date(), "D")
+        key = (str(symbol).upper(), day)
+        hit = self._factors.get(key)
+        if hit is not None:
+            return hit
+
+        acts = self._by_symbol.get(key[0])
+        if acts is None:
+            empty = np.empty(0, dtype="datetime64[D]")
+            hit = (empty, np.ones(0), empty, np.zeros(0), 1.0)
+        else:
+            acts = acts[acts["ex_date"].values.astype("datetime64[D]") <= day]
+            splits = acts[acts["kind"] == SPLIT]
+            divs = acts[acts["kind"] == DIVIDEND]
+            split_days = splits["ex_date"].values.astype("datetime64[D]")
+            split_prefix = np.cumprod(splits["value"].to_numpy(dtype="f8"))
+            s_as_of = float(split_prefix[-1]) if split_prefix.size else 1.0
+            div_days = divs["ex_date"].values.astype("datetime64[D]")
+            # Dividend per share on its ex date, expressed per as_of share: d * S(ex) / S(as_of)
+            s_at_div = self._prefix_at(split_days, split_prefix, div_days)
+            div_prefix = np.cumsum(divs["value"].to_numpy(dtype="f8") * s_at_div / s_as_of)
+            hit = (split_days, split_prefix, div_days, div_prefix, s_as_of)
+        self._factors[key] = hit
+        return hit
+
+    @staticmethod
+    def _prefix_at(days: np.ndarray, prefix: np.ndarray, when: np.ndarray) -> np.ndarray:
+        """
+        S(when): product of split ratios with ex_date <= when (1.0 before the first split).
+        """
+        if prefix.size == 0:
+            return np.ones(len(when))
+        pos = np.searchsorted(days, when, side="right") - 1
+        return np.where(pos >= 0, prefix[np.maximum(pos, 0)], 1.0)
+
+    def split_factor(self, symbol: str, trade_times, as_of) -> np.ndarray:
+        """
+        Shares at as_of per share bought at each trade time (1.0 when no split in between).
+        """
+        split_days, split_prefix, _, _, s_as_of = self._factors_for(symbol, as_of)
+        days = pd.to_datetime(pd.Series(trade_times)).values.astype("datetime64[D]")
+        return s_as_of / self._prefix_at(split_days, split_prefix, days)
+
+    # ---------- Trades ----------
+    def adjust_trades(self, trades: pd.DataFrame, as_of=None) -> pd.DataFrame:
+        """
+        Express every trade in as_of shares (qty x factor, price / factor), vectorised per
+        symbol across all holders. Returns the input untouched when no action applies.
+
+        as_of may also be a {symbol: day} mapping (e.g. each symbol's PriceStore.basis_day);
+        symbols missing from it are restated as of today.
+        """
+        per_symbol = as_of if isinstance(as_of, dict) else {}
+        as_of = datetime.now() if isinstance(as_of, dict) else (as_of or datetime.now())
+        if trades.empty or not self._by_symbol:
+            return trades
+        symbols = trades["ticker"].astype(str).str.upper()
+        affected = symbols.isin(self._by_symbol.keys())
+        if not affected.any():
+            return trades
+
+        factor = np.ones(len(trades))
+        sym_arr = symbols.to_numpy()
+        times = trades["trade_time"]
+        for sym in pd.unique(sym_arr[affected.to_numpy()]):
+            rows = np.flatnonzero(sym_arr == sym)
+            factor[rows] = self.split_factor(sym, times.iloc[rows].to_numpy(), per_symbol.get(sym, as_of))
+        if np.all(factor == 1.0):
+            return trades
+        out = trades.copy()
+        out["qty"] = out["qty"].astype(float) * factor
+        out["price"] = out["price"].astype(float) / factor
+        return out
+
+    def dividends(self, trades: pd.DataFrame, as_of=None) -> pd.DataFrame:
+        """
+        Cash dividends earned by each (client_id, ticker) up to as_of, from the shares held
+        the day before each ex date.
+
+        Args:
+            trades: trades in any share basis (they are split-adjusted here).
+
+        Returns:
+            DataFrame [client_id, ticker, market, trade_time (= ex date), qty_sold (0),
+            proceeds (= cash), cost (0), realized_pnl (= cash)] — realized-ledger rows.
+        """
+        cols = ["client_id", "ticker", "market", "trade_time", "qty_sold", "proceeds", "cost", "realized_pnl"]
+        as_of = as_of or datetime.now()
+        if trades.empty:
+            return pd.DataFrame(columns=cols)
+        adj = self.adjust_trades(trades, as_of)
+        rows = []
+        for (cid, tkr), g in adj.groupby(["client_id", "ticker"], sort=False):
+            _, _, div_days, div_prefix, _ = self._factors_for(tkr, as_of)
+            if div_days.size == 0:
+                continue
+            g = g.assign(trade_time=pd.to_datetime(g["trade_time"])).sort_values("trade_time", kind="stable")
+            signed = np.where(g["side"].to_numpy() == "BUY", 1.0, -1.0) * g["qty"].to_numpy(dtype="f8")
+            held = np.cumsum(signed)
+            days = g["trade_time"].values.astype("datetime64[D]")
+            # Shares (as_of basis) held before each ex date: trades strictly before it count
+            pos = np.searchsorted(days, div_days, side="left") - 1
+            held_at = np.where(pos >= 0, held[np.maximum(pos, 0)], 0.0)
+            per_share = np.diff(np.concatenate([[0.0], div_prefix]))
+            cash = np.maximum(held_at, 0.0) * per_share
+            market = g["market"].iloc[-1]
+            for day, amount in zip(div_days, cash):
+                if amount > 0:
+                    rows.append((cid, tkr, market, pd.Timestamp(day), 0.0, round(float(amount), 6), 0.0,
+                                 round(float(amount), 6)))
+        return pd.DataFrame(rows, columns=cols)
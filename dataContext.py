@@ -0,0 +1,155 @@
+from typing import Optional, Dict, List, Callable, Tuple, Sequence
+import pandas as pd
+import threading
+from brokai.keyedTables import KeyedTable
+
+# view() relies on pandas copy-on-write (always on from pandas 3.0): a shallow frame that
+# copies only if a caller mutates it, so readers can never change the shared table.
+
+
+class DataContext:
+    """
+    One owner for the Excel tables shared by StockManagement, clientManagement and
+    clientProtfolio.
+
+    Tables are read lazily (first access) and kept once per run:
+      • view(name)        -> copy-on-write view for readers (zero-copy until mutated)
+      • append_row / set  -> the only ways to change a table; both bump version(name)
+                             and notify subscribers
+      • save(name)        -> write the current table back to its workbook (no re-read)
+      • keyed(name, keys) -> KeyedTable index over a table (zero-copy slices by key),
+                             rebuilt only after the table's version changes
+
+    So a CLI call that only prints one client's holdings never opens
+    StocksTable.xlsx / DeepTable.xlsx, nothing is read twice, and every manager sees
+    the same rows within a run.
+
+    Table names (and default files):
+      • stock_lists         -> stock_lists.xlsx
+      • stocksTable         -> StocksTable.xlsx
+      • deepTable           -> DeepTable.xlsx
+      • StockPortfolioTable -> StockPortfolioTable.xlsx
+    """
+
+    def __init__(self, stock_lists: str = "stock_lists.xlsx",
+                 stocksTable: str = "StocksTable.xlsx",
+                 deepTable: str = "DeepTable.xlsx",
+                 StockPortfolioTable: str = "StockPortfolioTable.xlsx"):
+        """
+        Args: paths to the four workbooks (nothing is read here).
+        """
+        self.paths: Dict[str, str] = {
+            "stock_lists": stock_lists,
+            "stocksTable": stocksTable,
+            "deepTable": deepTable,
+            "StockPortfolioTable": StockPortfolioTable,
+        }
+        self._tables: Dict[str, pd.DataFrame] = {}
+        self._versions: Dict[str, int] = {name: 0 for name in self.paths}
+        self._subscribers: Dict[str, List[Callable[[str, pd.DataFrame], None]]] = {}
+        self._keyed: Dict[Tuple[str, Tuple[str, ...]], Tuple[int, KeyedTable]] = {}
+        # Background workers (job queue / API server) append from several threads
+        self._lock = threading.RLock()
+
+    def path(self, name: str) -> str:
+        return self.paths[name]
+
+    def is_loaded(self, name: str) -> bool:
+        return name in self._tables
+
+    def get(self, name: str) -> pd.DataFrame:
+        """
+        Return the shared DataFrame for a table, reading the workbook on first use.
+
+        Raises:
+            KeyError for unknown table names; FileNotFoundError if the workbook is missing.
+        """
+        with self._lock:
+            df = self._tables.get(name)
+            if df is None:
+                df = pd.read_excel(self.paths[name])
+                self._tables[name] = df
+            return df
+
+    def view(self, name: str) -> pd.DataFrame:
+        """
+        Copy-on-write view of a table for readers (does not copy the data).
+        """
+        with self._lock:
+            return self.get(name).copy(deep=False)
+
+    def keyed(self, name: str, keys: Sequence[str]) -> KeyedTable:
+        """
+        KeyedTable over a table sorted by `keys` (e.g. stocksTable by "Serial number"),
+        cached until the table's version changes.
+        """
+        with self._lock:
+            key = (name, tuple(keys))
+            hit = self._keyed.get(key)
+            if hit is None or hit[0] != self._versions[name]:
+                hit = (self._versions[name], KeyedTable(self.get(name), keys))
+                self._keyed[key] = hit
+            return hit[1]
+
+    def version(self, name: str) -> int:
+        """
+        Monotonic change counter per table (bumped by set/append_row/reload).
+        """
+        return self._versions[name]
+
+    # ---------- Change notifications ----------
+    def subscribe(self, name: str, callback: Callable[[str, pd.DataFrame], None]) -> None:
+        """
+        Call callback(name, new_table) after every change to the table.
+        """
+        self._subscribers.setdefault(name, []).append(callback)
+
+    def _changed(self, name: str) -> None:
+        self._versions[name] += 1
+        df = self._tables[name]
+        for cb in self._subscribers.get(name, []):
+            cb(name, df)
+
+    # ---------- Writes ----------
+    def set(self, name: str, df: pd.DataFrame) -> None:
+        """
+        Replace the in-memory table (no file I/O).
+        """
+        if name not in self.paths:
+            raise KeyError(name)
+        with self._lock:
+            self._tables[name] = df
+            self._changed(name)
+
+    def append_row(self, name: str, row) -> None:
+        """
+        Append one row (list in column order, or dict by column) to a table.
+        """
+        with self._lock:
+            df = self.get(name)
+            df.loc[len(df)] = row
+            self._changed(name)
+
+    def save(self, name: str) -> None:
+        """
+        Write the in-memory table back to its workbook.
+        """
+        with self._lock:
+            self.get(name).to_excel(self.paths[name], index=False)
+
+    def reload(self, name: str) -> pd.DataFrame:
+        """
+        Drop the cached copy and read the workbook again.
+        """
+        with self._lock:
+            self._tables.pop(name, None)
+            df = self.get(name)
+            self._changed(name)
+            return df
+
+    def matches(self, **paths: Optional[str]) -> bool:
+        """
+        True if every given path equals the one this context was built with
+        (used to decide whether a caller's custom paths can share this context).
+        """
+        return all(p is None or self.paths[k] == p for k, p in paths.items())
@@ -0,0 +1,85 @@
+from datetime import datetime
+from typing import Optional, Dict, Any, Iterable
+import pandas as pd
+import hashlib
+import json
+import os
+
+# DeepTable answer columns, in order
+QUESTIONS = tuple(f"A{i}" for i in range(1, 21))
+
+# Questions whose answers move with prices / news and are re-asked on every deep look.
+# The rest are grounded only in the financial statements and are reused while the
+# statements fingerprint is unchanged. Adjust to match ChatQuastions/deeplookStock.txt.
+MARKET_QUESTIONS = ("A16", "A17", "A18", "A19", "A20")
+STATEMENT_QUESTIONS = tuple(q for q in QUESTIONS if q not in MARKET_QUESTIONS)
+
+
+def statements_fingerprint(*frames: pd.DataFrame) -> Optional[str]:
+    """
+    Short content hash of the financial statements (empty/None frames hash as '-').
+    Changes exactly when Yahoo publishes new or restated numbers.
+    None when every frame is empty: a failed fetch has no content to version answers by.
+    """
+    if not any(isinstance(df, pd.DataFrame) and not df.empty for df in frames):
+        return None
+    h = hashlib.sha1()
+    for df in frames:
+        if isinstance(df, pd.DataFrame) and not df.empty:
+            h.update(df.to_csv().encode("utf-8"))
+        else:
+            h.update(b"-")
+        h.update(b"\x00")
+    return h.hexdigest()[:16]
+
+
+class DeepAnswerCache:
+    """
+    Statement-grounded deep-look answers per symbol, versioned by statements fingerprint.
+
+    File (JSON, written atomically):
+      {SYMBOL: {"fingerprint": ..., "answers": {"A1": ..., ...}, "asked_at": ISO time}}
+
+    get() returns the cached answers only when the fingerprint still matches and every
+    requested question is present, so new statements (or a changed question split)
+    fall back to a full deep look.
+    """
+
+    def __init__(self, path: str = "deep_answers.json",
+                 statement_questions: Iterable[str] = STATEMENT_QUESTIONS):
+        self.path = path
+        self.statement_questions = tuple(statement_questions)
+        self._entries: Optional[Dict[str, Dict[str, Any]]] = None
+
+    def _load(self) -> Dict[str, Dict[str, Any]]:
+        if self._entries is None:
+            if os.path.exists(self.path):
+                with open(self.path, "r", encoding="utf-8") as fh:
+                    self._entries = json.load(fh)
+            else:
+                self._entries = {}
+        return self._entries
+
+    def get(self, symbol: str, fingerprint: str) -> Optional[Dict[str, Any]]:
+        entry = self._load().get(str(symbol).upper())
+        if entry is None or entry.get("fingerprint") != fingerprint:
+            return None
+        answers = entry.get("answers", {})
+        if any(q not in answers for q in self.statement_questions):
+            return None
+        return {q: answers[q] for q in self.statement_questions}
+
+    def put(self, symbol: str, fingerprint: str, answers: Dict[str, Any]) -> None:
+        """
+        Store the statement-grounded subset of a full answer set.
+        """
+        entries = self._load()
+        entries[str(symbol).upper()] = {
+            "fingerprint": fingerprint,
+            "answers": {q: answers[q] for q in self.statement_questions if q in answers},
+            "asked_at": datetime.now().isoformat(timespec="seconds"),
+        }
+        tmp = f"{self.path}.tmp"
+        with open(tmp, "w", encoding="utf-8") as fh:
+            json.dump(entries, fh, default=str)
+        os.replace(tmp, self.path)
@@ -0,0 +1,151 @@
+from typing import Iterator
+import numpy as np
+import pandas as pd
+from brokai.priceStore import PriceStore
+
+CURVE_COLUMNS = ["client_id", "date", "market_value", "cost_basis", "unrealized_pnl",
+                 "realized_pnl", "total_pnl", "drawdown"]
+
+
+def _event_rows(dates: np.ndarray, when: pd.Series) -> np.ndarray:
+    """
+    Row of the first trading day on/after each event (events before the range fold into
+    row 0, events after the last day get len(dates) and are dropped by the caller).
+    """
+    days = pd.to_datetime(when).values.astype("datetime64[D]")
+    return np.searchsorted(dates, days, side="left")
+
+
+def _cumulative(rows: np.ndarray, cols: np.ndarray, values: np.ndarray, T: int, K: int) -> np.ndarray:
+    """
+    Scatter event values into a (T, K) matrix and accumulate over time.
+    """
+    out = np.zeros((T, K))
+    keep = (rows < T) & (cols >= 0)
+    np.add.at(out, (rows[keep], cols[keep]), values[keep])
+    return np.cumsum(out, axis=0, out=out)
+
+
+def _ffill(matrix: np.ndarray) -> np.ndarray:
+    """
+    Forward-fill NaNs down each column (leading NaNs stay NaN).
+    """
+    T = matrix.shape[0]
+    idx = np.where(np.isnan(matrix), 0, np.arange(T)[:, None])
+    np.maximum.accumulate(idx, axis=0, out=idx)
+    return matrix[idx, np.arange(matrix.shape[1])]
+
+
+def iter_equity_curves(trades: pd.DataFrame, realized: pd.DataFrame, price_store: PriceStore,
+                       start=None, end=None, clients_per_chunk: int = 200) -> Iterator[pd.DataFrame]:
+    """
+    Daily equity curves, one DataFrame (CURVE_COLUMNS) per chunk of clients.
+
+    Args:
+        trades: trades in the share basis of the stored closes (see PriceStore.basis_day).
+        realized: FIFO realized ledger for the same trades (sell rows carry the matched
+                  'cost'; dividend rows have cost 0).
+        price_store: PriceStore with the daily closes (read locally, no fetching here).
+        start, end: date range (default: first trade .. today).
+        clients_per_chunk: clients valued per pass (bounds the (days x holdings) matrices).
+
+    Per chunk, every (client, ticker) pair is a column: buys/sells, matched cost and
+    realized PnL are scattered onto their trading day and cumsum'd into position,
+    cost-basis and realized matrices, which are valued against the close matrix in one
+    shot and summed per client. Days without a close (before a symbol's first bar) are
+    valued at cost. drawdown = total_pnl - running peak of total_pnl (<= 0).
+    """
+    if trades.empty:
+        return
+    trade_days = pd.to_datetime(trades["trade_time"])
+    start = np.datetime64(pd.Timestamp(start).date() if start is not None else trade_days.min().date(), "D")
+    end = np.datetime64(pd.Timestamp(end).date() if end is not None else pd.Timestamp.now().date(), "D")
+
+    symbols = sorted(trades["ticker"].astype(str).unique())
+    dates, close = price_store.close_matrix(symbols, start=start, end=end)
+    if dates.size == 0:
+        return
+    close = _ffill(close)
+    sym_col = {s: j for j, s in enumerate(symbols)}
+    T = dates.size
+
+    trades = trades[trade_days.values.astype("datetime64[D]") <= end]
+    sells = realized[realized["qty_sold"] > 0] if not realized.empty else realized
+    clients = sorted(trades["client_id"].astype(str).unique())
+
+    for lo in range(0, len(clients), clients_per_chunk):
+        chunk = clients[lo:lo + clients_per_chunk]
+        tr = trades[trades["client_id"].astype(str).isin(chunk)]
+        pairs = (tr[["client_id", "ticker"]].astype(str).drop_duplicates()
+                 .sort_values(["client_id", "ticker"], kind="stable").reset_index(drop=True))
+        K = len(pairs)
+        pair_col = {(c, t): k for k, (c, t) in enumerate(pairs.itertuples(index=False))}
+
+        def cols(frame: pd.DataFrame) -> np.ndarray:
+            keys = zip(frame["client_id"].astype(str), frame["ticker"].astype(str))
+            return np.fromiter((pair_col.get(k, -1) for k in keys), dtype=np.intp, count=len(frame))
+
+        buy = (tr["side"] == "BUY").to_numpy()
+        qty = tr["qty"].to_numpy(dtype="f8")
+        t_rows, t_cols = _event_rows(dates, tr["trade_time"]), cols(tr)
+        position = _cumulative(t_rows, t_cols, np.where(buy, qty, -qty), T, K)
+        bought = _cumulative(t_rows[buy], t_cols[buy], qty[buy] * tr["price"].to_numpy(dtype="f8")[buy], T, K)
+
+        led = realized[realized["client_id"].astype(str).isin(chunk)] if not realized.empty else realized
+        sl = sells[sells["client_id"].astype(str).isin(chunk)] if not sells.empty else sells
+        if len(sl):
+            cost_basis = bought - _cumulative(_event_rows(dates, sl["trade_time"]), cols(sl),
+                                              sl["cost"].to_numpy(dtype="f8"), T, K)
+        else:
+            cost_basis = bought
+        if len(led):
+            realized_cum = _cumulative(_event_rows(dates, led["trade_time"]), cols(led),
+                                       led["realized_pnl"].to_numpy(dtype="f8"), T, K)
+        else:
+            realized_cum = np.zeros((T, K))
+
+        px = close[:, [sym_col[t] for t in pairs["ticker"]]]
+        value = np.where(np.isnan(px), cost_basis, position * px)
+
+        # Sum pair columns per client (pairs are sorted by client)
+        client_ids, first = np.unique(pairs["client_id"].to_numpy(), return_index=True)
+        mv = np.add.reduceat(value, first, axis=1)
+        cb = np.add.reduceat(cost_basis, first, axis=1)
+        rz = np.add.reduceat(realized_cum, first, axis=1)
+        total = (mv - cb) + rz
+        drawdown = total - np.maximum.accumulate(total, axis=0)
+
+        n = client_ids.size
+        yield pd.DataFrame({
+            "client_id": np.repeat(client_ids, T),
+            "date": np.tile(dates, n),
+            "market_value": mv.T.ravel().round(2),
+            "cost_basis": cb.T.ravel().round(2),
+            "unrealized_pnl": (mv - cb).T.ravel().round(2),
+            "realized_pnl": rz.T.ravel().round(2),
+            "total_pnl": total.T.ravel().round(2),
+            "drawdown": drawdown.T.ravel().round(2),
+        }, columns=CURVE_COLUMNS)
+
+
+def equity_curves(trades: pd.DataFrame, realized: pd.DataFrame, price_store: PriceStore,
+                  start=None, end=None, clients_per_chunk: int = 200) -> pd.DataFrame:
+    """
+    All chunks of iter_equity_curves() in one DataFrame (sorted by client, date).
+    """
+    frames = list(iter_equity_curves(trades, realized, price_store, start, end, clients_per_chunk))
+    if not frames:
+        return pd.DataFrame(columns=CURVE_COLUMNS)
+    return pd.concat(frames, ignore_index=True)
+
+
+def curve_summary(curve: pd.DataFrame) -> pd.DataFrame:
+    """
+    Per client: last row of the curve plus the worst drawdown over the range.
+    """
+    if curve.empty:
+        return pd.DataFrame(columns=CURVE_COLUMNS[:1] + CURVE_COLUMNS[2:] + ["max_drawdown"])
+    last = curve.groupby("client_id", sort=True).tail(1).set_index("client_id")
+    last = last.drop(columns=["date"])
+    last["max_drawdown"] = curve.groupby("client_id", sort=True)["drawdown"].min()
+    return last.reset_index()
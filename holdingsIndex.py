@@ -0,0 +1,161 @@
+from typing import Optional, Dict, Set
+import pandas as pd
+from brokai.symbolMaster import SYMBOLS, normalize_ticker
+
+UNKNOWN_SECTOR = "Unknown"
+
+
+class HoldingsIndex:
+    """
+    Inverted indexes from ticker / market / sector to the clients holding them.
+
+    Maintained incrementally from trades (BUY adds qty, SELL removes it), so questions like
+    "who holds TEVA.TA" or "which clients are exposed to Energy" are dict lookups instead
+    of compute_positions(None) over every client. Quantities are in today's shares: the
+    portfolio feeds split-adjusted trades (NewModelClientPortfolio.adjusted_table).
+
+    Maps:
+      - qty[ticker][client]            -> net open quantity
+      - by_client[client][ticker]      -> same numbers, keyed the other way
+      - market_clients[market][client] -> number of held tickers in that market
+      - sector_clients[sector][client] -> number of held tickers in that sector
+      - market_tickers / sector_tickers -> tickers ever traded in that market / sector
+    Sectors come from stock_lists (Ticker + Market normalised like trades); tickers not
+    in the universe are filed under "Unknown".
+    """
+
+    def __init__(self, stock_lists: Optional[pd.DataFrame] = None):
+        self.qty: Dict[str, Dict[str, float]] = {}
+        self.by_client: Dict[str, Dict[str, float]] = {}
+        self.ticker_market: Dict[str, str] = {}
+        self.ticker_sector: Dict[str, str] = {}
+        self.market_clients: Dict[str, Dict[str, int]] = {}
+        self.sector_clients: Dict[str, Dict[str, int]] = {}
+        self.market_tickers: Dict[str, Set[str]] = {}
+        self.sector_tickers: Dict[str, Set[str]] = {}
+        self._universe_sector: Dict[str, str] = {}
+        if stock_lists is not None:
+            self.set_universe(stock_lists)
+
+    # ---------- Universe (sector join) ----------
+    def set_universe(self, stock_lists: pd.DataFrame) -> None:
+        """
+        (Re)load ticker -> sector from stock_lists and re-file held tickers whose sector changed.
+        Also registers the universe (and any 'Symbol' overrides) with the symbol master.
+        """
+        SYMBOLS.load(stock_lists)
+        self._universe_sector = {
+            normalize_ticker(t, m): str(s)
+            for t, m, s in stock_lists[["Ticker", "Market", "Sector"]].itertuples(index=False)
+        }
+        for ticker, old_sector in list(self.ticker_sector.items()):
+            new_sector = self._universe_sector.get(ticker, UNKNOWN_SECTOR)
+            if new_sector == old_sector:
+                continue
+            for client in self.qty.get(ticker, {}):
+                self._decrement(self.sector_clients, old_sector, client)
+                self._increment(self.sector_clients, new_sector, client)
+            self.sector_tickers.get(old_sector, set()).discard(ticker)
+            self.sector_tickers.setdefault(new_sector, set()).add(ticker)
+            self.ticker_sector[ticker] = new_sector
+
+    # ---------- Group counters ----------
+    @staticmethod
+    def _increment(groups: Dict[str, Dict[str, int]], key: str, client: str) -> None:
+        bucket = groups.setdefault(key, {})
+        bucket[client] = bucket.get(client, 0) + 1
+
+    @staticmethod
+    def _decrement(groups: Dict[str, Dict[str, int]], key: Optional[str], client: str) -> None:
+        bucket = groups.get(key)
+        if bucket is None or client not in bucket:
+            return
+        bucket[client] -= 1
+        if bucket[client] <= 0:
+            del bucket[client]
+            if not bucket:
+                del groups[key]
+
+    # ---------- Updates ----------
+    def apply(self, client_id: str, ticker: str, market: str, signed_qty: float) -> None:
+        """
+        Apply one trade: +qty for BUY, -qty for SELL (ticker already normalised).
+        """
+        if ticker not in self.ticker_market:
+            market = str(market).strip().upper()
+            sector = self._universe_sector.get(ticker, UNKNOWN_SECTOR)
+            self.ticker_market[ticker] = market
+            self.ticker_sector[ticker] = sector
+            self.market_tickers.setdefault(market, set()).add(ticker)
+            self.sector_tickers.setdefault(sector, set()).add(ticker)
+
+        holders = self.qty.setdefault(ticker, {})
+        before = holders.get(client_id, 0.0)
+        after = before + float(signed_qty)
+
+        if after > 1e-12:
+            holders[client_id] = after
+            self.by_client.setdefault(client_id, {})[ticker] = after
+            if before <= 1e-12:
+                self._increment(self.market_clients, self.ticker_market[ticker], client_id)
+                self._increment(self.sector_clients, self.ticker_sector[ticker], client_id)
+        else:
+            holders.pop(client_id, None)
+            self.by_client.get(client_id, {}).pop(ticker, None)
+            if before > 1e-12:
+                self._decrement(self.market_clients, self.ticker_market[ticker], client_id)
+                self._decrement(self.sector_clients, self.ticker_sector[ticker], client_id)
+        if not holders:
+            del self.qty[ticker]
+
+    def rebuild_client(self, client_id: str, trades: pd.DataFrame) -> None:
+        """
+        Drop a client's entries and re-apply their (split-adjusted) trades; used after
+        loading a client and when a corporate action restates quantities.
+        """
+        for ticker, q in list(self.by_client.get(client_id, {}).items()):
+            self.apply(client_id, ticker, self.ticker_market.get(ticker, ""), -q)
+        self.by_client.pop(client_id, None)
+        if trades.empty:
+            return
+        signed = trades["qty"].where(trades["side"] == "BUY", -trades["qty"])
+        net = (trades.assign(signed=signed)
+                     .groupby(["ticker", "market"], sort=False)["signed"].sum())
+        for (ticker, market), q in net.items():
+            self.apply(client_id, ticker, market, q)
+
+    # ---------- Queries ----------
+    def holders(self, ticker: str, market: Optional[str] = None) -> Dict[str, float]:
+        """
+        {client_id: qty} for everyone holding the ticker (raw ticker + market is normalised).
+        """
+        key = normalize_ticker(ticker, market) if market else str(ticker).strip().upper()
+        return dict(self.qty.get(key, {}))
+
+    def clients_in_market(self, market: str) -> Set[str]:
+        return set(self.market_clients.get(str(market).strip().upper(), {}))
+
+    def clients_in_sector(self, sector: str) -> Set[str]:
+        return set(self.sector_clients.get(sector, {}))
+
+    def exposure(self, sector: Optional[str] = None, market: Optional[str] = None) -> Dict[str, Dict[str, float]]:
+        """
+        {client_id: {ticker: qty}} restricted to tickers in the given sector and/or market.
+        """
+        if sector is not None:
+            tickers = self.sector_tickers.get(sector, set())
+            if market is not None:
+                tickers = tickers & self.market_tickers.get(str(market).strip().upper(), set())
+        elif market is not None:
+            tickers = self.market_tickers.get(str(market).strip().upper(), set())
+        else:
+            tickers = self.qty.keys()
+
+        out: Dict[str, Dict[str, float]] = {}
+        for ticker in tickers:
+            for client, q in self.qty.get(ticker, {}).items():
+                out.setdefault(client, {})[ticker] = q
+        return out
+
+    def client_holdings(self, client_id: str) -> Dict[str, float]:
+        return dict(self.by_client.get(client_id, {}))
@@ -0,0 +1,281 @@
+from datetime import timedelta
+from typing import Optional, Dict, List, Tuple, Iterable
+import numpy as np
+import pandas as pd
+from brokai.priceStore import PriceStore
+
+POST_COLUMNS = ["author", "time", "symbol"]
+
+
+def posts_from_news(items: Iterable) -> pd.DataFrame:
+    """
+    One row per (author, time, symbol) from tagged newsFeed.NewsItem objects
+    (an item tagged to three symbols is three posts).
+    """
+    rows = [(it.author or it.source, it.time, sym) for it in items for sym in it.symbols]
+    return pd.DataFrame(rows, columns=POST_COLUMNS)
+
+
+class InfluencerStudy:
+    """
+    Event study of posts against daily price moves, per author ("influencer").
+
+    Returns model (per symbol, from PriceStore daily closes):
+      - y[t]  = close-to-close return of day t, minus the benchmark's return that day
+                when a benchmark symbol is given (market-adjusted), else the raw return
+      - AR    = y[t] - mean(y) over the estimation window [d0 - gap - estimation, d0 - gap)
+      - CAR   = sum of AR over event days 0..post; pre-event days -pre..-1 are kept too
+    Event day d0 is the first trading day on/after the post (posts at/after close_hour
+    count for the next day).
+
+    Incremental state:
+      - add_posts() only queues events; update() settles, in one vectorised gather per
+        symbol, every queued event whose window is complete (d0 + horizon < bars), where
+        horizon = max(post, max_lag). Later calls only touch newly settled events.
+      - Per-author sufficient statistics are accumulated on settle (event count, sum and
+        sum of squares of CAR, sum |CAR|, sum of y[d0 + L] per lag, sum of squared daily
+        post counts), so rankings() never re-reads old events.
+      - Lagged correlation corr(x[t], y[t + L]) uses x = the author's daily post count on
+        a symbol over the panel of days since its first settled post there; the panel's
+        sums of y / y^2 come from prefix sums of each symbol's series (O(1) per pair).
+    """
+
+    def __init__(self, price_store: PriceStore, pre: int = 1, post: int = 3, estimation: int = 60,
+                 gap: int = 5, max_lag: int = 5, benchmark: Optional[str] = None, close_hour: int = 16):
+        """
+        Args:
+            price_store: local daily bars (see PriceStore.ensure for fetching).
+            pre / post: event window in trading days before / from the event day.
+            estimation / gap: estimation window length and its distance from the event.
+            max_lag: correlations are computed for lags 0..max_lag trading days.
+            benchmark: Yahoo symbol for market-adjusted returns (e.g. 'SPY'); None = raw.
+            close_hour: posts at/after this local hour map to the next trading day.
+        """
+        self.price_store = price_store
+        self.pre, self.post, self.estimation, self.gap = pre, post, estimation, gap
+        self.max_lag, self.benchmark, self.close_hour = max_lag, benchmark, close_hour
+        self.horizon = max(post, max_lag)
+
+        self._pending = pd.DataFrame(columns=POST_COLUMNS)
+        self._series_cache: Dict[str, Tuple[int, Tuple[np.ndarray, ...]]] = {}
+        self.events: List[pd.DataFrame] = []  # settled event rows, one frame per update()
+        self.stats = {"queued": 0, "settled": 0, "skipped": 0}
+
+        # Per-author accumulators (index = author id)
+        self.authors: Dict[str, int] = {}
+        self._n = np.zeros(0)
+        self._car = np.zeros(0)
+        self._car2 = np.zeros(0)
+        self._abs_car = np.zeros(0)
+        self._xy = np.zeros((0, max_lag + 1))
+        self._x2 = np.zeros(0)
+        # (author, symbol) -> first settled event day; (author, symbol, day) -> posts that day
+        self._pair_start: Dict[Tuple[str, str], np.datetime64] = {}
+        self._day_counts: Dict[Tuple[str, str, np.datetime64], int] = {}
+
+    # ---------- Inputs ----------
+    def add_posts(self, posts: pd.DataFrame) -> int:
+        """
+        Queue posts ([author, time, symbol]); returns the number queued.
+        """
+        if posts is None or posts.empty:
+            return 0
+        frame = posts[POST_COLUMNS].assign(
+            author=posts["author"].astype(str),
+            symbol=posts["symbol"].astype(str).str.strip().str.upper(),
+            time=pd.to_datetime(posts["time"]),
+        )
+        self._pending = frame if self._pending.empty else pd.concat([self._pending, frame], ignore_index=True)
+        self.stats["queued"] += len(frame)
+        return len(frame)
+
+    def on_item(self, item) -> None:
+        """
+        NewsIndex subscriber: queue every symbol an ingested item was tagged with.
+        """
+        if item.symbols:
+            self.add_posts(posts_from_news([item]))
+
+    # ---------- Return series ----------
+    def _series(self, symbol: str) -> Tuple[np.ndarray, ...]:
+        """
+        (dates, y, prefix_y, prefix_y2) for a symbol; dates[t] is the day of return y[t].
+        Cached per price-store version.
+        """
+        hit = self._series_cache.get(symbol)
+        if hit is not None and hit[0] == self.price_store.version:
+            return hit[1]
+        bars = self.price_store.read(symbol)
+        close = np.asarray(bars["close"], dtype="f8")
+        dates = np.asarray(bars["date"])[1:]
+        y = close[1:] / close[:-1] - 1.0 if close.size > 1 else np.empty(0)
+        if self.benchmark and symbol != self.benchmark.upper():
+            bench = self.price_store.read(self.benchmark)
+            if bench.size > 1:
+                b_dates = np.asarray(bench["date"])[1:]
+                b_close = np.asarray(bench["close"], dtype="f8")
+                b_ret = b_close[1:] / b_close[:-1] - 1.0
+                pos = np.searchsorted(b_dates, dates).clip(max=b_dates.size - 1)
+                same = b_dates[pos] == dates if b_dates.size else np.zeros(dates.size, bool)
+                y = y - np.where(same, b_ret[pos], 0.0)  # benchmark closed that day: raw return
+        y = np.nan_to_num(y)
+        prefix = np.concatenate(([0.0], np.cumsum(y)))
+        prefix2 = np.concatenate(([0.0], np.cumsum(y * y)))
+        out = (dates, y, prefix, prefix2)
+        self._series_cache[symbol] = (self.price_store.version, out)
+        return out
+
+    def _event_days(self, times: pd.Series) -> np.ndarray:
+        day = times.dt.normalize() + pd.to_timedelta((times.dt.hour >= self.close_hour).astype(int), unit="D")
+        return day.to_numpy().astype("datetime64[D]")
+
+    # ---------- Settling ----------
+    def _author_ids(self, names: np.ndarray) -> np.ndarray:
+        for a in np.unique(names):
+            if a not in self.authors:
+                self.authors[a] = len(self.authors)
+        grow = len(self.authors) - self._n.size
+        if grow > 0:
+            self._n, self._car, self._car2, self._abs_car, self._x2 = (
+                np.concatenate([v, np.zeros(grow)]) for v in (self._n, self._car, self._car2, self._abs_car, self._x2))
+            self._xy = np.vstack([self._xy, np.zeros((grow, self.max_lag + 1))])
+        return np.fromiter((self.authors[a] for a in names), dtype=np.intp, count=names.size)
+
+    def update(self, fetch_missing: bool = False) -> pd.DataFrame:
+        """
+        Settle every queued event whose window is now complete and fold it into the
+        per-author statistics.
+
+        Args:
+            fetch_missing: top up the price store for the queued symbols (and benchmark) first.
+
+        Returns:
+            The newly settled events: [author, symbol, time, day, car, ar_-pre .. ar_post].
+        """
+        if self._pending.empty:
+            return pd.DataFrame()
+        if fetch_missing:
+            first = self._pending["time"].min() - timedelta(days=2 * (self.estimation + self.gap) + 10)
+            for sym in ([self.benchmark] if self.benchmark else []) + list(self._pending["symbol"].unique()):
+                self.price_store.ensure(sym, first)
+
+        offsets = np.arange(-self.pre, self.post + 1)
+        lags = np.arange(self.max_lag + 1)
+        keep, settled = [], []
+        for sym, group in self._pending.groupby("symbol", sort=False):
+            dates, y, prefix, _ = self._series(sym)
+            day = self._event_days(group["time"])
+            d0 = np.searchsorted(dates, day, side="left")
+            est_lo = d0 - self.gap - self.estimation
+            ready = d0 + self.horizon < dates.size
+            no_history = ready & ((est_lo < 0) | (d0 - self.pre < 0))
+            self.stats["skipped"] += int(no_history.sum())
+            keep.append(group[~ready])
+            ok = ready & ~no_history
+            if not ok.any():
+                continue
+            d0, est_lo = d0[ok], est_lo[ok]
+            mu = (prefix[d0 - self.gap] - prefix[est_lo]) / self.estimation
+            ar = y[d0[:, None] + offsets[None, :]] - mu[:, None]
+            ev = pd.DataFrame({
+                "author": group["author"].to_numpy()[ok],
+                "symbol": sym,
+                "time": group["time"].to_numpy()[ok],
+                "day": dates[d0],
+            })
+            ev["car"] = ar[:, self.pre:].sum(axis=1)
+            for j, k in enumerate(offsets):
+                ev[f"ar_{k}"] = ar[:, j]
+            ev_lag = y[d0[:, None] + lags[None, :]]
+            settled.append((ev, ev_lag))
+
+        self._pending = (pd.concat(keep, ignore_index=True) if keep
+                         else pd.DataFrame(columns=POST_COLUMNS))
+        if not settled:
+            return pd.DataFrame()
+
+        events = pd.concat([e for e, _ in settled], ignore_index=True)
+        lag_y = np.vstack([l for _, l in settled])
+        ids = self._author_ids(events["author"].to_numpy())
+        car = events["car"].to_numpy()
+        np.add.at(self._n, ids, 1.0)
+        np.add.at(self._car, ids, car)
+        np.add.at(self._car2, ids, car * car)
+        np.add.at(self._abs_car, ids, np.abs(car))
+        np.add.at(self._xy, ids, lag_y)
+
+        # Daily post counts per (author, symbol): sum x^2 grows by (c + k)^2 - c^2
+        counts = events.groupby(["author", "symbol", "day"], sort=False).size()
+        for (author, sym, day), k in counts.items():
+            day = np.datetime64(day, "D")
+            key = (author, sym, day)
+            c = self._day_counts.get(key, 0)
+            self._day_counts[key] = c + int(k)
+            self._x2[self.authors[author]] += (c + k) ** 2 - c ** 2
+            start = self._pair_start.get((author, sym))
+            if start is None or day < start:
+                self._pair_start[(author, sym)] = day
+
+        self.events.append(events)
+        self.stats["settled"] += len(events)
+        return events
+
+    # ---------- Outputs ----------
+    def event_table(self) -> pd.DataFrame:
+        """
+        Every settled event so far (see update()).
+        """
+        return pd.concat(self.events, ignore_index=True) if self.events else pd.DataFrame()
+
+    def rankings(self, min_events: int = 3, by: str = "t_stat") -> pd.DataFrame:
+        """
+        One row per author with enough settled events:
+        [author, events, mean_car, std_car, t_stat, mean_abs_car, corr_lag0 .. corr_lag<max_lag>],
+        sorted by |by| descending (CAR in return units, e.g. 0.012 = 1.2%).
+        """
+        L = self.max_lag + 1
+        names = np.array(list(self.authors), dtype=object)
+        if names.size == 0:
+            return pd.DataFrame(columns=["author", "events", "mean_car", "std_car", "t_stat", "mean_abs_car"]
+                                + [f"corr_lag{l}" for l in range(L)])
+
+        # Panel sums per author: days t in [start, T - 1 - horizon], y taken at t + L
+        pn = np.zeros(names.size)
+        sy = np.zeros((names.size, L))
+        sy2 = np.zeros((names.size, L))
+        for (author, sym), start in self._pair_start.items():
+            dates, _, prefix, prefix2 = self._series(sym)
+            lo = int(np.searchsorted(dates, start, side="left"))
+            hi = dates.size - self.horizon  # exclusive
+            if hi <= lo:
+                continue
+            a = self.authors[author]
+            pn[a] += hi - lo
+            for l in range(L):
+                sy[a, l] += prefix[hi + l] - prefix[lo + l]
+                sy2[a, l] += prefix2[hi + l] - prefix2[lo + l]
+
+        n = self._n
+        with np.errstate(invalid="ignore", divide="ignore"):
+            mean = self._car / n
+            var = (self._car2 - n * mean * mean) / (n - 1)
+            std = np.sqrt(np.clip(var, 0.0, None))
+            t_stat = mean / (std / np.sqrt(n))
+            sx, sx2 = n[:, None], self._x2[:, None]
+            num = pn[:, None] * self._xy - sx * sy
+            den = np.sqrt((pn[:, None] * sx2 - sx * sx) * (pn[:, None] * sy2 - sy * sy))
+            corr = np.where(den > 0, num / den, np.nan)
+
+        out = pd.DataFrame({
+            "author": names,
+            "events": n.astype(int),
+            "mean_car": mean,
+            "std_car": std,
+            "t_stat": t_stat,
+            "mean_abs_car": self._abs_car / n,
+        })
+        for l in range(L):
+            out[f"corr_lag{l}"] = corr[:, l]
+        out = out[out["events"] >= min_events]
+        return (out.assign(_key=out[by].abs()).sort_values(["_key", "events"], ascending=False)
+                .drop(columns="_key").reset_index(drop=True))
@@ -0,0 +1,167 @@
+from datetime import datetime
+from typing import Optional, Dict, Any, Callable, Tuple
+import numpy as np
+import pandas as pd
+import time
+
+# One row per 1-minute bar of the current session
+MINUTE_DTYPE = np.dtype([
+    ("ts", "<M8[m]"),
+    ("open", "<f8"),
+    ("high", "<f8"),
+    ("low", "<f8"),
+    ("close", "<f8"),
+    ("volume", "<f8"),
+])
+
+RETURN_WINDOWS = (5, 15, 30)  # minutes
+
+
+# ---------- Fetching ----------
+def yahoo_minute_bars(symbol: str, start: Optional[datetime] = None) -> np.ndarray:
+    """
+    1-minute bars from Yahoo: the latest session when start is None, else from start on.
+    Returns a MINUTE_DTYPE array sorted by time (exchange-local clock, tz dropped).
+    """
+    import yfinance as yf
+
+    if start is None:
+        hist = yf.Ticker(symbol).history(period="1d", interval="1m")
+    else:
+        hist = yf.Ticker(symbol).history(start=start, interval="1m")
+    if not isinstance(hist, pd.DataFrame) or hist.empty:
+        return np.empty(0, dtype=MINUTE_DTYPE)
+
+    idx = hist.index
+    if getattr(idx, "tz", None) is not None:
+        idx = idx.tz_localize(None)
+    bars = np.empty(len(hist), dtype=MINUTE_DTYPE)
+    bars["ts"] = idx.values.astype("datetime64[m]")
+    for col in ("open", "high", "low", "close", "volume"):
+        bars[col] = hist[col.capitalize()].to_numpy(dtype="f8")
+    return bars[np.argsort(bars["ts"], kind="stable")]
+
+
+# ---------- Features ----------
+def intraday_features(bars: np.ndarray) -> Dict[str, Any]:
+    """
+    Compact features from one session of 1-minute bars.
+
+    Returns:
+        {bars, last_time, last, vwap, vs_vwap_pct, session_high, session_low, range_pct,
+         ret_5m, ret_15m, ret_30m (percent), volume_5m, volume_z} — values are None when
+        there is not enough data.
+    """
+    out: Dict[str, Any] = {"bars": int(bars.size)}
+    if bars.size == 0:
+        return out
+    close, vol = bars["close"], bars["volume"]
+    last = float(close[-1])
+    typical = (bars["high"] + bars["low"] + close) / 3.0
+    vwap = float(np.sum(typical * vol) / np.sum(vol)) if np.sum(vol) > 0 else None
+    hi, lo, first_open = float(bars["high"].max()), float(bars["low"].min()), float(bars["open"][0])
+
+    out.update({
+        "last_time": str(bars["ts"][-1]),
+        "last": round(last, 4),
+        "vwap": None if vwap is None else round(vwap, 4),
+        "vs_vwap_pct": None if not vwap else round((last / vwap - 1.0) * 100.0, 3),
+        "session_high": round(hi, 4),
+        "session_low": round(lo, 4),
+        "range_pct": round((hi - lo) / first_open * 100.0, 3) if first_open else None,
+    })
+
+    # Returns vs. the last bar at or before (last time - N minutes)
+    ts = bars["ts"]
+    for n in RETURN_WINDOWS:
+        j = np.searchsorted(ts, ts[-1] - np.timedelta64(n, "m"), side="right") - 1
+        out[f"ret_{n}m"] = round((last / close[j] - 1.0) * 100.0, 3) if j >= 0 and close[j] else None
+
+    # Last 5 minutes of volume against every 5-minute window of the session
+    out["volume_5m"] = float(vol[-5:].sum())
+    if vol.size >= 10:
+        sums = np.convolve(vol, np.ones(5), mode="valid")
+        std = sums.std()
+        out["volume_z"] = round(float((sums[-1] - sums.mean()) / std), 3) if std > 0 else 0.0
+    else:
+        out["volume_z"] = None
+    return out
+
+
+def features_to_text(symbol: str, f: Dict[str, Any]) -> str:
+    """
+    One short block for LLM prompts (instead of 30 rows of raw OHLCV).
+    """
+    if not f.get("bars"):
+        return f"{symbol}: (no intraday data)"
+    rets = ", ".join(f"{n}m {f[f'ret_{n}m']}%" for n in RETURN_WINDOWS if f.get(f"ret_{n}m") is not None)
+    return (f"{symbol} @ {f['last_time']} ({f['bars']} one-minute bars)\n"
+            f"last {f['last']} | VWAP {f['vwap']} ({f['vs_vwap_pct']}% vs VWAP)\n"
+            f"session range {f['session_low']} - {f['session_high']} ({f['range_pct']}% of open)\n"
+            f"returns: {rets or 'n/a'}\n"
+            f"volume last 5m {f['volume_5m']:.0f} (z-score {f['volume_z']})")
+
+
+# ---------- Cache ----------
+class IntradayCache:
+    """
+    Per-process cache of today's 1-minute bars and the features derived from them.
+
+    - The first request for a symbol downloads the current session once; later refreshes
+      only ask Yahoo for bars from the last cached minute on (that minute is replaced,
+      since it may have been partial).
+    - Features are reused for `ttl` seconds, so the forecast and deep-look prompts for
+      the same ticker within a minute share one download and one computation.
+    """
+
+    def __init__(self, fetcher: Optional[Callable[[str, Optional[datetime]], np.ndarray]] = None,
+                 ttl: float = 60.0):
+        """
+        Args:
+            fetcher: callable(symbol, start_or_None) -> MINUTE_DTYPE array; defaults to Yahoo.
+            ttl: seconds features (and the cached bars) count as fresh.
+        """
+        self.fetcher = fetcher or yahoo_minute_bars
+        self.ttl = ttl
+        self._bars: Dict[str, np.ndarray] = {}
+        self._features: Dict[str, Tuple[float, Dict[str, Any]]] = {}
+
+    def bars(self, symbol: str) -> np.ndarray:
+        """
+        Current-session bars for the symbol, topping up only the missing tail.
+        Network errors keep what is cached.
+        """
+        key = str(symbol).strip().upper()
+        cached = self._bars.get(key)
+        try:
+            if cached is None or cached.size == 0:
+                fresh = self.fetcher(key, None)
+                merged = fresh
+            else:
+                fresh = self.fetcher(key, cached["ts"][-1].astype(datetime))
+                merged = np.concatenate([cached[cached["ts"] < fresh["ts"][0]], fresh]) if fresh.size else cached
+        except Exception:
+            return cached if cached is not None else np.empty(0, dtype=MINUTE_DTYPE)
+
+        if merged.size:
+            # Keep one session: the newest trading day
+            day = merged["ts"][-1].astype("datetime64[D]")
+            merged = merged[merged["ts"].astype("datetime64[D]") == day]
+        self._bars[key] = merged
+        return merged
+
+    def features(self, symbol: str) -> Dict[str, Any]:
+        """
+        intraday_features() for the symbol, recomputed at most once per ttl.
+        """
+        key = str(symbol).strip().upper()
+        hit = self._features.get(key)
+        now = time.monotonic()
+        if hit is not None and now - hit[0] < self.ttl:
+            return hit[1]
+        f = intraday_features(self.bars(key))
+        self._features[key] = (now, f)
+        return f
+
+    def summary_text(self, symbol: str) -> str:
+        return features_to_text(str(symbol).strip().upper(), self.features(symbol))
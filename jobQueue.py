@@ -0,0 +1,327 @@
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import closing
+from datetime import datetime
+from typing import Optional, Dict, Any, Callable, List
+import pandas as pd
+import threading
+import sqlite3
+import json
+import time
+from brokai.clientManagement import generate_serial
+
+# Job states
+QUEUED, RUNNING, DONE, FAILED, CANCELLED = "queued", "running", "done", "failed", "cancelled"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id               TEXT PRIMARY KEY,   -- also the Serial number the job's rows are tagged with
+    kind             TEXT NOT NULL,
+    params           TEXT NOT NULL,      -- JSON
+    priority         INTEGER NOT NULL DEFAULT 0,
+    status           TEXT NOT NULL,
+    done             INTEGER NOT NULL DEFAULT 0,
+    total            INTEGER NOT NULL DEFAULT 0,
+    cancel_requested INTEGER NOT NULL DEFAULT 0,
+    result           TEXT,               -- JSON
+    error            TEXT,
+    created_at       TEXT NOT NULL,
+    started_at       TEXT,
+    finished_at      TEXT
+);
+CREATE INDEX IF NOT EXISTS jobs_pick ON jobs(status, priority DESC, created_at);
+"""
+
+
+class JobCancelled(Exception):
+    """Raised inside a running job when cancel() was requested."""
+
+
+# ---------- Task implementations ----------
+def _to_json(value) -> Any:
+    """
+    Make task results JSON-friendly (DataFrames -> list of records).
+    """
+    if isinstance(value, pd.DataFrame):
+        return json.loads(value.to_json(orient="records", date_format="iso"))
+    return value
+
+
+def _task_recommend(manager, serial: str, params: Dict[str, Any], progress) -> Any:
+    sale_date = params.get("sale_date")
+    return manager.Recommended_stocks(
+        sector=params.get("sector", "ALL"),
+        market=params.get("market", "US"),
+        sale_date=datetime.fromisoformat(sale_date) if sale_date else None,
+        confidencePresentage=params.get("confidencePresentage", 70),
+        serialNum=serial,
+        progress=progress,
+        top_k=params.get("top_k"),
+        screen_weights=params.get("screen_weights"),
+        k=params.get("k", 3),
+        deadline=params.get("deadline"),
+        enough_confidence=params.get("enough_confidence"),
+    )
+
+
+def _task_client_predict(manager, serial: str, params: Dict[str, Any], progress) -> Any:
+    sale_date = params.get("sale_date")
+    return manager.Clientpredict(
+        params["client_id"],
+        sale_date=datetime.fromisoformat(sale_date) if sale_date else None,
+        serialNum=serial,
+        progress=progress,
+    )
+
+
+def _task_forecast(manager, serial: str, params: Dict[str, Any], progress) -> Any:
+    ai = manager.AImanage
+    ai.get_forcast_stock(ai.client, params["stock_name"],
+                         datetime.fromisoformat(params["buy_date"]),
+                         datetime.fromisoformat(params["sale_date"]), serial)
+    progress(1, 1)
+    return ai.context.keyed("stocksTable", ("Serial number",)).frame(serial)
+
+
+def _task_deep_look(manager, serial: str, params: Dict[str, Any], progress) -> Any:
+    grade = manager.StockGrade(params["stock_name"], serialNum=serial)
+    progress(1, 1)
+    return grade
+
+
+def _task_equity_curves(manager, serial: str, params: Dict[str, Any], progress) -> Any:
+    from brokai.equityCurve import curve_summary
+
+    curve = manager.clientManagement.equity_curve(params.get("client_id"),
+                                                  start=params.get("start"), end=params.get("end"))
+    if params.get("path"):
+        curve.to_csv(params["path"], index=False)  # full curve on disk, summary in the job result
+    progress(1, 1)
+    return curve_summary(curve)
+
+
+TASKS: Dict[str, Callable] = {
+    "recommend": _task_recommend,          # clientManagement.Recommended_stocks
+    "client_predict": _task_client_predict,  # clientManagement.Clientpredict
+    "forecast": _task_forecast,            # StockManagement.get_forcast_stock (one stock)
+    "deep_look": _task_deep_look,          # clientManagement.StockGrade
+    "equity_curves": _task_equity_curves,  # NewModelClientPortfolio.equity_curve (batch revaluation)
+}
+
+
+# ---------- Queue ----------
+class JobQueue:
+    """
+    Local job subsystem for the long-running AI workflows (no external services).
+
+    - Jobs are rows in a SQLite file; submit() returns the job id immediately.
+    - The job id IS the Serial number the workflow tags its StocksTable/DeepTable rows
+      with, so results can also be read back from those tables by serial.
+    - A thread pool of workers claims the highest-priority queued job, reports per-job
+      progress (done/total forecasts) and honours cancel() between LLM calls.
+    - Jobs left 'running' by a crashed process are re-queued on start().
+
+    Usage:
+        q = JobQueue(clientManagement(sm)); q.start()
+        job_id = q.submit("recommend", {"sector": "Energy", "market": "US"}, priority=5)
+        q.status(job_id); q.result(job_id); q.cancel(job_id)
+    """
+
+    def __init__(self, manager, db_path: str = "jobs.sqlite", workers: int = 2,
+                 poll_interval: float = 0.5):
+        """
+        Args:
+            manager: clientManagement instance the tasks run against.
+            db_path: SQLite file for the job table.
+            workers: number of worker threads (LLM calls are I/O bound).
+            poll_interval: seconds an idle worker waits before polling again.
+        """
+        self.manager = manager
+        self.db_path = db_path
+        self.workers = workers
+        self.poll_interval = poll_interval
+        self._pool: Optional[ThreadPoolExecutor] = None
+        self._stop = threading.Event()
+        self._wake = threading.Event()
+        with closing(self._connect()) as con:
+            con.executescript(_SCHEMA)
+
+    # ---------- DB ----------
+    def _connect(self) -> sqlite3.Connection:
+        con = sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+        con.row_factory = sqlite3.Row
+        con.execute("PRAGMA journal_mode=WAL")
+        return con
+
+    @staticmethod
+    def _now() -> str:
+        return datetime.now().isoformat(timespec="seconds")
+
+    # ---------- Client API ----------
+    def submit(self, kind: str, params: Optional[Dict[str, Any]] = None, priority: int = 0) -> str:
+        """
+        Queue a job and return its id (= Serial number) without waiting.
+
+        Raises:
+            ValueError for unknown job kinds.
+        """
+        if kind not in TASKS:
+            raise ValueError(f"Unknown job kind '{kind}'. Expected one of {sorted(TASKS)}.")
+        job_id = generate_serial()
+        with closing(self._connect()) as con:
+            con.execute(
+                "INSERT INTO jobs (id, kind, params, priority, status, created_at) VALUES (?,?,?,?,?,?)",
+                (job_id, kind, json.dumps(params or {}, default=str), int(priority), QUEUED, self._now()))
+        self._wake.set()
+        return job_id
+
+    def status(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """
+        {id, kind, status, priority, done, total, progress, error, created_at, started_at, finished_at}
+        or None if the id is unknown.
+        """
+        with closing(self._connect()) as con:
+            row = con.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        if row is None:
+            return None
+        out = {k: row[k] for k in row.keys() if k not in ("params", "result", "cancel_requested")}
+        out["params"] = json.loads(row["params"])
+        out["progress"] = (row["done"] / row["total"]) if row["total"] else (1.0 if row["status"] == DONE else 0.0)
+        return out
+
+    def result(self, job_id: str) -> Any:
+        """
+        Parsed result of a finished job (None while queued/running or if it failed).
+        """
+        with closing(self._connect()) as con:
+            row = con.execute("SELECT result FROM jobs WHERE id = ? AND status = ?", (job_id, DONE)).fetchone()
+        return None if row is None or row["result"] is None else json.loads(row["result"])
+
+    def list(self, status: Optional[str] = None, limit: int = 100) -> List[Dict[str, Any]]:
+        """
+        Most recent jobs first, optionally filtered by status.
+        """
+        sql = "SELECT id, kind, status, priority, done, total, created_at FROM jobs"
+        args: tuple = ()
+        if status is not None:
+            sql += " WHERE status = ?"
+            args = (status,)
+        sql += " ORDER BY created_at DESC LIMIT ?"
+        with closing(self._connect()) as con:
+            return [dict(r) for r in con.execute(sql, args + (limit,))]
+
+    def cancel(self, job_id: str) -> bool:
+        """
+        Cancel a queued job at once, or ask a running one to stop after its current LLM call.
+        Returns False if the job is unknown or already finished.
+        """
+        with closing(self._connect()) as con:
+            cur = con.execute("UPDATE jobs SET status = ?, finished_at = ? WHERE id = ? AND status = ?",
+                              (CANCELLED, self._now(), job_id, QUEUED))
+            if cur.rowcount:
+                return True
+            cur = con.execute("UPDATE jobs SET cancel_requested = 1 WHERE id = ? AND status = ?",
+                              (job_id, RUNNING))
+            return cur.rowcount > 0
+
+    def wait(self, job_id: str, timeout: Optional[float] = None) -> Optional[Dict[str, Any]]:
+        """
+        Block until the job leaves queued/running (or timeout); returns its status.
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            st = self.status(job_id)
+            if st is None or st["status"] not in (QUEUED, RUNNING):
+                return st
+            if deadline is not None and time.monotonic() >= deadline:
+                return st
+            time.sleep(self.poll_interval / 2)
+
+    # ---------- Workers ----------
+    def start(self) -> None:
+        """
+        Re-queue jobs orphaned by a previous crash and start the worker threads.
+        """
+        if self._pool is not None:
+            return
+        with closing(self._connect()) as con:
+            con.execute("UPDATE jobs SET status = ?, started_at = NULL WHERE status = ?", (QUEUED, RUNNING))
+        self._stop.clear()
+        self._pool = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="brokai-job")
+        for _ in range(self.workers):
+            self._pool.submit(self._worker_loop)
+
+    def shutdown(self, wait: bool = True) -> None:
+        """
+        Stop workers after their current job.
+        """
+        self._stop.set()
+        self._wake.set()
+        if self._pool is not None:
+            self._pool.shutdown(wait=wait)
+            self._pool = None
+
+    def _claim(self) -> Optional[sqlite3.Row]:
+        """
+        Atomically move the best queued job (priority, then age) to running.
+        """
+        con = self._connect()
+        try:
+            con.execute("BEGIN IMMEDIATE")
+            row = con.execute("SELECT * FROM jobs WHERE status = ? ORDER BY priority DESC, created_at LIMIT 1",
+                              (QUEUED,)).fetchone()
+            if row is not None:
+                con.execute("UPDATE jobs SET status = ?, started_at = ? WHERE id = ?",
+                            (RUNNING, self._now(), row["id"]))
+            con.execute("COMMIT")
+            return row
+        except Exception:
+            try:
+                con.execute("ROLLBACK")
+            except sqlite3.Error:
+                pass  # no open transaction (e.g. BEGIN itself failed); keep the original error
+            raise
+        finally:
+            con.close()
+
+    def _worker_loop(self) -> None:
+        """
+        Claim and run jobs until shutdown. Queue errors (e.g. "database is locked") are
+        reported and retried with exponential back-off instead of killing the thread.
+        """
+        backoff = self.poll_interval
+        while not self._stop.is_set():
+            try:
+                job = self._claim()
+                if job is not None:
+                    self._run(job)
+            except Exception as e:
+                print(f"[WARN] Job worker error ({type(e).__name__}: {e}); retrying in {backoff:.1f}s.")
+                self._stop.wait(backoff)
+                backoff = min(backoff * 2, 30 * self.poll_interval)
+                continue
+            backoff = self.poll_interval
+            if job is None:
+                self._wake.wait(self.poll_interval)
+                self._wake.clear()
+
+    def _run(self, job: sqlite3.Row) -> None:
+        job_id = job["id"]
+
+        def progress(done: int, total: int) -> None:
+            with closing(self._connect()) as con:
+                con.execute("UPDATE jobs SET done = ?, total = ? WHERE id = ?", (done, total, job_id))
+                flag = con.execute("SELECT cancel_requested FROM jobs WHERE id = ?", (job_id,)).fetchone()
+            if flag is not None and flag["cancel_requested"]:
+                raise JobCancelled(job_id)
+
+        try:
+            value = TASKS[job["kind"]](self.manager, job_id, json.loads(job["params"]), progress)
+            status, result, error = DONE, json.dumps(_to_json(value), default=str), None
+        except JobCancelled:
+            status, result, error = CANCELLED, None, None
+        except Exception as e:  # keep the worker alive; surface the error on the job
+            status, result, error = FAILED, None, f"{type(e).__name__}: {e}"
+
+        with closing(self._connect()) as con:
+            con.execute("UPDATE jobs SET status = ?, result = ?, error = ?, finished_at = ? WHERE id = ?",
+                        (status, result, error, self._now(), job_id))
@@ -0,0 +1,84 @@
+from typing import Optional, Dict, List, Tuple, Sequence, Any, Iterator
+import numpy as np
+import pandas as pd
+
+
+class KeyedTable:
+    """
+    Immutable pandas table sorted by key columns, with an offsets index for zero-copy slicing.
+
+    - The rows are stably sorted by `keys` once (original order is kept within a key), and
+      every key prefix gets {key tuple: (start, stop)} offsets, so slice('c1') and
+      slice('c1', 'AAPL') are O(1) lookups + a zero-copy slice instead of a boolean mask
+      over the whole table.
+    - Slices are copy-on-write iloc views of the sorted DataFrame, so reading one
+      client's rows never copies the table.
+    - Build a new KeyedTable when the source changes (callers key their cache on the
+      source's version counter); frame() results should be treated as read-only.
+    """
+
+    def __init__(self, frame: pd.DataFrame, keys: Sequence[str]):
+        """
+        Args:
+            frame: source rows (any order).
+            keys: key columns, outermost first (e.g. ("client_id", "ticker")).
+        """
+        self.keys = tuple(keys)
+        self.columns = list(frame.columns)
+
+        # One stable sort: argsort by the innermost key, then stable passes outwards
+        order = np.arange(len(frame))
+        for k in reversed(self.keys):
+            col = frame[k].to_numpy()[order]
+            try:
+                order = order[np.argsort(col, kind="stable")]
+            except TypeError:  # mixed types (e.g. NaN among strings): order by text
+                order = order[np.argsort(col.astype(str), kind="stable")]
+        ordered = frame.iloc[order].reset_index(drop=True)
+
+        # Offsets per key prefix from run boundaries of the sorted key columns
+        self._offsets: List[Dict[Tuple[Any, ...], Tuple[int, int]]] = []
+        n = len(ordered)
+        change = np.zeros(n, dtype=bool)
+        if n:
+            change[0] = True
+        key_values = [ordered[k].to_numpy() for k in self.keys]
+        for depth, values in enumerate(key_values, start=1):
+            if n > 1:
+                change[1:] |= values[1:] != values[:-1]
+            starts = np.flatnonzero(change)
+            stops = np.r_[starts[1:], n]
+            level = {tuple(v[s] for v in key_values[:depth]): (int(s), int(e)) for s, e in zip(starts, stops)}
+            self._offsets.append(level)
+
+        self._data = ordered
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def groups(self, depth: Optional[int] = None) -> Iterator[Tuple[Any, ...]]:
+        """
+        Key tuples at the given depth (default: all keys), in sorted order.
+        """
+        return iter(self._offsets[(depth or len(self.keys)) - 1])
+
+    def bounds(self, *key) -> Tuple[int, int]:
+        """
+        (start, stop) rows of a key prefix; (0, 0) when absent.
+        """
+        if not key:
+            return 0, len(self)
+        return self._offsets[len(key) - 1].get(tuple(key), (0, 0))
+
+    def slice(self, *key) -> pd.DataFrame:
+        """
+        Rows of a key prefix as a view of the sorted table (original row labels).
+        """
+        start, stop = self.bounds(*key)
+        return self._data.iloc[start:stop]
+
+    def frame(self, *key) -> pd.DataFrame:
+        """
+        Rows of a key prefix as a DataFrame labelled 0..n-1 (still a zero-copy view).
+        """
+        return self.slice(*key).reset_index(drop=True)
@@ -0,0 +1,149 @@
+"""
+Load test for apiServer.ApiServer against mocked backends (no OpenAI / Yahoo calls).
+
+    python -m brokai.loadTest --clients 200 --connections 32 --requests 200
+
+Builds a synthetic portfolio (random trades) and an offline PriceStore, starts the
+server on a free local port, then hammers it with keep-alive connections. Requests go
+in pairs: a plain GET of a path, then an If-None-Match revalidation of that same path
+with the ETag just returned, so the 304 path is measured however few requests are sent.
+"""
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+import numpy as np
+import pandas as pd
+import argparse
+import asyncio
+import tempfile
+import time
+import os
+
+
+def _mock_manager(n_clients: int, n_tickers: int, seed: int = 0):
+    """
+    clientManagement look-alike over a real NewModelClientPortfolio + offline PriceStore.
+
+    Side effects:
+        - Points brokai.client.latest_close_yf (the live Yahoo quote) at the offline store.
+    """
+    from brokai import client
+    from brokai.client import NewModelClientPortfolio
+    from brokai.dataContext import DataContext
+    from brokai.priceStore import PriceStore, BAR_DTYPE
+
+    rng = np.random.default_rng(seed)
+
+    def fake_bars(symbol, start, end):
+        days = np.arange(start, end + np.timedelta64(1, "D"), dtype="datetime64[D]")
+        days = days[np.is_busday(days)]
+        bars = np.zeros(days.size, dtype=BAR_DTYPE)
+        bars["date"] = days
+        bars["close"] = 100 * np.exp(np.cumsum(rng.normal(0, 0.01, days.size)))
+        bars["low"] = bars["close"] * 0.99
+        bars["high"] = bars["close"] * 1.01
+        return bars
+
+    tickers = [f"T{i:03d}" for i in range(n_tickers)]
+    stock_lists = pd.DataFrame({"Ticker": tickers, "Name": tickers, "Market": "US",
+                                "Sector": rng.choice(["Energy", "Tech", "Health"], n_tickers)})
+    context = DataContext()
+    context.set("stock_lists", stock_lists)
+    context.set("stocksTable", pd.DataFrame({
+        "Serial number": rng.choice(["SN1", "SN2", "SN3"], 300),
+        "Stocks Name": rng.choice(tickers, 300),
+        "Stock volatility forecast": rng.choice([1, -1], 300),
+        "Confidence level": rng.integers(40, 100, 300),
+    }))
+    store = PriceStore("price_store", fetcher=fake_bars, default_history_days=30)
+    ai = SimpleNamespace(price_store=store, context=context, stock_lists=stock_lists, client=None)
+
+    def offline_close(ticker):
+        store.ensure(ticker)
+        return store.latest_close(ticker)
+    client.latest_close_yf = offline_close
+
+    portfolio = NewModelClientPortfolio(ai)
+    t0 = datetime(2025, 1, 1)
+    for c in range(n_clients):
+        for t in rng.choice(tickers, 5, replace=False):
+            portfolio.add_trade(f"C{c:04d}", t, "US", "BUY", int(rng.integers(1, 50)), 100.0,
+                                t0 + timedelta(days=int(rng.integers(0, 100))))
+    return SimpleNamespace(clientManagement=portfolio, AImanage=ai, context=context,
+                           stocksTable=context.view("stocksTable"))
+
+
+async def _request(reader, writer, path: str, etag=None):
+    lines = [f"GET {path} HTTP/1.1", "Host: localhost"]
+    if etag:
+        lines.append(f"If-None-Match: {etag}")
+    writer.write(("\r\n".join(lines) + "\r\n\r\n").encode("latin-1"))
+    await writer.drain()
+    status = int((await reader.readline()).split()[1])
+    headers = {}
+    while True:
+        line = await reader.readline()
+        if line in (b"\r\n", b""):
+            break
+        k, _, v = line.decode("latin-1").partition(":")
+        headers[k.strip().lower()] = v.strip()
+    length = int(headers.get("content-length", 0))
+    if length:
+        await reader.readexactly(length)
+    return status, headers.get("etag")
+
+
+async def _worker(port: int, paths, n: int, latencies, statuses):
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    etags = {}
+    for i in range(n):
+        # Even i: plain GET; odd i: revalidate the path just fetched
+        path = paths[(i // 2) % len(paths)]
+        t = time.perf_counter()
+        status, etag = await _request(reader, writer, path, etags.get(path) if i % 2 else None)
+        latencies.append(time.perf_counter() - t)
+        statuses[status] = statuses.get(status, 0) + 1
+        if etag:
+            etags[path] = etag
+    writer.close()
+
+
+async def run(clients: int, tickers: int, connections: int, requests: int) -> dict:
+    from brokai.apiServer import ApiServer
+
+    manager = _mock_manager(clients, tickers)
+    api = ApiServer(manager)
+    server = await api.start("127.0.0.1", 0)
+    port = server.sockets[0].getsockname()[1]
+
+    paths = [f"/clients/C{c:04d}/holdings" for c in range(min(clients, 50))]
+    paths += ["/forecasts/SN1", "/exposure?sector=Energy", "/clients/C0000/realized"]
+
+    latencies, statuses = [], {}
+    t = time.perf_counter()
+    async with server:
+        await asyncio.gather(*[_worker(port, paths, requests, latencies, statuses) for _ in range(connections)])
+    wall = time.perf_counter() - t
+
+    lat = np.array(latencies) * 1000
+    return {
+        "requests": len(latencies),
+        "wall_s": round(wall, 3),
+        "req_per_s": round(len(latencies) / wall, 1),
+        "p50_ms": round(float(np.percentile(lat, 50)), 3),
+        "p99_ms": round(float(np.percentile(lat, 99)), 3),
+        "statuses": statuses,
+        "server_stats": api.stats,
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Load-test the brokai API against mocked backends.")
+    parser.add_argument("--clients", type=int, default=200)
+    parser.add_argument("--tickers", type=int, default=50)
+    parser.add_argument("--connections", type=int, default=32)
+    parser.add_argument("--requests", type=int, default=200, help="requests per connection")
+    args = parser.parse_args()
+
+    # Keep the mock price store / client workbooks out of the working tree
+    os.chdir(tempfile.mkdtemp(prefix="brokai-loadtest-"))
+    print(asyncio.run(run(args.clients, args.tickers, args.connections, args.requests)))
@@ -0,0 +1,366 @@
+from abc import ABC, abstractmethod
+from collections import deque
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from typing import Optional, Dict, List, Tuple, Iterable, AsyncIterator, Deque, Set, Callable
+import numpy as np
+import pandas as pd
+import asyncio
+import hashlib
+import json
+import re
+from brokai.symbolMaster import normalize_ticker
+
+
+# ---------- Data model ----------
+@dataclass
+class NewsItem:
+    """
+    One piece of text from a news/social source.
+    - source: feed name ('yahoo', 'twitter', 'replay', ...)
+    - time: publication time
+    - title / text: headline and body (body may be empty for headlines-only feeds)
+    - author: outlet or account handle (influencer tracking)
+    - symbols: Yahoo symbols tagged by NewsIndex (filled on ingest)
+    """
+    source: str
+    time: datetime
+    title: str
+    text: str = ""
+    author: str = ""
+    url: str = ""
+    symbols: List[str] = field(default_factory=list)
+
+
+# ---------- Sources ----------
+class NewsSource(ABC):
+    """
+    Pluggable text source. Subclasses implement items() as an async generator.
+    """
+
+    @abstractmethod
+    def items(self) -> AsyncIterator[NewsItem]:
+        ...
+
+
+class JsonlNewsSource(NewsSource):
+    """
+    Replay items recorded as JSONL lines:
+    {"source", "time": ISO-8601, "title", "text", "author", "url"} (only time + title required).
+    """
+
+    def __init__(self, path: str, source: str = "replay"):
+        self.path = path
+        self.source = source
+
+    async def items(self) -> AsyncIterator[NewsItem]:
+        with open(self.path, "r", encoding="utf-8") as fh:
+            for line in fh:
+                line = line.strip()
+                if not line:
+                    continue
+                rec = json.loads(line)
+                yield NewsItem(rec.get("source", self.source), datetime.fromisoformat(rec["time"]),
+                               rec["title"], rec.get("text", ""), rec.get("author", ""), rec.get("url", ""))
+                await asyncio.sleep(0)
+
+
+class YahooNewsSource(NewsSource):
+    """
+    Poll Yahoo Finance headlines for a list of symbols every `interval` seconds.
+    """
+
+    def __init__(self, symbols: Iterable[str], interval: float = 300.0, rounds: Optional[int] = None):
+        self.symbols = list(symbols)
+        self.interval = interval
+        self.rounds = rounds
+
+    async def items(self) -> AsyncIterator[NewsItem]:
+        import yfinance as yf
+
+        n = 0
+        while self.rounds is None or n < self.rounds:
+            for sym in self.symbols:
+                try:
+                    news = await asyncio.to_thread(lambda: yf.Ticker(sym).news or [])
+                except Exception:
+                    continue
+                for rec in news:
+                    body = rec.get("content", rec)  # newer yfinance nests the fields under "content"
+                    title = body.get("title")
+                    if not title:
+                        continue
+                    when = body.get("pubDate") or body.get("providerPublishTime")
+                    when = (datetime.fromtimestamp(when) if isinstance(when, (int, float))
+                            else pd.Timestamp(when).tz_localize(None).to_pydatetime() if when else datetime.now())
+                    provider = body.get("provider") or {}
+                    yield NewsItem("yahoo", when, title, body.get("summary", "") or "",
+                                   provider.get("displayName", "") if isinstance(provider, dict) else str(provider),
+                                   (body.get("canonicalUrl") or {}).get("url", "") if isinstance(body.get("canonicalUrl"), dict)
+                                   else body.get("link", ""))
+            n += 1
+            if self.rounds is None or n < self.rounds:
+                await asyncio.sleep(self.interval)
+
+
+# ---------- Near-duplicate detection ----------
+_WORD = re.compile(r"[a-z0-9$]+")
+_MERSENNE = np.uint64((1 << 61) - 1)
+
+
+class MinHashDeduper:
+    """
+    Near-duplicate filter: word-shingle MinHash signatures + LSH banding.
+
+    - Each item's title+text is split into `shingle`-word shingles, hashed to 64 bits,
+      and reduced to a `num_perm` MinHash signature in one vectorised NumPy pass.
+    - Signatures are cut into `bands` bands; items sharing any band are candidates, and a
+      candidate whose estimated Jaccard similarity >= threshold makes the new item a
+      duplicate (wire copies, retweets, re-published headlines).
+    - Only the last `capacity` signatures are kept (older stories age out).
+    """
+
+    def __init__(self, num_perm: int = 64, bands: int = 16, shingle: int = 3,
+                 threshold: float = 0.8, capacity: int = 50_000, seed: int = 1):
+        assert num_perm % bands == 0, "num_perm must be a multiple of bands"
+        self.num_perm, self.bands, self.shingle, self.threshold = num_perm, bands, shingle, threshold
+        self.rows = num_perm // bands
+        rng = np.random.default_rng(seed)
+        self._a = rng.integers(1, (1 << 61) - 1, num_perm, dtype=np.uint64)
+        self._b = rng.integers(0, (1 << 61) - 1, num_perm, dtype=np.uint64)
+        self.capacity = capacity
+        self._signatures: Dict[int, np.ndarray] = {}
+        self._order: Deque[int] = deque()
+        self._buckets: List[Dict[bytes, Set[int]]] = [{} for _ in range(bands)]
+        self._next = 0
+
+    def signature(self, text: str) -> np.ndarray:
+        words = _WORD.findall(text.lower())
+        k = self.shingle
+        grams = [" ".join(words[i:i + k]) for i in range(max(1, len(words) - k + 1))]
+        hashes = np.fromiter((int.from_bytes(hashlib.blake2b(g.encode("utf-8"), digest_size=8).digest(), "little")
+                              for g in set(grams)), dtype=np.uint64)
+        hashes %= _MERSENNE
+        # (a*x + b) mod p per permutation; uint64 wraps, which keeps the hash family universal enough here
+        with np.errstate(over="ignore"):
+            perm = (hashes[:, None] * self._a[None, :] + self._b[None, :]) % _MERSENNE
+        return perm.min(axis=0)
+
+    def _bands(self, sig: np.ndarray) -> List[bytes]:
+        return [sig[i * self.rows:(i + 1) * self.rows].tobytes() for i in range(self.bands)]
+
+    def is_duplicate(self, text: str) -> bool:
+        """
+        True if text near-duplicates a kept item; otherwise remember it and return False.
+        """
+        sig = self.signature(text)
+        keys = self._bands(sig)
+        candidates: Set[int] = set()
+        for band, key in zip(self._buckets, keys):
+            candidates |= band.get(key, set())
+        for c in candidates:
+            if float(np.mean(self._signatures[c] == sig)) >= self.threshold:
+                return True
+
+        item_id = self._next
+        self._next += 1
+        self._signatures[item_id] = sig
+        self._order.append(item_id)
+        for band, key in zip(self._buckets, keys):
+            band.setdefault(key, set()).add(item_id)
+        if len(self._order) > self.capacity:
+            self._forget(self._order.popleft())
+        return False
+
+    def _forget(self, item_id: int) -> None:
+        sig = self._signatures.pop(item_id)
+        for band, key in zip(self._buckets, self._bands(sig)):
+            ids = band.get(key)
+            if ids is not None:
+                ids.discard(item_id)
+                if not ids:
+                    del band[key]
+
+
+# ---------- Ticker tagging ----------
+class AhoCorasick:
+    """
+    Multi-pattern matcher (Aho-Corasick automaton) built once; find() scans a text in one
+    pass regardless of how many patterns there are. Matches must sit on word boundaries.
+    """
+
+    def __init__(self, patterns: Dict[str, str]):
+        """
+        Args:
+            patterns: {pattern: value}; find() reports the value of every pattern found.
+        """
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._out: List[List[Tuple[int, str]]] = [[]]  # (pattern length, value)
+        for pat, value in patterns.items():
+            if not pat:
+                continue
+            node = 0
+            for ch in pat:
+                nxt = self._goto[node].get(ch)
+                if nxt is None:
+                    nxt = len(self._goto)
+                    self._goto[node][ch] = nxt
+                    self._goto.append({})
+                    self._fail.append(0)
+                    self._out.append([])
+                node = nxt
+            self._out[node].append((len(pat), value))
+
+        # Breadth-first failure links
+        queue = deque(self._goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for ch, nxt in self._goto[node].items():
+                queue.append(nxt)
+                f = self._fail[node]
+                while f and ch not in self._goto[f]:
+                    f = self._fail[f]
+                self._fail[nxt] = self._goto[f].get(ch, 0)
+                self._out[nxt] = self._out[nxt] + self._out[self._fail[nxt]]
+
+    def find(self, text: str) -> Set[str]:
+        found: Set[str] = set()
+        node, n = 0, len(text)
+        for i, ch in enumerate(text):
+            while node and ch not in self._goto[node]:
+                node = self._fail[node]
+            node = self._goto[node].get(ch, 0)
+            for length, value in self._out[node]:
+                start = i - length + 1
+                if (start == 0 or not text[start - 1].isalnum()) and (i + 1 == n or not text[i + 1].isalnum()):
+                    found.add(value)
+        return found
+
+
+def build_ticker_matcher(stock_lists: pd.DataFrame, min_bare_ticker: int = 3) -> Tuple[AhoCorasick, AhoCorasick]:
+    """
+    Two automata from the universe:
+      - case-insensitive (run on lowercased text): company names and $cashtags
+      - case-sensitive: bare upper-case tickers of at least min_bare_ticker characters
+        (short tickers like 'ON' or 'A' only match as cashtags)
+    Values are Yahoo symbols (normalize_ticker).
+    """
+    lower: Dict[str, str] = {}
+    upper: Dict[str, str] = {}
+    for tkr, name, mkt in stock_lists[["Ticker", "Name", "Market"]].itertuples(index=False):
+        sym = normalize_ticker(tkr, mkt)
+        t = str(tkr).strip()
+        lower["$" + t.lower()] = sym
+        if isinstance(name, str) and len(name.strip()) >= 3:
+            lower[name.strip().lower()] = sym
+        if len(t) >= min_bare_ticker:
+            upper[t.upper()] = sym
+    return AhoCorasick(lower), AhoCorasick(upper)
+
+
+# ---------- Index ----------
+class NewsIndex:
+    """
+    Streaming ingestion: dedup -> ticker tagging -> per-ticker rolling index.
+
+    - ingest(item) drops near-duplicates (MinHashDeduper), tags the item with every
+      universe symbol whose name / $cashtag / bare ticker appears in it, and appends it
+      to each symbol's rolling window (newest max_items_per_symbol, max_age old at most).
+    - Tagged items are also passed to every callable in subscribers (e.g.
+      influencers.InfluencerStudy.on_item).
+    - recent(symbol, n) / prompt_block(symbol) serve the forecasts; prompt_block packs
+      the newest items into a token budget (~4 characters per token).
+    """
+
+    def __init__(self, stock_lists: pd.DataFrame, max_items_per_symbol: int = 200,
+                 max_age: timedelta = timedelta(days=7), deduper: Optional[MinHashDeduper] = None):
+        self.max_items_per_symbol = max_items_per_symbol
+        self.max_age = max_age
+        self.deduper = deduper or MinHashDeduper()
+        self.by_symbol: Dict[str, Deque[NewsItem]] = {}
+        self.stats = {"ingested": 0, "duplicates": 0, "untagged": 0}
+        self.subscribers: List[Callable[[NewsItem], None]] = []
+        self.set_universe(stock_lists)
+
+    def set_universe(self, stock_lists: pd.DataFrame) -> None:
+        """
+        (Re)build the ticker matchers (call after stock_lists changes).
+        """
+        self._lower, self._upper = build_ticker_matcher(stock_lists)
+
+    def tag(self, text: str) -> List[str]:
+        return sorted(self._lower.find(text.lower()) | self._upper.find(text))
+
+    def ingest(self, item: NewsItem) -> bool:
+        """
+        Add one item; returns False when it was a duplicate or matched no symbol.
+        """
+        body = f"{item.title}\n{item.text}"
+        if self.deduper.is_duplicate(body):
+            self.stats["duplicates"] += 1
+            return False
+        item.symbols = self.tag(body)
+        if not item.symbols:
+            self.stats["untagged"] += 1
+            return False
+        self.stats["ingested"] += 1
+        for sym in item.symbols:
+            window = self.by_symbol.get(sym)
+            if window is None:
+                window = self.by_symbol[sym] = deque(maxlen=self.max_items_per_symbol)
+            if window and window[-1].time > item.time:
+                # Out-of-order arrival: insert by time (windows are small)
+                items = sorted(list(window) + [item], key=lambda x: x.time)
+                window.clear()
+                window.extend(items[-self.max_items_per_symbol:])
+            else:
+                window.append(item)
+        for cb in self.subscribers:
+            cb(item)
+        return True
+
+    async def run(self, source: NewsSource, max_items: Optional[int] = None) -> int:
+        """
+        Ingest a source until it ends (or max_items were read). Returns items read.
+        """
+        n = 0
+        async for item in source.items():
+            self.ingest(item)
+            n += 1
+            if max_items is not None and n >= max_items:
+                break
+        return n
+
+    def recent(self, symbol: str, n: int = 5, now: Optional[datetime] = None) -> List[NewsItem]:
+        """
+        Newest n items for a Yahoo symbol within max_age of now.
+        """
+        window = self.by_symbol.get(str(symbol).upper())
+        if not window:
+            return []
+        cutoff = (now or datetime.now()) - self.max_age
+        while window and window[0].time < cutoff:
+            window.popleft()
+        return list(window)[-n:][::-1]
+
+    def prompt_block(self, symbol: str, top_n: int = 5, token_budget: int = 400,
+                     now: Optional[datetime] = None) -> str:
+        """
+        '=== Recent News ===' section with the newest items that fit the token budget
+        (empty string when there is nothing to add).
+        """
+        lines: List[str] = []
+        used = 0
+        for it in self.recent(symbol, top_n, now):
+            line = f"- [{it.time:%Y-%m-%d %H:%M}] {it.title}" + (f" ({it.author})" if it.author else "")
+            if it.text:
+                line += f": {it.text[:280]}"
+            cost = len(line) // 4 + 1
+            if used + cost > token_budget:
+                break
+            lines.append(line)
+            used += cost
+        if not lines:
+            return ""
+        return "\n=== Recent News ===\n" + "\n".join(lines) + "\n"
@@ -0,0 +1,264 @@
+from datetime import datetime
+from typing import Optional, List, Tuple
+import numpy as np
+import pandas as pd
+from brokai.priceStore import PriceStore
+from brokai.symbolMaster import symbol_map
+
+METHODS = ("mean_variance", "risk_parity")
+
+# Daily variance assumed for names with no price history at all (~30% annual volatility)
+DEFAULT_DAILY_VARIANCE = 0.3 ** 2 / 252
+
+ALLOCATION_COLUMNS = [
+    "Stocks Name", "symbol", "portfolio split", "Confidence level",
+    "Stock volatility forecast", "expected_return", "volatility", "risk_contribution"
+]
+
+
+# ---------- Estimation ----------
+def shrunk_covariance(returns: np.ndarray) -> Tuple[np.ndarray, float]:
+    """
+    Ledoit-Wolf covariance: sample covariance shrunk towards a scaled identity.
+
+    Args:
+        returns: (T, N) daily returns; NaN (no trade that day) counts as a zero demeaned return.
+
+    Returns:
+        (cov (N, N), shrinkage intensity in [0, 1]).
+    """
+    x = np.asarray(returns, dtype="f8")
+    t, n = x.shape
+    if t < 2 or n == 0:
+        return np.zeros((n, n)), 1.0
+    x = np.nan_to_num(x - np.nanmean(x, axis=0), nan=0.0)
+    sample = x.T @ x / t
+    mu = np.trace(sample) / n
+    target = mu * np.eye(n)
+    d2 = np.sum((sample - target) ** 2)
+    # sum_t ||x_t x_t' - S||_F^2 = sum_t ||x_t||^4 - T ||S||_F^2
+    b2 = (np.sum(np.sum(x ** 2, axis=1) ** 2) - t * np.sum(sample ** 2)) / t ** 2
+    delta = 1.0 if d2 <= 0 else float(np.clip(b2 / d2, 0.0, 1.0))
+    return delta * target + (1.0 - delta) * sample, delta
+
+
+def filled_covariance(returns: np.ndarray, min_obs: int = 2) -> Tuple[np.ndarray, float]:
+    """
+    shrunk_covariance() for a return matrix that may hold names with too little history.
+
+    Columns with fewer than min_obs returns are left out of the estimate and get the
+    average variance of the other names (DEFAULT_DAILY_VARIANCE if there are none) and
+    no correlation, so the optimiser does not mistake them for riskless.
+    """
+    returns = np.array(returns, dtype="f8")
+    thin = (~np.isnan(returns)).sum(axis=0) < min_obs
+    if thin.any():
+        returns[:, thin] = 0.0
+    cov, delta = shrunk_covariance(returns)
+    if thin.any():
+        known = np.diag(cov)[~thin]
+        fill = known.mean() if known.size and known.mean() > 0 else DEFAULT_DAILY_VARIANCE
+        cov[thin, :] = 0.0
+        cov[:, thin] = 0.0
+        cov[np.flatnonzero(thin), np.flatnonzero(thin)] = fill
+    return cov, delta
+
+
+# ---------- Solvers ----------
+def project_capped_simplex(v: np.ndarray, cap: float = 1.0) -> np.ndarray:
+    """
+    Euclidean projection onto {w : sum w = 1, 0 <= w <= cap} (bisection on the shift).
+    """
+    n = v.size
+    cap = max(cap, 1.0 / n)
+    lo, hi = v.min() - cap, v.max()
+    for _ in range(100):
+        tau = 0.5 * (lo + hi)
+        if np.clip(v - tau, 0.0, cap).sum() > 1.0:
+            lo = tau
+        else:
+            hi = tau
+    w = np.clip(v - 0.5 * (lo + hi), 0.0, cap)
+    return w / w.sum()
+
+
+def mean_variance_weights(mu: np.ndarray, cov: np.ndarray, risk_aversion: float = 3.0,
+                          max_weight: float = 1.0, iters: int = 500, tol: float = 1e-10) -> np.ndarray:
+    """
+    Long-only mean-variance: maximise mu'w - (risk_aversion / 2) w'Cw with sum w = 1 and
+    w <= max_weight, by projected gradient ascent (step 1 / Lipschitz constant).
+    """
+    n = mu.size
+    step = 1.0 / max(risk_aversion * np.linalg.eigvalsh(cov)[-1], 1e-12)
+    w = np.full(n, 1.0 / n)
+    for _ in range(iters):
+        nxt = project_capped_simplex(w + step * (mu - risk_aversion * cov @ w), max_weight)
+        if np.abs(nxt - w).sum() < tol:
+            return nxt
+        w = nxt
+    return w
+
+
+def risk_parity_weights(cov: np.ndarray, budget: Optional[np.ndarray] = None,
+                        max_weight: float = 1.0, sweeps: int = 200, tol: float = 1e-10) -> np.ndarray:
+    """
+    Risk budgeting (equal risk contribution when budget is None) by cyclical coordinate
+    descent: each w_i solves C_ii w_i^2 + (C w - C_ii w_i)_i w_i = b_i in closed form.
+    The max_weight cap is applied afterwards (excess re-spread proportionally).
+    """
+    n = cov.shape[0]
+    b = np.full(n, 1.0 / n) if budget is None else np.asarray(budget, dtype="f8") / np.sum(budget)
+    diag = np.maximum(np.diag(cov), 1e-18)
+    w = 1.0 / np.sqrt(diag)
+    w /= w.sum()
+    for _ in range(sweeps):
+        prev = w.copy()
+        for i in range(n):
+            c = cov[i] @ w - diag[i] * w[i]
+            w[i] = (-c + np.sqrt(c * c + 4.0 * diag[i] * b[i])) / (2.0 * diag[i])
+        if np.abs(w - prev).sum() < tol * w.sum():
+            break
+    w /= w.sum()
+    if max_weight < 1.0:
+        w = project_capped_simplex(w, max_weight)
+    return w
+
+
+# ---------- Optimiser ----------
+class PortfolioOptimizer:
+    """
+    Deterministic allocation engine behind StockManagement.get_portfolio_invest.
+
+    Inputs:
+      - the latest StocksTable forecast per stock (forecast % move x confidence gives the
+        expected return over the horizon; only positive, confident views are eligible)
+      - a Ledoit-Wolf covariance of daily log returns from the local price store
+    Methods:
+      - "mean_variance": max expected return - risk_aversion/2 * variance (long-only)
+      - "risk_parity":   risk budgets proportional to confidence
+    Constraints: at most max_stocks names, min_confidence, optional max_weight per name.
+    All NumPy; a few hundred names solve in milliseconds, with no prompt-size limit.
+    """
+
+    def __init__(self, price_store: PriceStore, stock_lists: Optional[pd.DataFrame] = None,
+                 lookback_days: int = 365, risk_aversion: float = 3.0, risk_cache=None):
+        """
+        Args:
+            price_store: PriceStore with the daily bars.
+            stock_lists: universe [Ticker, Name, Market, ...] to resolve 'Stocks Name' to symbols.
+            lookback_days: calendar days of history for the covariance.
+            risk_aversion: mean-variance trade-off.
+            risk_cache: optional riskCache.RiskCache; its precomputed covariance is used
+                        whenever every chosen symbol is cached (window = its window_days).
+        """
+        self.price_store = price_store
+        self.stock_lists = stock_lists
+        self.lookback_days = lookback_days
+        self.risk_aversion = risk_aversion
+        self.risk_cache = risk_cache
+
+    @staticmethod
+    def latest_forecasts(stocks_table: pd.DataFrame, min_confidence: float = 0,
+                         sale_date: Optional[datetime] = None) -> pd.DataFrame:
+        """
+        Newest forecast row per 'Stocks Name' (by 'estimate forecast date'), optionally only
+        rows for one sale date (compared by day), with confidence >= min_confidence.
+        """
+        if stocks_table.empty:
+            return stocks_table
+        st = stocks_table
+        if sale_date is not None:
+            days = pd.to_datetime(st["Sale date"], errors="coerce").dt.normalize()
+            st = st[days == pd.Timestamp(sale_date).normalize()]
+        order = pd.to_datetime(st["estimate forecast date"], errors="coerce")
+        st = st.iloc[np.argsort(order.to_numpy(), kind="stable")].drop_duplicates("Stocks Name", keep="last")
+        conf = pd.to_numeric(st["Confidence level"], errors="coerce")
+        return st[conf >= min_confidence]
+
+    def covariance(self, symbols: List[str], fetch_missing: bool = False) -> Tuple[np.ndarray, float]:
+        """
+        Shrunk covariance of daily log returns for the symbols (lookback_days of history),
+        thin-history names filled as in filled_covariance(). Served from the risk cache
+        when it holds all symbols (built the same way; shrinkage reported as NaN).
+        """
+        if self.risk_cache is not None and self.risk_cache.markets():
+            cached = self.risk_cache.covariance(symbols)
+            if cached is not None:
+                return cached, float("nan")
+        start = np.datetime64("today", "D") - np.timedelta64(self.lookback_days, "D")
+        if fetch_missing:
+            for s in symbols:
+                self.price_store.ensure(s, start=start)
+        _, close = self.price_store.close_matrix(symbols, start=start)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            returns = np.diff(np.log(close), axis=0)
+        if returns.shape[0] == 0:
+            returns = np.full((0, len(symbols)), np.nan)
+        return filled_covariance(returns)
+
+    def allocate(self, stocks_table: pd.DataFrame, max_stocks: int = 5, min_confidence: float = 0,
+                 method: str = "mean_variance", sale_date: Optional[datetime] = None,
+                 max_weight: float = 1.0, fetch_missing: bool = False,
+                 horizon_days: Optional[int] = None) -> pd.DataFrame:
+        """
+        Weights for the latest forecasts.
+
+        Args:
+            stocks_table: StocksTable-shaped DataFrame.
+            max_stocks: cardinality limit (best expected returns are kept).
+            min_confidence: minimum 'Confidence level'.
+            method: "mean_variance" or "risk_parity".
+            sale_date: only use forecasts for this sale date (None = newest per stock).
+            max_weight: cap per name (fraction, e.g. 0.3).
+            fetch_missing: top up the price store for the chosen names first.
+            horizon_days: trading days the expected returns refer to; defaults to the
+                          business days until the forecasts' sale date (252 if unknown).
+
+        Returns:
+            DataFrame with ALLOCATION_COLUMNS ('portfolio split' in percent, rounded to 0.01),
+            sorted by weight; empty if nothing qualifies.
+        """
+        assert method in METHODS, f"method must be one of {METHODS}"
+        latest = self.latest_forecasts(stocks_table, min_confidence, sale_date)
+        if latest.empty:
+            return pd.DataFrame(columns=ALLOCATION_COLUMNS)
+
+        move = pd.to_numeric(latest["Stock volatility forecast"], errors="coerce").to_numpy(dtype="f8") / 100.0
+        conf = pd.to_numeric(latest["Confidence level"], errors="coerce").to_numpy(dtype="f8")
+        expected = np.nan_to_num(move) * conf / 100.0
+        keep = np.flatnonzero(expected > 0)  # long-only: positive views
+        keep = keep[np.argsort(-expected[keep], kind="stable")][:max_stocks]
+        if keep.size == 0:
+            return pd.DataFrame(columns=ALLOCATION_COLUMNS)
+        latest, expected, conf = latest.iloc[keep], expected[keep], conf[keep]
+
+        names = latest["Stocks Name"].astype(str).tolist()
+        sym_map = symbol_map(self.stock_lists, names)
+        symbols = [sym_map[n] for n in names]
+        daily_cov, _ = self.covariance(symbols, fetch_missing=fetch_missing)
+
+        if horizon_days is None:
+            sale = pd.to_datetime(latest["Sale date"], errors="coerce").max()
+            horizon_days = int(np.busday_count(np.datetime64("today", "D"), np.datetime64(sale.date()))) \
+                if pd.notna(sale) else 252
+        cov = daily_cov * max(horizon_days, 1)
+
+        if method == "mean_variance":
+            w = mean_variance_weights(expected, cov, self.risk_aversion, max_weight)
+        else:
+            w = risk_parity_weights(cov, budget=conf, max_weight=max_weight)
+
+        total_risk = float(w @ cov @ w)
+        contrib = w * (cov @ w) / total_risk if total_risk > 0 else np.zeros_like(w)
+        out = pd.DataFrame({
+            "Stocks Name": names,
+            "symbol": symbols,
+            "portfolio split": np.round(w * 100.0, 2),
+            "Confidence level": conf,
+            "Stock volatility forecast": latest["Stock volatility forecast"].to_numpy(),
+            "expected_return": expected,
+            "volatility": np.sqrt(np.diag(cov)),
+            "risk_contribution": contrib,
+        })
+        out = out[out["portfolio split"] > 0]
+        return out.sort_values("portfolio split", ascending=False, kind="stable").reset_index(drop=True)
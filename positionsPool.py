@@ -0,0 +1,159 @@
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+from typing import Optional, List, Tuple
+import numpy as np
+import pandas as pd
+
+# One row per trade, sorted by (client, ticker, trade_time); strings live in the parent
+TRADE_DTYPE = np.dtype([
+    ("client", "<i4"),   # index into the client list
+    ("ticker", "<i4"),   # index into the ticker list
+    ("buy", "?"),
+    ("qty", "<f8"),
+    ("price", "<f8"),
+])
+
+
+# ---------- Worker (picklable, reads trades from shared memory) ----------
+def _fifo_shard(args: Tuple) -> Tuple[np.ndarray, np.ndarray, Optional[Tuple[int, int]]]:
+    """
+    FIFO-match the rows [lo, hi) of the shared trade array.
+
+    args = (shm_name, n_rows, lo, hi)
+
+    Returns:
+        (groups, realized, oversold)
+          groups:   float64 (G, 4) -> client, ticker, open qty, open cost
+          realized: float64 (R, 4) -> trade row, qty_sold, proceeds, cost
+          oversold: (client, ticker) of the first SELL that exceeds its lots, or None
+
+    The arithmetic mirrors NewModelClientPortfolio._fifo_match step by step (same order
+    of float operations), so results are bit-identical to the serial path.
+    """
+    shm_name, n_rows, lo, hi = args
+    shm = shared_memory.SharedMemory(name=shm_name)  # the parent owns (and unlinks) the block
+    try:
+        rows = np.ndarray((n_rows,), dtype=TRADE_DTYPE, buffer=shm.buf)[lo:hi]
+        client, ticker = rows["client"].tolist(), rows["ticker"].tolist()
+        buy, qty, price = rows["buy"].tolist(), rows["qty"].tolist(), rows["price"].tolist()
+    finally:
+        shm.close()
+
+    groups: List[Tuple[float, float, float, float]] = []
+    realized: List[Tuple[float, float, float, float]] = []
+    i, n = 0, hi - lo
+    while i < n:
+        c, t = client[i], ticker[i]
+        lots: List[List[float]] = []  # [qty, price]
+        while i < n and client[i] == c and ticker[i] == t:
+            if buy[i]:
+                lots.append([qty[i], price[i]])
+            else:
+                qty_to_match = qty[i]
+                proceeds = qty[i] * price[i]
+                matched_cost = 0.0
+                sold_qty_total = 0.0
+                while qty_to_match > 1e-12 and lots:
+                    lot = lots[0]
+                    take = min(qty_to_match, lot[0])
+                    matched_cost += take * lot[1]
+                    sold_qty_total += take
+                    lot[0] -= take
+                    qty_to_match -= take
+                    if lot[0] <= 1e-12:
+                        lots.pop(0)
+                if qty_to_match > 1e-12:
+                    return np.empty((0, 4)), np.empty((0, 4)), (c, t)
+                realized.append((lo + i, sold_qty_total, proceeds, matched_cost))
+            i += 1
+        open_qty = float(sum(l[0] for l in lots)) if lots else 0.0
+        open_cost = float(sum(l[0] * l[1] for l in lots)) if open_qty > 0 else 0.0
+        groups.append((c, t, open_qty, open_cost))
+
+    return (np.asarray(groups, dtype="f8").reshape(-1, 4),
+            np.asarray(realized, dtype="f8").reshape(-1, 4), None)
+
+
+# ---------- Parent ----------
+def _shard_bounds(client: np.ndarray, shards: int) -> List[Tuple[int, int]]:
+    """
+    Split sorted rows into at most `shards` contiguous ranges of ~equal size that never
+    cut a client in two.
+    """
+    n = client.size
+    starts = np.flatnonzero(np.r_[True, client[1:] != client[:-1]])  # first row of each client
+    targets = np.linspace(0, n, shards + 1)[1:-1]
+    cuts = np.unique(starts[np.clip(np.searchsorted(starts, targets), 0, starts.size - 1)])
+    edges = [0] + [int(c) for c in cuts if 0 < c < n] + [n]
+    return [(a, b) for a, b in zip(edges[:-1], edges[1:]) if b > a]
+
+
+def parallel_fifo(trades: pd.DataFrame, workers: int = 4,
+                  shards_per_worker: int = 4) -> Tuple[pd.DataFrame, pd.DataFrame]:
+    """
+    FIFO-match every (client_id, ticker) of `trades` on a process pool.
+
+    Trades are sorted like the serial path (groupby order, then stable by trade_time),
+    encoded as one TRADE_DTYPE array in shared memory and matched in client-aligned
+    shards; workers only return small float arrays.
+
+    Returns:
+        (groups, realized)
+          groups:   [client_id, ticker, market, qty, total_cost] in (client_id, ticker) order
+          realized: realized-ledger rows in the serial path's order
+
+    Raises:
+        ValueError if a SELL exceeds available BUY quantity (same message as _fifo_match).
+    """
+    df = trades.sort_values(["client_id", "ticker", "trade_time"], kind="stable").reset_index(drop=True)
+    clients, client_codes = np.unique(df["client_id"].to_numpy(), return_inverse=True)
+    tickers, ticker_codes = np.unique(df["ticker"].to_numpy(), return_inverse=True)
+
+    arr = np.empty(len(df), dtype=TRADE_DTYPE)
+    arr["client"], arr["ticker"] = client_codes, ticker_codes
+    arr["buy"] = (df["side"] == "BUY").to_numpy()
+    arr["qty"], arr["price"] = df["qty"].to_numpy(dtype="f8"), df["price"].to_numpy(dtype="f8")
+
+    shm = shared_memory.SharedMemory(create=True, size=max(arr.nbytes, 1))
+    try:
+        np.ndarray(arr.shape, dtype=TRADE_DTYPE, buffer=shm.buf)[:] = arr
+        bounds = _shard_bounds(arr["client"], max(1, workers * shards_per_worker))
+        jobs = [(shm.name, arr.size, lo, hi) for lo, hi in bounds]
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            results = list(pool.map(_fifo_shard, jobs))
+    finally:
+        shm.close()
+        shm.unlink()
+
+    for _, _, oversold in results:  # shards are in client order: first failure = serial's
+        if oversold is not None:
+            c, t = oversold
+            raise ValueError(f"SELL exceeds available FIFO buys for {tickers[t]} (client {clients[c]}).")
+
+    g = np.concatenate([r[0] for r in results]) if results else np.empty((0, 4))
+    r = np.concatenate([r[1] for r in results]) if results else np.empty((0, 4))
+    gc, gt = g[:, 0].astype(np.intp), g[:, 1].astype(np.intp)
+    # Latest market label per (client, ticker), as in the serial path (original row order)
+    last_market = (trades.drop_duplicates(["client_id", "ticker"], keep="last")
+                   .set_index(["client_id", "ticker"])["market"])
+    groups = pd.DataFrame({
+        "client_id": clients[gc],
+        "ticker": tickers[gt],
+        "market": [last_market[(c, t)] for c, t in zip(clients[gc], tickers[gt])],
+        "qty": g[:, 2],
+        "total_cost": g[:, 3],
+    })
+
+    rows = r[:, 0].astype(np.intp)
+    sold = df.iloc[rows]
+    realized = pd.DataFrame({
+        "client_id": sold["client_id"].to_numpy(),
+        "ticker": sold["ticker"].to_numpy(),
+        "market": sold["market"].to_numpy(),
+        "trade_time": sold["trade_time"].to_numpy(),
+        "qty_sold": r[:, 1],
+        "proceeds": r[:, 2],
+        "cost": r[:, 3],
+        "realized_pnl": r[:, 2] - r[:, 3],
+    })
+    return groups, realized
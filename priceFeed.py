@@ -0,0 +1,295 @@
+from abc import ABC, abstractmethod
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Optional, List, Dict, Callable, AsyncIterator, Iterable
+import numpy as np
+import asyncio
+import json
+from brokai.client import latest_close_yf
+
+
+# ---------- Data model ----------
+@dataclass
+class Tick:
+    """
+    One price update.
+    - symbol: Yahoo symbol (e.g. 'AAPL', 'TEVA.TA')
+    - price: last traded/delayed price
+    - time: timestamp of the update
+    """
+    symbol: str
+    price: float
+    time: datetime
+
+
+# ---------- Sources ----------
+class PriceSource(ABC):
+    """
+    Pluggable tick source. Subclasses implement ticks() as an async generator.
+    """
+
+    @abstractmethod
+    def ticks(self) -> AsyncIterator[Tick]:
+        ...
+
+
+class ReplayFileSource(PriceSource):
+    """
+    Replay ticks recorded as JSONL lines: {"symbol": ..., "price": ..., "time": ISO-8601}.
+
+    speed=0 replays as fast as possible (tests); speed=1 keeps the recorded gaps,
+    speed=10 plays 10x faster.
+    """
+
+    def __init__(self, path: str, speed: float = 0.0):
+        self.path = path
+        self.speed = speed
+
+    async def ticks(self) -> AsyncIterator[Tick]:
+        prev: Optional[datetime] = None
+        with open(self.path, "r", encoding="utf-8") as fh:
+            for line in fh:
+                line = line.strip()
+                if not line:
+                    continue
+                rec = json.loads(line)
+                tick = Tick(str(rec["symbol"]).upper(), float(rec["price"]),
+                            datetime.fromisoformat(rec["time"]))
+                if self.speed > 0 and prev is not None:
+                    gap = (tick.time - prev).total_seconds() / self.speed
+                    if gap > 0:
+                        await asyncio.sleep(gap)
+                prev = tick.time
+                yield tick
+
+
+class YahooPollingSource(PriceSource):
+    """
+    Poll Yahoo (latest_close_yf) for a fixed symbol list every `interval` seconds and
+    emit a tick only when the price changed. Blocking yfinance calls run in a thread.
+    """
+
+    def __init__(self, symbols: Iterable[str], interval: float = 60.0, rounds: Optional[int] = None):
+        self.symbols = [str(s).upper() for s in symbols]
+        self.interval = interval
+        self.rounds = rounds  # None = forever
+        self._last: Dict[str, float] = {}
+
+    async def ticks(self) -> AsyncIterator[Tick]:
+        done = 0
+        while self.rounds is None or done < self.rounds:
+            for sym in self.symbols:
+                px = await asyncio.to_thread(latest_close_yf, sym)
+                if px is not None and np.isfinite(px) and self._last.get(sym) != px:
+                    self._last[sym] = px
+                    yield Tick(sym, px, datetime.now())  # naive local, like the alert engine
+            done += 1
+            if self.rounds is None or done < self.rounds:
+                await asyncio.sleep(self.interval)
+
+
+async def record_ticks(source: PriceSource, path: str, limit: Optional[int] = None) -> int:
+    """
+    Write ticks from any source to a JSONL file that ReplayFileSource can replay later.
+    Returns the number of ticks written.
+    """
+    n = 0
+    with open(path, "a", encoding="utf-8") as fh:
+        async for tick in source.ticks():
+            fh.write(json.dumps({"symbol": tick.symbol, "price": tick.price,
+                                 "time": tick.time.isoformat()}) + "\n")
+            n += 1
+            if limit is not None and n >= limit:
+                break
+    return n
+
+
+# ---------- Incremental mark-to-market ----------
+class MarkToMarket:
+    """
+    Latest price per symbol in a compact float array plus a symbol -> holders index,
+    so a tick only touches the clients that hold that symbol (O(holders)).
+
+    State:
+      - prices[slot]        : last price per symbol (NaN until the first tick)
+      - holders[slot]       : (client index array, qty array) for open positions
+      - market_value[c]     : per-client sum(qty * last price)
+      - cost_basis[c]       : per-client FIFO cost of open lots
+      - unrealized(c)       : market_value - cost_basis (same definition as compute_positions)
+
+    Positions are loaded once from the FIFO engine (load_portfolio / refresh_client);
+    ticks never call compute_positions.
+    """
+
+    def __init__(self, capacity: int = 256):
+        self.symbol_slot: Dict[str, int] = {}
+        self.prices = np.full(capacity, np.nan)
+        self.holders: Dict[int, List[np.ndarray]] = {}
+
+        self.client_index: Dict[str, int] = {}
+        self.client_ids: List[str] = []
+        self.market_value = np.zeros(capacity)
+        self.cost_basis = np.zeros(capacity)
+
+        # Per-client open quantities (client -> {slot: qty}); used to rebuild holders on refresh
+        self._client_qty: Dict[int, Dict[int, float]] = {}
+        self.listeners: List[Callable[[str, float, float], None]] = []
+
+    # ---------- Slots ----------
+    def _slot(self, symbol: str) -> int:
+        symbol = str(symbol).upper()
+        slot = self.symbol_slot.get(symbol)
+        if slot is None:
+            slot = len(self.symbol_slot)
+            self.symbol_slot[symbol] = slot
+            if slot >= self.prices.size:
+                self.prices = np.concatenate([self.prices, np.full(self.prices.size, np.nan)])
+        return slot
+
+    def _client(self, client_id: str) -> int:
+        idx = self.client_index.get(client_id)
+        if idx is None:
+            idx = len(self.client_ids)
+            self.client_index[client_id] = idx
+            self.client_ids.append(client_id)
+            if idx >= self.market_value.size:
+                self.market_value = np.concatenate([self.market_value, np.zeros(self.market_value.size)])
+                self.cost_basis = np.concatenate([self.cost_basis, np.zeros(self.cost_basis.size)])
+        return idx
+
+    def _rebuild_holders(self, slot: int) -> None:
+        pairs = [(c, q[slot]) for c, q in self._client_qty.items() if q.get(slot, 0.0) > 1e-12]
+        if pairs:
+            self.holders[slot] = [np.array([p[0] for p in pairs], dtype=np.int64),
+                                  np.array([p[1] for p in pairs], dtype="f8")]
+        else:
+            self.holders.pop(slot, None)
+
+    # ---------- Positions ----------
+    def set_client_positions(self, client_id: str, positions: Dict[str, Dict[str, float]]) -> None:
+        """
+        Replace one client's open positions: {ticker: {"qty": q, "cost_basis": c}}.
+        Market value is recomputed only for this client from the current price array.
+        """
+        c = self._client(client_id)
+        old_slots = set(self._client_qty.get(c, {}))
+        new_qty = {self._slot(t): float(p["qty"]) for t, p in positions.items() if p["qty"] > 1e-12}
+        self._client_qty[c] = new_qty
+        self.cost_basis[c] = float(sum(p["cost_basis"] for p in positions.values() if p["qty"] > 1e-12))
+        px = np.nan_to_num(self.prices)
+        self.market_value[c] = float(sum(q * px[s] for s, q in new_qty.items()))
+        for slot in old_slots | set(new_qty):
+            self._rebuild_holders(slot)
+
+    def refresh_client(self, portfolio, client_id: str) -> None:
+        """
+        Re-read one client's split-adjusted open lots from the FIFO engine (call after a trade).
+        """
+        holdings = portfolio.open_holdings(client_id)
+        positions = {tkr: {"qty": qty, "cost_basis": cost}
+                     for tkr, qty, cost in holdings[["ticker", "qty", "cost_basis"]].itertuples(index=False)}
+        self.set_client_positions(client_id, positions)
+
+    def load_portfolio(self, portfolio, client_ids: Optional[List[str]] = None) -> None:
+        """
+        Initial load for many clients (default: every client in portfolio.trades).
+        """
+        if client_ids is None:
+            client_ids = sorted(portfolio.trades["client_id"].unique().tolist())
+        for cid in client_ids:
+            self.refresh_client(portfolio, cid)
+
+    # ---------- Ticks ----------
+    def apply_tick(self, symbol: str, price: float) -> List[str]:
+        """
+        Update one symbol's price and push qty * delta into each holder's market value.
+        Returns the client ids whose unrealized PnL changed.
+
+        Raises:
+            ValueError for a NaN/inf price (it would poison every holder's running sum).
+        """
+        if not np.isfinite(price):
+            raise ValueError(f"Non-finite price {price!r} for {symbol}.")
+        slot = self._slot(symbol)
+        old = self.prices[slot]
+        self.prices[slot] = price
+        h = self.holders.get(slot)
+        if h is None:
+            return []
+        delta = price - (0.0 if np.isnan(old) else old)
+        if delta == 0.0:
+            return []
+        clients, qty = h
+        np.add.at(self.market_value, clients, qty * delta)
+        changed = [self.client_ids[i] for i in clients]
+        for cid, i, d in zip(changed, clients, qty * delta):
+            for cb in self.listeners:
+                cb(cid, float(self.market_value[i] - self.cost_basis[i]), float(d))
+        return changed
+
+    def price(self, symbol: str) -> Optional[float]:
+        slot = self.symbol_slot.get(str(symbol).upper())
+        if slot is None or np.isnan(self.prices[slot]):
+            return None
+        return float(self.prices[slot])
+
+    def unrealized(self, client_id: str) -> float:
+        c = self.client_index[client_id]
+        return float(self.market_value[c] - self.cost_basis[c])
+
+    def snapshot(self) -> Dict[str, Dict[str, float]]:
+        """
+        {client_id: {"market_value", "cost_basis", "unrealized_pnl"}} for every loaded client.
+        """
+        n = len(self.client_ids)
+        mv, cb = self.market_value[:n], self.cost_basis[:n]
+        return {cid: {"market_value": round(float(mv[i]), 2),
+                      "cost_basis": round(float(cb[i]), 2),
+                      "unrealized_pnl": round(float(mv[i] - cb[i]), 2)}
+                for i, cid in enumerate(self.client_ids)}
+
+
+# ---------- Feed runner ----------
+class PriceFeed:
+    """
+    Glue: consume a PriceSource in the event loop and apply each tick to MarkToMarket.
+
+    Usage:
+        mtm = MarkToMarket(); mtm.load_portfolio(portfolio)
+        feed = PriceFeed(mtm)            # or PriceFeed(mtm, alerts=AlertEngine(...))
+        asyncio.run(feed.run(ReplayFileSource("ticks.jsonl")))
+    """
+
+    def __init__(self, mtm: MarkToMarket, alerts=None):
+        """
+        Args:
+            mtm: MarkToMarket to update.
+            alerts: optional alerts.AlertEngine evaluated on every tick.
+        """
+        self.mtm = mtm
+        self.alerts = alerts
+        self.ticks_applied = 0
+        self.ticks_rejected = 0  # NaN/inf prices skipped
+        self._stop = asyncio.Event()
+
+    def stop(self) -> None:
+        self._stop.set()
+
+    async def run(self, source: PriceSource, max_ticks: Optional[int] = None) -> int:
+        """
+        Apply ticks until the source ends, stop() is called or max_ticks is reached.
+        Returns the number of ticks applied in this run.
+        """
+        n = 0
+        async for tick in source.ticks():
+            if not np.isfinite(tick.price):
+                self.ticks_rejected += 1
+                continue
+            self.mtm.apply_tick(tick.symbol, tick.price)
+            if self.alerts is not None:
+                self.alerts.on_tick(tick.symbol, tick.price, tick.time)
+            n += 1
+            self.ticks_applied += 1
+            if self._stop.is_set() or (max_ticks is not None and n >= max_ticks):
+                break
+        return n
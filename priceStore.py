@@ -0,0 +1,330 @@
+from datetime import datetime, date
+from typing import Optional, Dict, List, Callable, Tuple
+import numpy as np
+import pandas as pd
+import tempfile
+import threading
+import os
+
+# One row per trading day. Stored as a structured .npy file per symbol so a read can
+# memory-map the file and hand back slices without copying.
+BAR_DTYPE = np.dtype([
+    ("date", "<M8[D]"),
+    ("open", "<f8"),
+    ("high", "<f8"),
+    ("low", "<f8"),
+    ("close", "<f8"),
+    ("volume", "<f8"),
+])
+
+
+# ---------- Helpers ----------
+def _to_day(value) -> np.datetime64:
+    """
+    Convert a date/datetime/string/Timestamp into a numpy day (datetime64[D]).
+    """
+    if isinstance(value, np.datetime64):
+        return value.astype("datetime64[D]")
+    return np.datetime64(pd.Timestamp(value).date(), "D")
+
+
+def yahoo_daily_bars(symbol: str, start: np.datetime64, end: np.datetime64) -> np.ndarray:
+    """
+    Download daily OHLCV bars from Yahoo for [start, end] (inclusive) and return them
+    as a BAR_DTYPE array sorted by date. Returns an empty array if Yahoo has nothing.
+    """
+    import yfinance as yf
+
+    hist = yf.Ticker(symbol).history(
+        start=str(start), end=str(end + np.timedelta64(1, "D")),
+        interval="1d", auto_adjust=False
+    )
+    if not isinstance(hist, pd.DataFrame) or hist.empty:
+        return np.empty(0, dtype=BAR_DTYPE)
+
+    idx = hist.index
+    if getattr(idx, "tz", None) is not None:
+        idx = idx.tz_localize(None)
+
+    bars = np.empty(len(hist), dtype=BAR_DTYPE)
+    bars["date"] = idx.normalize().values.astype("datetime64[D]")
+    for col in ("open", "high", "low", "close", "volume"):
+        bars[col] = hist[col.capitalize()].to_numpy(dtype="f8")
+    return bars[np.argsort(bars["date"], kind="stable")]
+
+
+# A re-fetched overlap bar whose close moved by more than this ratio means Yahoo re-based
+# the history (split), so the stored bars are in a stale share basis
+SPLIT_TOLERANCE = 0.02
+
+
+# ---------- Store ----------
+class PriceStore:
+    """
+    Local daily OHLCV database, one memory-mapped columnar file per Yahoo symbol.
+
+    Layout:
+      • <root>/<SYMBOL>.npy -> structured array (date, open, high, low, close, volume)
+
+    Reads go through np.load(mmap_mode="r") and return slices of the mapped file, so
+    asking for (symbol, date range) never copies the bars. Top-ups only download the
+    date ranges that are missing before the first or after the last stored bar.
+
+    Share basis: Yahoo closes are split-adjusted as of the download, so every tail top-up
+    re-fetches the last stored bar; when its close no longer matches (a split since the
+    previous download) the symbol's whole history is downloaded again. All bars of a file
+    are therefore in the share basis of its last write, see basis_day().
+
+    Writes are serialised per symbol (JobQueue threads may top up the same symbol) and go
+    through a unique temp file + os.replace.
+
+    Symbols are expected in Yahoo form (e.g. 'AAPL', 'TEVA.TA'); see normalize_ticker().
+    """
+
+    def __init__(self, root: str = "price_store",
+                 fetcher: Optional[Callable[[str, np.datetime64, np.datetime64], np.ndarray]] = None,
+                 default_history_days: int = 3 * 365,
+                 tail_refresh_seconds: int = 15 * 60):
+        """
+        Args:
+            root: folder holding the per-symbol .npy files (created if missing).
+            fetcher: callable(symbol, start_day, end_day) -> BAR_DTYPE array.
+                     Defaults to Yahoo; pass your own for offline replays.
+            default_history_days: how far back the first fetch of a new symbol goes.
+            tail_refresh_seconds: minimum gap between two tail checks of the same symbol.
+        """
+        self.root = root
+        self.fetcher = fetcher or yahoo_daily_bars
+        self.default_history_days = default_history_days
+        self.tail_refresh_seconds = tail_refresh_seconds
+        os.makedirs(self.root, exist_ok=True)
+
+        # Open memory maps (symbol -> ndarray) and the last time we asked Yahoo per symbol
+        self._maps: Dict[str, np.ndarray] = {}
+        self._checked: Dict[str, datetime] = {}
+        self._locks: Dict[str, threading.Lock] = {}
+        self._locks_guard = threading.Lock()
+        # Bumped on every write (cache keys / HTTP ETags build on it)
+        self.version = 0
+
+    # ---------- Paths ----------
+    def _path(self, symbol: str) -> str:
+        safe = str(symbol).strip().upper().replace("/", "_").replace("\\", "_")
+        return os.path.join(self.root, f"{safe}.npy")
+
+    # ---------- Raw access ----------
+    def bars(self, symbol: str) -> np.ndarray:
+        """
+        Return every stored bar for a symbol as a read-only memory map
+        (empty array if the symbol was never fetched).
+        """
+        key = str(symbol).strip().upper()
+        if key in self._maps:
+            return self._maps[key]
+        path = self._path(key)
+        if not os.path.exists(path):
+            return np.empty(0, dtype=BAR_DTYPE)
+        arr = np.load(path, mmap_mode="r")
+        self._maps[key] = arr
+        return arr
+
+    def _lock(self, key: str) -> threading.Lock:
+        with self._locks_guard:
+            lock = self._locks.get(key)
+            if lock is None:
+                lock = self._locks[key] = threading.Lock()
+            return lock
+
+    def _write(self, symbol: str, bars: np.ndarray) -> None:
+        """
+        Atomically replace the symbol file (unique tmp file + os.replace) and drop the stale map.
+        """
+        key = str(symbol).strip().upper()
+        self._maps.pop(key, None)
+        path = self._path(key)
+        with tempfile.NamedTemporaryFile(dir=self.root, prefix=os.path.basename(path), suffix=".tmp",
+                                         delete=False) as fh:
+            np.save(fh, np.ascontiguousarray(bars, dtype=BAR_DTYPE))
+        os.replace(fh.name, path)
+        self.version += 1
+
+    # ---------- Reads ----------
+    def read(self, symbol: str, start=None, end=None) -> np.ndarray:
+        """
+        Zero-copy read of the stored bars for symbol within [start, end] (inclusive).
+        Returns a view into the memory map; use read(...)["close"] for a column view.
+
+        Does not go to the network — call ensure() first if you need the range filled.
+        """
+        arr = self.bars(symbol)
+        if arr.size == 0:
+            return arr
+        lo = 0 if start is None else int(np.searchsorted(arr["date"], _to_day(start), side="left"))
+        hi = arr.size if end is None else int(np.searchsorted(arr["date"], _to_day(end), side="right"))
+        return arr[lo:hi]
+
+    def frame(self, symbol: str, start=None, end=None) -> pd.DataFrame:
+        """
+        Same as read() but as a DataFrame indexed by date (this one copies — use it at the edges).
+        """
+        bars = self.read(symbol, start, end)
+        df = pd.DataFrame({c: np.asarray(bars[c]) for c in ("open", "high", "low", "close", "volume")},
+                          index=pd.DatetimeIndex(np.asarray(bars["date"]), name="date"))
+        return df.rename(columns=str.capitalize)
+
+    def latest_close(self, symbol: str, as_of=None) -> Optional[float]:
+        """
+        Latest stored close on or before as_of (default: all data). None if nothing stored.
+        """
+        bars = self.read(symbol, end=as_of)
+        if bars.size == 0:
+            return None
+        closes = bars["close"]
+        valid = np.flatnonzero(~np.isnan(closes))
+        return float(closes[valid[-1]]) if valid.size else None
+
+    def basis_day(self, symbol: str) -> Optional[np.datetime64]:
+        """
+        Day the symbol's bars were last written: its closes are split-adjusted as of this
+        day (restate trades with corporate actions up to it, not up to a query's end).
+        None if the symbol was never fetched.
+        """
+        path = self._path(symbol)
+        if not os.path.exists(path):
+            return None
+        return _to_day(datetime.fromtimestamp(os.path.getmtime(path)))
+
+    def last_date(self, symbol: str) -> Optional[date]:
+        """
+        Date of the last stored bar for a symbol, or None.
+        """
+        arr = self.bars(symbol)
+        return None if arr.size == 0 else arr["date"][-1].astype(date)
+
+    # ---------- Incremental top-up ----------
+    def ensure(self, symbol: str, start=None, end=None) -> int:
+        """
+        Make sure [start, end] is covered locally, downloading only the missing edges.
+
+        Args:
+            symbol: Yahoo symbol (e.g. 'AAPL', 'TEVA.TA').
+            start: first day needed; defaults to today - default_history_days for new symbols.
+            end: last day needed; defaults to today.
+
+        Returns:
+            Number of new bars written (every bar when a split forced a full re-download).
+
+        Notes:
+            - The tail is re-checked at most once per tail_refresh_seconds per symbol, so
+              repeated calls in a loop do not hit Yahoo again. Today's (partial) bar is
+              re-downloaded on each tail check so it converges to the final close.
+            - The tail check also re-fetches the last completed bar; if its close moved by
+              more than SPLIT_TOLERANCE the whole history is downloaded again.
+            - Network errors are swallowed (the store keeps what it has), like latest_close_yf.
+        """
+        key = str(symbol).strip().upper()
+        with self._lock(key):
+            return self._ensure(key, start, end)
+
+    def _ensure(self, key: str, start, end) -> int:
+        now = datetime.now()
+        today = _to_day(now)
+        end_d = min(_to_day(end), today) if end is not None else today
+        arr = self.bars(key)
+
+        checked = self._checked.get(key)
+        tail_due = checked is None or (now - checked).total_seconds() >= self.tail_refresh_seconds
+
+        missing: List[Tuple[np.datetime64, np.datetime64]] = []
+        overlap = None  # last completed stored bar, re-fetched with the tail as a split check
+        if arr.size == 0:
+            start_d = _to_day(start) if start is not None else today - np.timedelta64(self.default_history_days, "D")
+            if tail_due:
+                missing.append((start_d, end_d))
+        else:
+            first, last = arr["date"][0], arr["date"][-1]
+            if start is not None and _to_day(start) < first:
+                missing.append((_to_day(start), first - np.timedelta64(1, "D")))
+            if tail_due and (end_d > last or last == today):
+                if last != today:
+                    overlap = arr.size - 1
+                elif arr.size > 1:
+                    overlap = arr.size - 2
+                tail_start = arr["date"][overlap] if overlap is not None else last
+                missing.append((tail_start, end_d))
+
+        new_parts = []
+        for lo, hi in missing:
+            if lo > hi:
+                continue
+            try:
+                part = self.fetcher(key, lo, hi)
+            except Exception:
+                part = np.empty(0, dtype=BAR_DTYPE)
+            if part.size:
+                new_parts.append(part)
+        if tail_due and end_d == today:
+            self._checked[key] = now
+
+        if not new_parts:
+            return 0
+
+        if overlap is not None and self._rebased(arr[overlap], new_parts[-1]):
+            # Split since the last download: the stored bars are in the old share basis
+            lo = min(arr["date"][0], _to_day(start)) if start is not None else arr["date"][0]
+            try:
+                full = self.fetcher(key, lo, end_d)
+            except Exception:
+                full = np.empty(0, dtype=BAR_DTYPE)
+            if full.size:
+                self._write(key, full)
+                return int(full.size)
+
+        merged = np.concatenate([np.asarray(arr, dtype=BAR_DTYPE)] + new_parts)
+        merged = merged[np.argsort(merged["date"], kind="stable")]
+        # Keep the newest copy of any day that was fetched twice (e.g. today's partial bar)
+        keep = np.ones(merged.size, dtype=bool)
+        keep[:-1] = merged["date"][1:] != merged["date"][:-1]
+        merged = merged[keep]
+        added = merged.size - arr.size
+        self._write(key, merged)
+        return int(added)
+
+    @staticmethod
+    def _rebased(stored: np.void, tail: np.ndarray) -> bool:
+        """
+        True when the re-fetched copy of a stored bar closes at a different level (split).
+        """
+        again = tail[tail["date"] == stored["date"]]
+        if again.size == 0 or not (np.isfinite(stored["close"]) and stored["close"] > 0):
+            return False
+        ratio = float(again["close"][-1]) / float(stored["close"])
+        return np.isfinite(ratio) and abs(ratio - 1.0) > SPLIT_TOLERANCE
+
+    def top_up_all(self, symbols: List[str]) -> Dict[str, int]:
+        """
+        Daily top-up for a universe: ensure() each symbol up to today.
+        Returns {symbol: new_bars}.
+        """
+        return {s: self.ensure(s) for s in symbols}
+
+    # ---------- Backtesting helpers ----------
+    def close_matrix(self, symbols: List[str], start=None, end=None,
+                     field: str = "close") -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Align one OHLCV field for many symbols on the union of their trading days.
+
+        Returns:
+            (dates, matrix) where dates is datetime64[D] of shape (T,) and matrix is
+            float64 of shape (T, len(symbols)); days a symbol did not trade are NaN.
+        """
+        slices = [self.read(s, start, end) for s in symbols]
+        non_empty = [b["date"] for b in slices if b.size]
+        if not non_empty:
+            return np.empty(0, dtype="datetime64[D]"), np.empty((0, len(symbols)))
+        dates = np.unique(np.concatenate(non_empty))
+        matrix = np.full((dates.size, len(symbols)), np.nan)
+        for j, b in enumerate(slices):
+            if b.size:
+                matrix[np.searchsorted(dates, b["date"]), j] = b[field]
+        return dates, matrix
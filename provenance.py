@@ -0,0 +1,156 @@
+from datetime import datetime
+from typing import Optional, Dict, List, Any, Union
+import hashlib
+import json
+import os
+import zlib
+
+# Template files are re-hashed only when their modification time changes
+_TEMPLATE_VERSIONS: Dict[str, tuple] = {}
+
+
+def template_version(path: str) -> Optional[str]:
+    """
+    Short content hash of a prompt template file (None if it does not exist).
+    """
+    try:
+        mtime = os.path.getmtime(path)
+    except OSError:
+        return None
+    hit = _TEMPLATE_VERSIONS.get(path)
+    if hit is None or hit[0] != mtime:
+        with open(path, "rb") as fh:
+            hit = (mtime, hashlib.sha256(fh.read()).hexdigest()[:16])
+        _TEMPLATE_VERSIONS[path] = hit
+    return hit[1]
+
+
+class ProvenanceStore:
+    """
+    Content-addressed record of why each forecast / deep-look row says what it says.
+
+    Layout under root:
+      • blobs/<h[:2]>/<h>.z -> zlib-compressed bytes, h = sha256 of the uncompressed bytes
+      • index.jsonl         -> one line per record: {serial, kind, symbol, record, time}
+
+    - Every text part (grounding block, filled prompt, raw response) is a blob, so a
+      grounding block shared by many rows is stored once; the record itself is a JSON
+      blob pointing at its parts (template path + version, parsed fields), and its hash
+      is the record id.
+    - The index is append-only and loaded once into {serial: [entries]}, so looking up
+      the provenance of a Serial number is a dict hit plus one blob read per record.
+    """
+
+    def __init__(self, root: str = "provenance", level: int = 6):
+        self.root = root
+        self.level = level
+        os.makedirs(os.path.join(root, "blobs"), exist_ok=True)
+        self._index_path = os.path.join(root, "index.jsonl")
+        self._by_serial: Optional[Dict[str, List[Dict[str, Any]]]] = None
+        self.stats = {"blobs_written": 0, "blobs_deduped": 0}
+
+    # ---------- Blobs ----------
+    def _blob_path(self, h: str) -> str:
+        return os.path.join(self.root, "blobs", h[:2], f"{h}.z")
+
+    def put_blob(self, data: Union[str, bytes]) -> str:
+        """
+        Store bytes (str is UTF-8 encoded) once; returns their sha256 hex digest.
+        """
+        raw = data.encode("utf-8") if isinstance(data, str) else bytes(data)
+        h = hashlib.sha256(raw).hexdigest()
+        path = self._blob_path(h)
+        if os.path.exists(path):
+            self.stats["blobs_deduped"] += 1
+            return h
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp = f"{path}.{os.getpid()}.tmp"
+        with open(tmp, "wb") as fh:
+            fh.write(zlib.compress(raw, self.level))
+        os.replace(tmp, path)
+        self.stats["blobs_written"] += 1
+        return h
+
+    def get_blob(self, h: str) -> bytes:
+        with open(self._blob_path(h), "rb") as fh:
+            return zlib.decompress(fh.read())
+
+    # ---------- Index ----------
+    def _index(self) -> Dict[str, List[Dict[str, Any]]]:
+        if self._by_serial is None:
+            self._by_serial = {}
+            if os.path.exists(self._index_path):
+                with open(self._index_path, "r", encoding="utf-8") as fh:
+                    for line in fh:
+                        if line.strip():
+                            entry = json.loads(line)
+                            self._by_serial.setdefault(entry["serial"], []).append(entry)
+        return self._by_serial
+
+    def entries(self, serial: str) -> List[Dict[str, Any]]:
+        """
+        Index entries ({serial, kind, symbol, record, time}) for a Serial number.
+        """
+        return self._index().get(str(serial), [])
+
+    # ---------- Records ----------
+    def record(self, kind: str, serial: str, symbol: str, grounding: str, prompt: str,
+               response: str, parsed: Dict[str, Any], template: Optional[str] = None,
+               model: Optional[str] = None) -> str:
+        """
+        Store one recommendation's provenance and index it under its Serial number.
+
+        Args:
+            kind: "forecast" / "deep_look" / ...
+            serial: Serial number of the table row(s) this call wrote.
+            symbol: stock name/ticker as written to the row.
+            grounding: data block the model was given (statements, prices, news).
+            prompt: the filled template text sent after the grounding.
+            response: raw model reply.
+            parsed: fields written to the table.
+            template: template file path (its content hash is stored as the version).
+            model: model name used for the call.
+
+        Returns:
+            The record id (sha256 of the record JSON).
+        """
+        body = {
+            "kind": kind,
+            "serial": str(serial),
+            "symbol": str(symbol),
+            "created": datetime.now().isoformat(timespec="seconds"),
+            "model": model,
+            "template": template,
+            "template_version": template_version(template) if template else None,
+            "grounding": self.put_blob(grounding or ""),
+            "prompt": self.put_blob(prompt or ""),
+            "response": self.put_blob(response or ""),
+            "parsed": parsed,
+        }
+        record_id = self.put_blob(json.dumps(body, sort_keys=True, default=str))
+        entry = {"serial": str(serial), "kind": kind, "symbol": str(symbol),
+                 "record": record_id, "time": body["created"]}
+        index = self._index()  # load before appending, so the new line is not read twice
+        with open(self._index_path, "a", encoding="utf-8") as fh:
+            fh.write(json.dumps(entry) + "\n")
+        index.setdefault(entry["serial"], []).append(entry)
+        return record_id
+
+    def get(self, record_id: str, expand: bool = True) -> Dict[str, Any]:
+        """
+        Load a record; with expand=True the blob hashes are replaced by their text.
+        """
+        body = json.loads(self.get_blob(record_id))
+        body["id"] = record_id
+        if expand:
+            for part in ("grounding", "prompt", "response"):
+                body[part] = self.get_blob(body[part]).decode("utf-8")
+        return body
+
+    def for_serial(self, serial: str, symbol: Optional[str] = None, kind: Optional[str] = None,
+                   expand: bool = True) -> List[Dict[str, Any]]:
+        """
+        Every record written under a Serial number (optionally one symbol / kind), oldest first.
+        """
+        return [self.get(e["record"], expand) for e in self.entries(serial)
+                if (symbol is None or e["symbol"] == str(symbol)) and (kind is None or e["kind"] == kind)]
@@ -0,0 +1,207 @@
+from typing import Optional, Dict, List, Tuple
+import numpy as np
+import pandas as pd
+import json
+import os
+from brokai.priceStore import PriceStore
+from brokai.client import normalize_ticker
+from brokai.optimizer import filled_covariance
+
+
+def _save_atomic(path: str, arr: np.ndarray) -> None:
+    tmp = f"{path}.tmp"
+    with open(tmp, "wb") as fh:
+        np.save(fh, np.ascontiguousarray(arr))
+    os.replace(tmp, path)
+
+
+class RiskCache:
+    """
+    Precomputed daily-return matrices and shrinkage covariances per market, on disk.
+
+    Layout (one set per market, e.g. US / IL):
+      • <root>/<MARKET>_dates.npy    -> datetime64[D] (T,)   union of trading days
+      • <root>/<MARKET>_returns.npy  -> float64 (T, N)       daily log returns (NaN = no trade)
+      • <root>/<MARKET>_cov.npy      -> float64 (N, N)       Ledoit-Wolf covariance (last window_days rows)
+      • <root>/<MARKET>.json         -> symbol index + build metadata
+
+    Symbols are Yahoo symbols (normalize_ticker: IL rows get '.TA'). Readers memory-map
+    the arrays read-only (load / returns / covariance), so worker processes that open
+    the same root share one copy through the OS page cache instead of each rebuilding
+    from raw history. build() only appends the days that arrived since the last build
+    (re-deriving the last cached day, which may have been a partial bar); a changed
+    symbol list rebuilds that market. The covariance is optimizer.filled_covariance, so
+    names with too little history in the window are filled exactly as in an uncached
+    PortfolioOptimizer.covariance().
+    """
+
+    def __init__(self, price_store: PriceStore, stock_lists: Optional[pd.DataFrame] = None,
+                 root: str = "risk_cache", history_days: int = 3 * 365, window_days: int = 252):
+        """
+        Args:
+            price_store: PriceStore with the daily bars.
+            stock_lists: universe [Ticker, Market, ...]; needed by build(), not by readers.
+            root: folder for the cached arrays (created if missing).
+            history_days: calendar days of returns kept by a full build.
+            window_days: trailing rows (trading days) used for the covariance.
+        """
+        self.price_store = price_store
+        self.stock_lists = stock_lists
+        self.root = root
+        self.history_days = history_days
+        self.window_days = window_days
+        os.makedirs(self.root, exist_ok=True)
+        self._loaded: Dict[str, Tuple[np.ndarray, List[str], np.ndarray, np.ndarray, Dict[str, int]]] = {}
+        self._mtimes: Dict[str, float] = {}
+
+    # ---------- Paths ----------
+    def _path(self, market: str, part: str) -> str:
+        market = str(market).strip().upper()
+        if part == "meta":
+            return os.path.join(self.root, f"{market}.json")
+        return os.path.join(self.root, f"{market}_{part}.npy")
+
+    def markets(self) -> List[str]:
+        return sorted(f[:-5] for f in os.listdir(self.root) if f.endswith(".json"))
+
+    def universe(self, market: str) -> List[str]:
+        """
+        Yahoo symbols of stock_lists rows in the market (first occurrence order).
+        """
+        m = str(market).strip().upper()
+        rows = self.stock_lists[self.stock_lists["Market"].astype(str).str.strip().str.upper() == m]
+        return list(dict.fromkeys(normalize_ticker(t, m) for t in rows["Ticker"]))
+
+    # ---------- Build ----------
+    def _returns(self, symbols: List[str], start) -> Tuple[np.ndarray, np.ndarray]:
+        dates, close = self.price_store.close_matrix(symbols, start=start)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            returns = np.diff(np.log(close), axis=0)
+        return dates[1:], returns
+
+    def build(self, market: str, fetch_missing: bool = False, rebuild: bool = False) -> Dict[str, int]:
+        """
+        Create or extend the cached matrices for one market.
+
+        Args:
+            market: "US", "IL", ... (as in stock_lists 'Market').
+            fetch_missing: top up the price store for the universe first.
+            rebuild: ignore the cached rows and rebuild from history_days.
+
+        Returns:
+            {"symbols": N, "rows": T, "new_rows": rows appended by this call}.
+        """
+        symbols = self.universe(market)
+        start = np.datetime64("today", "D") - np.timedelta64(self.history_days, "D")
+        if fetch_missing:
+            for s in symbols:
+                self.price_store.ensure(s, start=start)
+
+        meta_path = self._path(market, "meta")
+        old_dates = old_returns = None
+        if not rebuild and os.path.exists(meta_path):
+            with open(meta_path, "r", encoding="utf-8") as fh:
+                meta = json.load(fh)
+            if meta.get("symbols") == symbols:
+                old_dates = np.load(self._path(market, "dates"))
+                old_returns = np.load(self._path(market, "returns"))
+
+        if old_dates is not None and old_dates.size >= 2:
+            # Keep everything before the last cached day and re-derive from there on:
+            # rows only depend on the previous union day, so this equals a full rebuild.
+            new_dates, new_returns = self._returns(symbols, old_dates[-2])
+            keep = old_dates < old_dates[-1]
+            appended = int(new_dates.size - (old_dates.size - keep.sum()))
+            dates = np.concatenate([old_dates[keep], new_dates])
+            returns = np.concatenate([old_returns[keep], new_returns.reshape(-1, len(symbols))])
+        else:
+            dates, returns = self._returns(symbols, start)
+            returns = returns.reshape(-1, len(symbols))
+            appended = int(dates.size)
+
+        # Same history window as a fresh build
+        recent = dates >= start
+        dates, returns = dates[recent], returns[recent]
+
+        cov, delta = filled_covariance(returns[-self.window_days:])
+        _save_atomic(self._path(market, "dates"), dates.astype("datetime64[D]"))
+        _save_atomic(self._path(market, "returns"), returns.astype("f8"))
+        _save_atomic(self._path(market, "cov"), cov)
+        tmp = f"{meta_path}.tmp"
+        with open(tmp, "w", encoding="utf-8") as fh:
+            json.dump({"symbols": symbols, "rows": int(dates.size), "shrinkage": delta,
+                       "window_days": self.window_days,
+                       "last_date": str(dates[-1]) if dates.size else None}, fh)
+        os.replace(tmp, meta_path)
+        self._loaded.pop(str(market).strip().upper(), None)
+        return {"symbols": len(symbols), "rows": int(dates.size), "new_rows": max(appended, 0)}
+
+    def build_all(self, fetch_missing: bool = False) -> Dict[str, Dict[str, int]]:
+        """
+        build() every market present in stock_lists.
+        """
+        markets = self.stock_lists["Market"].astype(str).str.strip().str.upper().unique()
+        return {m: self.build(m, fetch_missing=fetch_missing) for m in markets}
+
+    # ---------- Read-only access ----------
+    def load(self, market: str) -> Tuple[np.ndarray, List[str], np.ndarray, np.ndarray]:
+        """
+        (dates, symbols, returns, cov) for a market; the arrays are read-only memory maps.
+        Re-opened automatically after another process rebuilt the files.
+
+        Raises:
+            FileNotFoundError if the market was never built.
+        """
+        m = str(market).strip().upper()
+        meta_path = self._path(m, "meta")
+        mtime = os.path.getmtime(meta_path)
+        if m not in self._loaded or self._mtimes.get(m) != mtime:
+            with open(meta_path, "r", encoding="utf-8") as fh:
+                symbols = json.load(fh)["symbols"]
+            self._loaded[m] = (np.load(self._path(m, "dates"), mmap_mode="r"), symbols,
+                               np.load(self._path(m, "returns"), mmap_mode="r"),
+                               np.load(self._path(m, "cov"), mmap_mode="r"),
+                               {s: i for i, s in enumerate(symbols)})
+            self._mtimes[m] = mtime
+        return self._loaded[m][:4]
+
+    def _locate(self, symbols: List[str]) -> Optional[Dict[str, Tuple[str, int]]]:
+        """
+        symbol -> (market, column) for every symbol, or None if any is not cached.
+        """
+        found: Dict[str, Tuple[str, int]] = {}
+        for m in self.markets():
+            self.load(m)
+            index = self._loaded[m][4]
+            for s in symbols:
+                if s not in found and s in index:
+                    found[s] = (m, index[s])
+        return found if len(found) == len(set(symbols)) else None
+
+    def returns(self, symbols: List[str]) -> Optional[Tuple[np.ndarray, np.ndarray]]:
+        """
+        (dates, (T, len(symbols)) returns) for symbols of ONE market, or None if any is missing.
+        """
+        where = self._locate(symbols)
+        if where is None or len({m for m, _ in where.values()}) != 1:
+            return None
+        m = where[symbols[0]][0]
+        dates, _, returns, _ = self.load(m)
+        return dates, returns[:, [where[s][1] for s in symbols]]
+
+    def covariance(self, symbols: List[str]) -> Optional[np.ndarray]:
+        """
+        Daily covariance for the symbols (copy of the cached block), or None if any is missing.
+        Symbols from different markets are taken as uncorrelated (separate trading calendars).
+        """
+        if not symbols:
+            return np.zeros((0, 0))
+        where = self._locate(symbols)
+        if where is None:
+            return None
+        out = np.zeros((len(symbols), len(symbols)))
+        for m in {m for m, _ in where.values()}:
+            pos = [i for i, s in enumerate(symbols) if where[s][0] == m]
+            cols = [where[symbols[i]][1] for i in pos]
+            out[np.ix_(pos, pos)] = self.load(m)[3][np.ix_(cols, cols)]
+        return out
@@ -0,0 +1,163 @@
+from typing import Optional, Dict
+import numpy as np
+import pandas as pd
+import warnings
+from brokai.priceStore import PriceStore
+from brokai.client import normalize_ticker
+
+# Factor weights on cross-sectional z-scores (positive = higher is better).
+# Valuation factors are opt-in: weight a column of the fundamentals table (or of the
+# universe itself), e.g. {"pe": -0.5, "pb": -0.25} (cheaper is better).
+DEFAULT_WEIGHTS: Dict[str, float] = {
+    "momentum": 1.0,     # total return over momentum_days
+    "volatility": -0.5,  # annualised stdev of daily log returns over volatility_days
+    "liquidity": 0.5,    # log median dollar volume over liquidity_days
+}
+
+PRICE_FACTORS = ("momentum", "volatility", "liquidity")
+
+
+# ---------- Helpers ----------
+def _zscore(values: np.ndarray, clip: float = 3.0) -> np.ndarray:
+    """
+    Column-wise cross-sectional z-score, clipped to +-clip; NaN (no data) -> 0 (neutral).
+    """
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore", RuntimeWarning)  # all-NaN factor column
+        mean = np.nanmean(values, axis=0)
+        std = np.nanstd(values, axis=0)
+    std = np.where(std > 0, std, 1.0)
+    z = np.clip((values - mean) / std, -clip, clip)
+    return np.nan_to_num(z, nan=0.0)
+
+
+def _tail_window(m: np.ndarray, days: int) -> np.ndarray:
+    return m[-(days + 1):] if m.shape[0] > days else m
+
+
+# ---------- Screener ----------
+class UniverseScreener:
+    """
+    Cheap quantitative pre-filter for universe scans, run before any LLM call.
+
+    All factors are computed in one pass over the price store's aligned matrices
+    (close_matrix / volume), so screening the whole stock_lists costs a few NumPy
+    reductions instead of one paid forecast per row:
+      - momentum, volatility, liquidity from cached daily bars
+      - valuation ratios (pe, pb, or any weighted column) from an optional
+        fundamentals table indexed by Yahoo symbol, or from matching stock_lists columns;
+        these only count when given a weight (statements are not cached locally, so
+        there is no default valuation data to screen on)
+    Each factor is z-scored across the universe and combined with `weights`; rows are
+    ranked by that score and only the top K go on to get_forcast_stock.
+    """
+
+    def __init__(self, price_store: PriceStore,
+                 weights: Optional[Dict[str, float]] = None,
+                 fundamentals: Optional[pd.DataFrame] = None,
+                 momentum_days: int = 126,
+                 volatility_days: int = 63,
+                 liquidity_days: int = 20,
+                 lookback_days: int = 400):
+        """
+        Args:
+            price_store: PriceStore holding the daily bars.
+            weights: factor -> weight (overrides DEFAULT_WEIGHTS for the given keys;
+                     set a weight to 0 to drop a factor).
+            fundamentals: optional DataFrame indexed by Yahoo symbol with valuation columns.
+            momentum_days / volatility_days / liquidity_days: trading-day windows.
+            lookback_days: calendar days of history read from the store.
+        """
+        self.price_store = price_store
+        self.weights = {**DEFAULT_WEIGHTS, **(weights or {})}
+        self.fundamentals = fundamentals
+        self.momentum_days = momentum_days
+        self.volatility_days = volatility_days
+        self.liquidity_days = liquidity_days
+        self.lookback_days = lookback_days
+
+    def factors(self, universe: pd.DataFrame, fetch_missing: bool = False) -> pd.DataFrame:
+        """
+        Raw factor values for every row of a stock_lists-like table [Ticker, Market, ...].
+
+        Args:
+            universe: rows to screen.
+            fetch_missing: top up the price store for the universe first (only missing days).
+
+        Returns:
+            DataFrame aligned with `universe` (same index): symbol + one column per factor
+            (NaN where there is not enough data).
+        """
+        symbols = [normalize_ticker(t, m) for t, m in universe[["Ticker", "Market"]].itertuples(index=False)]
+        unique = list(dict.fromkeys(symbols))
+        start = np.datetime64("today", "D") - np.timedelta64(self.lookback_days, "D")
+        if fetch_missing:
+            for s in unique:
+                self.price_store.ensure(s, start=start)
+
+        _, close = self.price_store.close_matrix(unique, start=start)
+        _, volume = self.price_store.close_matrix(unique, start=start, field="volume")
+        n = len(unique)
+        momentum = np.full(n, np.nan)
+        volatility = np.full(n, np.nan)
+        liquidity = np.full(n, np.nan)
+
+        if close.shape[0] > 1:
+            # All-NaN columns (no bars yet) legitimately yield NaN factors
+            with np.errstate(invalid="ignore", divide="ignore"), warnings.catch_warnings():
+                warnings.simplefilter("ignore", RuntimeWarning)
+                # Momentum: last valid close vs. the first valid close inside the window
+                window = _tail_window(close, self.momentum_days)
+                valid = ~np.isnan(window)
+                has = valid.any(axis=0)
+                first = window[valid.argmax(axis=0), np.arange(n)]
+                last = window[window.shape[0] - 1 - valid[::-1].argmax(axis=0), np.arange(n)]
+                momentum = np.where(has, last / first - 1.0, np.nan)
+
+                log_ret = np.diff(np.log(_tail_window(close, self.volatility_days)), axis=0)
+                counts = (~np.isnan(log_ret)).sum(axis=0)
+                volatility = np.where(counts >= 2, np.nanstd(log_ret, axis=0) * np.sqrt(252), np.nan)
+
+                dollar = _tail_window(close * volume, self.liquidity_days)
+                liquidity = np.log(np.nanmedian(np.where(dollar > 0, dollar, np.nan), axis=0))
+
+        slot = {s: i for i, s in enumerate(unique)}
+        rows = np.fromiter((slot[s] for s in symbols), dtype=np.intp, count=len(symbols))
+        out = pd.DataFrame({"symbol": symbols,
+                            "momentum": momentum[rows],
+                            "volatility": volatility[rows],
+                            "liquidity": liquidity[rows]}, index=universe.index)
+
+        for name in self.weights:
+            if name in PRICE_FACTORS:
+                continue
+            if self.fundamentals is not None and name in self.fundamentals.columns:
+                out[name] = pd.to_numeric(self.fundamentals[name].reindex(symbols), errors="coerce").to_numpy()
+            elif name in universe.columns:
+                out[name] = pd.to_numeric(universe[name], errors="coerce").to_numpy()
+        return out
+
+    def score(self, factors: pd.DataFrame) -> pd.Series:
+        """
+        Weighted sum of z-scored factors (factors with weight 0 or no column are ignored).
+        """
+        names = [f for f, w in self.weights.items() if w and f in factors.columns]
+        if not names:
+            return pd.Series(0.0, index=factors.index)
+        z = _zscore(factors[names].to_numpy(dtype="f8"))
+        w = np.array([self.weights[f] for f in names])
+        return pd.Series(z @ w, index=factors.index)
+
+    def top_k(self, universe: pd.DataFrame, k: int, fetch_missing: bool = True) -> pd.DataFrame:
+        """
+        The k best-scoring rows of `universe` (best first), with factor columns and
+        'screen_score' attached. Rows with no price history rank after every row that has one.
+        """
+        if universe.empty:
+            return universe.assign(screen_score=pd.Series(dtype="f8"))
+        factors = self.factors(universe, fetch_missing=fetch_missing)
+        scores = self.score(factors)
+        has_prices = factors["momentum"].notna().to_numpy()
+        order = np.lexsort((-scores.to_numpy(), ~has_prices))[:k]
+        extra = factors.drop(columns=["symbol"] + [c for c in factors.columns if c in universe.columns])
+        return universe.iloc[order].join(extra.iloc[order]).assign(screen_score=scores.iloc[order].to_numpy())
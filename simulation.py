@@ -0,0 +1,198 @@
+from concurrent.futures import ProcessPoolExecutor
+from typing import Optional, Dict, List, Any, Tuple
+import numpy as np
+import pandas as pd
+from brokai.priceStore import PriceStore
+from brokai.alerts import forecast_levels
+
+
+# ---------- Core (pure NumPy, picklable for worker processes) ----------
+def _simulate_chunk(args: Tuple) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Simulate one chunk of paths and return (pnl per path, stop hits per holding).
+
+    args = (seed, n_paths, horizon, method, S0, qty, stop_price, mu, chol, hist_returns)
+      - S0, qty, stop_price: (H,) current price, open quantity, stop level (NaN = no stop)
+      - mu, chol: (H,), (H, H) daily log-return mean and Cholesky factor (method="gbm")
+      - hist_returns: (T, H) historical daily log returns (method="bootstrap")
+
+    Stops are path-dependent: the first day a path closes at/below its stop the holding
+    is sold at that day's price and stays flat until the horizon.
+    """
+    seed, n_paths, horizon, method, S0, qty, stop_price, mu, chol, hist_returns = args
+    rng = np.random.default_rng(seed)
+    H = S0.size
+
+    if method == "gbm":
+        z = rng.standard_normal((n_paths, horizon, H))
+        log_ret = mu + z @ chol.T
+    else:
+        rows = rng.integers(0, hist_returns.shape[0], size=(n_paths, horizon))
+        log_ret = hist_returns[rows]
+
+    prices = S0 * np.exp(np.cumsum(log_ret, axis=1))           # (P, horizon, H)
+
+    has_stop = ~np.isnan(stop_price)
+    below = (prices <= np.where(has_stop, stop_price, -np.inf)) # (P, horizon, H)
+    hit = below.any(axis=1)                                     # (P, H)
+    first = below.argmax(axis=1)                                # (P, H); 0 when no hit
+    exit_px = np.take_along_axis(prices, first[:, None, :], axis=1)[:, 0, :]
+    final_px = np.where(hit, exit_px, prices[:, -1, :])
+
+    pnl = (final_px - S0) @ qty
+    return pnl, hit.sum(axis=0)
+
+
+def value_at_risk(pnl: np.ndarray, levels: List[float]) -> Tuple[Dict[float, float], Dict[float, float]]:
+    """
+    Historical VaR/CVaR of a PnL sample, reported as positive loss amounts.
+    """
+    loss = -np.asarray(pnl, dtype="f8")
+    var, cvar = {}, {}
+    for a in levels:
+        q = float(np.quantile(loss, a))
+        var[a] = q
+        tail = loss[loss >= q]
+        cvar[a] = float(tail.mean()) if tail.size else q
+    return var, cvar
+
+
+# ---------- Simulator ----------
+class PortfolioSimulator:
+    """
+    Monte Carlo "future scenario" engine for one client's open positions.
+
+    Inputs:
+      - open lots from NewModelClientPortfolio's FIFO engine (qty per ticker)
+      - daily history from the local PriceStore (drift/covariance or bootstrap rows)
+      - 'Recommended stop-loss' from StocksTable (latest forecast per symbol, names resolved
+        through stock_lists) as exits
+
+    Methods:
+      - "gbm":       correlated geometric Brownian motion (Cholesky of the sample covariance)
+      - "bootstrap": resample whole historical days, keeping the cross-sectional correlation
+    """
+
+    def __init__(self, portfolio, price_store: PriceStore,
+                 stocks_table: Optional[pd.DataFrame] = None,
+                 stop_loss_mode: str = "percent",
+                 lookback_days: int = 2 * 365,
+                 stock_lists: Optional[pd.DataFrame] = None,
+                 min_confidence: float = 0.0):
+        """
+        Args:
+            portfolio: NewModelClientPortfolio with the client's trades.
+            price_store: PriceStore for history and current prices.
+            stocks_table: StocksTable frame; None -> no stop-loss exits.
+            stop_loss_mode: "percent" (% below avg cost, as in AlertEngine) or "price" (absolute level).
+            lookback_days: history window used to estimate returns.
+            stock_lists: universe table resolving 'Stocks Name' (ticker or company name) to symbols.
+            min_confidence: forecasts below this confidence set no stop.
+        """
+        assert stop_loss_mode in ("percent", "price"), "stop_loss_mode must be percent or price"
+        self.portfolio = portfolio
+        self.price_store = price_store
+        self.stocks_table = stocks_table
+        self.stop_loss_mode = stop_loss_mode
+        self.lookback_days = lookback_days
+        self.stock_lists = stock_lists
+        self.min_confidence = min_confidence
+
+    def open_holdings(self, client_id: str) -> pd.DataFrame:
+        """
+        Aggregate the split-adjusted FIFO open lots per ticker -> [ticker, qty, cost_basis].
+        """
+        holdings = self.portfolio.open_holdings(client_id)
+        return holdings[["ticker", "qty", "cost_basis"]].reset_index(drop=True)
+
+    def _stop_prices(self, holdings: pd.DataFrame) -> np.ndarray:
+        """
+        Stop level per holding from the latest 'Recommended stop-loss' (NaN when none);
+        percent stops are measured from the split-adjusted avg cost, like the alerts.
+        """
+        avg_cost = (holdings["cost_basis"] / holdings["qty"]).to_numpy(dtype="f8")
+        levels = forecast_levels(self.stocks_table, self.stock_lists, holdings["ticker"].to_numpy(),
+                                 avg_cost, self.stop_loss_mode, self.min_confidence)
+        return levels[:, 0]
+
+    def _history(self, tickers: List[str]) -> np.ndarray:
+        """
+        Aligned daily log returns (T, H) over the lookback, days with any gap dropped.
+        """
+        start = np.datetime64("today", "D") - np.timedelta64(self.lookback_days, "D")
+        for t in tickers:
+            self.price_store.ensure(t, start)
+        _, close = self.price_store.close_matrix(tickers, start)
+        log_ret = np.diff(np.log(close), axis=0)
+        return log_ret[np.isfinite(log_ret).all(axis=1)]
+
+    def simulate(self, client_id: str, horizon: int = 20, n_paths: int = 100_000,
+                 method: str = "gbm", levels: Optional[List[float]] = None,
+                 seed: int = 0, chunk_paths: int = 5_000, n_jobs: int = 1) -> Dict[str, Any]:
+        """
+        Run the Monte Carlo for a client's open positions.
+
+        Args:
+            client_id: client to simulate.
+            horizon: trading days ahead.
+            n_paths: number of simulated paths.
+            method: "gbm" or "bootstrap".
+            levels: VaR/CVaR confidence levels (default [0.95, 0.99]).
+            seed: base seed; for a fixed chunk_paths the result is identical for any n_jobs.
+            chunk_paths: paths per chunk (bounds memory to ~chunk*horizon*holdings floats).
+            n_jobs: >1 shards chunks across worker processes.
+
+        Returns:
+            {
+              "holdings": DataFrame [ticker, qty, cost_basis, last_price, stop_price, stop_hit_rate],
+              "pnl": ndarray of simulated PnL vs today's market value (n_paths,),
+              "expected_pnl", "var": {level: loss}, "cvar": {level: loss},
+              "percentiles": {5, 25, 50, 75, 95}
+            }
+        """
+        assert method in ("gbm", "bootstrap"), "method must be gbm or bootstrap"
+        levels = levels or [0.95, 0.99]
+        holdings = self.open_holdings(client_id)
+        if holdings.empty:
+            return {"holdings": holdings, "pnl": np.zeros(0), "expected_pnl": 0.0,
+                    "var": {a: 0.0 for a in levels}, "cvar": {a: 0.0 for a in levels},
+                    "percentiles": {}}
+
+        tickers = holdings["ticker"].tolist()
+        hist = self._history(tickers)
+        if hist.shape[0] < 2:
+            raise ValueError(f"Not enough aligned price history to simulate client {client_id}.")
+
+        S0 = np.array([self.price_store.latest_close(t) for t in tickers], dtype="f8")
+        qty = holdings["qty"].to_numpy(dtype="f8")
+        stop_price = self._stop_prices(holdings)
+
+        mu = hist.mean(axis=0)
+        cov = np.cov(hist, rowvar=False).reshape(len(tickers), len(tickers))
+        chol = np.linalg.cholesky(cov + 1e-12 * np.eye(len(tickers)))
+
+        sizes = [chunk_paths] * (n_paths // chunk_paths)
+        if n_paths % chunk_paths:
+            sizes.append(n_paths % chunk_paths)
+        seeds = np.random.SeedSequence(seed).spawn(len(sizes))
+        tasks = [(s, n, horizon, method, S0, qty, stop_price, mu, chol, hist) for s, n in zip(seeds, sizes)]
+
+        if n_jobs > 1:
+            with ProcessPoolExecutor(max_workers=n_jobs) as pool:
+                results = list(pool.map(_simulate_chunk, tasks))
+        else:
+            results = [_simulate_chunk(t) for t in tasks]
+
+        pnl = np.concatenate([r[0] for r in results])
+        hits = np.sum([r[1] for r in results], axis=0)
+        var, cvar = value_at_risk(pnl, levels)
+
+        holdings = holdings.assign(last_price=S0, stop_price=stop_price, stop_hit_rate=hits / n_paths)
+        return {
+            "holdings": holdings,
+            "pnl": pnl,
+            "expected_pnl": float(pnl.mean()),
+            "var": var,
+            "cvar": cvar,
+            "percentiles": {p: float(np.percentile(pnl, p)) for p in (5, 25, 50, 75, 95)},
+        }
@@ -0,0 +1,104 @@
+from typing import Optional, Dict, Tuple, Iterable
+import pandas as pd
+import sys
+
+# Market code (stock_lists 'Market') -> Yahoo Finance suffix
+EXCHANGE_SUFFIXES: Dict[str, str] = {
+    "US": "",       # NYSE / NASDAQ
+    "IL": ".TA",    # Tel Aviv
+    "UK": ".L",     # London
+    "DE": ".DE",    # XETRA
+    "FR": ".PA",    # Euronext Paris
+    "NL": ".AS",    # Euronext Amsterdam
+    "CH": ".SW",    # SIX Swiss
+    "CA": ".TO",    # Toronto
+    "JP": ".T",     # Tokyo
+    "HK": ".HK",    # Hong Kong
+    "AU": ".AX",    # ASX
+    "IN": ".NS",    # NSE India
+}
+
+
+class SymbolMaster:
+    """
+    One place that maps (raw ticker, market) to the vendor (Yahoo) symbol.
+
+    - vendor_symbol(): O(1) after the first call per (raw ticker, market) pair; the
+      exchange suffix comes from EXCHANGE_SUFFIXES (kept if the ticker already ends
+      with its own market's suffix, e.g. 'TEVA.TA' in IL).
+    - load(stock_lists) pre-registers the universe and honours an optional 'Symbol'
+      column for tickers whose vendor symbol does not follow the suffix rule
+      (e.g. class shares like BRK-B).
+    """
+
+    def __init__(self, suffixes: Optional[Dict[str, str]] = None):
+        self.suffixes = dict(EXCHANGE_SUFFIXES if suffixes is None else suffixes)
+        self._vendor: Dict[Tuple[str, str], str] = {}
+
+    # ---------- Mapping ----------
+    def _rule(self, ticker: str, market: str) -> str:
+        t = str(ticker).strip().upper()
+        suffix = self.suffixes.get(market, "")
+        # Only this market's suffix counts: Tel Aviv 'ELAL.T' is not a Tokyo symbol
+        if suffix and not t.endswith(suffix):
+            t += suffix
+        return t
+
+    def vendor_symbol(self, ticker: str, market: str) -> str:
+        """
+        Yahoo symbol for a user/DB ticker in the given market (e.g. ('teva', 'IL') -> 'TEVA.TA').
+        """
+        key = (ticker, market)
+        sym = self._vendor.get(key)
+        if sym is None:
+            m = str(market).strip().upper()
+            # Same ticker spelled differently (case / spaces) may already be registered
+            sym = self._vendor.get((str(ticker).strip().upper(), m))
+            if sym is None:
+                sym = sys.intern(self._rule(ticker, m))
+            self._vendor[key] = sym
+        return sym
+
+    def load(self, stock_lists: pd.DataFrame) -> None:
+        """
+        Register every (Ticker, Market) row of the universe; a non-empty 'Symbol' column
+        value overrides the suffix rule for that row.
+        """
+        override = stock_lists["Symbol"] if "Symbol" in stock_lists.columns else None
+        self._vendor.clear()  # cached spellings may predate an override
+        for i, (tkr, mkt) in enumerate(stock_lists[["Ticker", "Market"]].itertuples(index=False)):
+            m = str(mkt).strip().upper()
+            sym = self._rule(tkr, m)
+            if override is not None and isinstance(override.iloc[i], str) and override.iloc[i].strip():
+                sym = override.iloc[i].strip().upper()
+            sym = sys.intern(sym)
+            self._vendor[(tkr, mkt)] = sym
+            self._vendor[(str(tkr).strip().upper(), m)] = sym
+
+
+# Process-wide master used by normalize_ticker() and the analytics modules
+SYMBOLS = SymbolMaster()
+
+
+def normalize_ticker(ticker: str, market: str) -> str:
+    """
+    Normalize a user/DB ticker to the Yahoo Finance symbol for the given market.
+    - Adds the exchange suffix from EXCHANGE_SUFFIXES (e.g. '.TA' for Israeli/TASE tickers).
+    - Cached per (ticker, market) in SYMBOLS, so repeated trades do not redo string work.
+    """
+    return SYMBOLS.vendor_symbol(ticker, market)
+
+
+def symbol_map(stock_lists: Optional[pd.DataFrame], names: Iterable[str]) -> Dict[str, str]:
+    """
+    Resolve StocksTable 'Stocks Name' values (ticker or company name) to Yahoo symbols
+    through the universe table: by Ticker first, then by Name; unknown values are
+    upper-cased and used as-is.
+    """
+    lookup: Dict[str, str] = {}
+    if stock_lists is not None and not stock_lists.empty:
+        for tkr, name, mkt in stock_lists[["Ticker", "Name", "Market"]].itertuples(index=False):
+            sym = normalize_ticker(tkr, mkt)
+            lookup.setdefault(str(name).strip(), sym)
+            lookup[str(tkr).strip()] = sym
+    return {n: lookup.get(str(n).strip(), str(n).strip().upper()) for n in names}
@@ -0,0 +1,80 @@
+import os
+import sys
+import types
+
+import pytest
+
+# The modules import each other as `brokai.<module>`; map that package name onto the
+# repository root so the tests run from a plain checkout.
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if "brokai" not in sys.modules:
+    _pkg = types.ModuleType("brokai")
+    _pkg.__path__ = [ROOT]
+    sys.modules["brokai"] = _pkg
+
+
+@pytest.fixture
+def portfolio(tmp_path, monkeypatch):
+    """
+    Empty NewModelClientPortfolio writing its logs/workbooks under a temp folder
+    (no AI layer, no price store; every live price is 100).
+    """
+    monkeypatch.chdir(tmp_path)
+    from brokai import client
+    monkeypatch.setattr(client, "latest_close_yf", lambda ticker: 100.0)  # offline live price
+    return client.NewModelClientPortfolio(types.SimpleNamespace(price_store=None))
+
+
+class FakeYahoo:
+    """
+    Offline stand-in for yahoo_daily_bars: deterministic weekday bars per symbol, in the
+    share basis of the splits recorded so far (like Yahoo's split-adjusted closes).
+
+    close(symbol, day) = level * (1 + drift)^k * (1 + wiggle * sin(k)) / splits[symbol],
+    k = weekdays since 2020-01-01; level and drift may be set per symbol (levels / drifts).
+    `calls` records every (symbol, lo, hi) request.
+    """
+
+    def __init__(self, levels=None, drift=0.0005, wiggle=0.01, drifts=None):
+        self.levels = dict(levels or {})
+        self.drift = drift
+        self.drifts = dict(drifts or {})
+        self.wiggle = wiggle
+        self.splits = {}
+        self.calls = []
+
+    def close(self, symbol, days):
+        import numpy as np
+        k = np.busday_count(np.datetime64("2020-01-01"), days).astype("f8")
+        phase = (sum(map(ord, symbol)) % 7) + 1
+        level = self.levels.get(symbol, 100.0)
+        drift = self.drifts.get(symbol, self.drift)
+        return level * (1 + drift) ** k * (1 + self.wiggle * np.sin(k * phase)) / self.splits.get(symbol, 1.0)
+
+    def __call__(self, symbol, lo, hi):
+        import numpy as np
+        from brokai.priceStore import BAR_DTYPE
+        self.calls.append((symbol, lo, hi))
+        days = np.arange(lo, hi + np.timedelta64(1, "D"), dtype="datetime64[D]")
+        days = days[np.is_busday(days)]
+        bars = np.empty(days.size, dtype=BAR_DTYPE)
+        bars["date"] = days
+        close = self.close(symbol, days)
+        for col in ("open", "high", "low", "close"):
+            bars[col] = close
+        bars["volume"] = 1_000.0
+        return bars
+
+
+@pytest.fixture
+def fake_yahoo():
+    return FakeYahoo()
+
+
+@pytest.fixture
+def price_store(tmp_path, fake_yahoo):
+    """
+    PriceStore over FakeYahoo in a temp folder; the tail is re-checked on every ensure().
+    """
+    from brokai.priceStore import PriceStore
+    return PriceStore(str(tmp_path / "prices"), fetcher=fake_yahoo, tail_refresh_seconds=0)
@@ -0,0 +1,48 @@
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+from brokai.alerts import AlertEngine
+
+
+STOCK_LISTS = pd.DataFrame({
+    "Ticker": ["PZOL", "DVN"],
+    "Name": ["Paz Oil Co.", "Devon Energy"],
+    "Market": ["IL", "US"],
+})
+
+# The real StocksTable is keyed by company name, not by ticker
+STOCKS_TABLE = pd.DataFrame({
+    "Stocks Name": ["Paz Oil Co.", "Devon Energy", "Devon Energy"],
+    "estimate forecast date": ["2024-01-01", "2024-01-01", "2024-02-01"],
+    "Recommended stop-loss": [10.0, 50.0, 20.0],
+    "Stock volatility forecast": [5.0, 1.0, 10.0],
+    "Confidence level": [80, 80, 80],
+})
+
+
+def test_forecast_levels_resolve_company_names(portfolio):
+    portfolio.add_trade("c1", "PZOL", "IL", "BUY", 10, 400.0, datetime(2024, 1, 2))
+    portfolio.add_trade("c1", "DVN", "US", "BUY", 4, 50.0, datetime(2024, 1, 2))
+    engine = AlertEngine(max_drawdown_pct=None)
+    assert engine.load_portfolio(portfolio, STOCKS_TABLE, stock_lists=STOCK_LISTS) == 2
+
+    state = engine.state().set_index("ticker")
+    assert np.isclose(state.loc["PZOL.TA", "stop_loss_level"], 360.0)
+    assert np.isclose(state.loc["PZOL.TA", "target_level"], 420.0)
+    # Latest Devon forecast wins
+    assert np.isclose(state.loc["DVN", "stop_loss_level"], 40.0)
+    assert np.isclose(state.loc["DVN", "target_level"], 55.0)
+
+    fired = engine.on_tick("PZOL.TA", 355.0, datetime(2024, 3, 1))
+    assert [(a["client_id"], a["rule"]) for a in fired] == [("c1", "stop_loss")]
+    assert engine.on_tick("PZOL.TA", 350.0) == []  # edge-triggered
+    assert [a["rule"] for a in engine.on_tick("DVN", 56.0)] == ["target"]
+
+
+def test_without_stock_lists_names_do_not_arm_levels(portfolio):
+    portfolio.add_trade("c1", "DVN", "US", "BUY", 4, 50.0, datetime(2024, 1, 2))
+    engine = AlertEngine(max_drawdown_pct=None)
+    engine.load_portfolio(portfolio, STOCKS_TABLE)
+    assert engine.state()[["stop_loss_level", "target_level"]].isna().all().all()
@@ -0,0 +1,85 @@
+import asyncio
+from datetime import datetime
+import json
+import types
+
+import pandas as pd
+
+from brokai.apiServer import ApiServer
+from brokai.dataContext import DataContext
+
+
+STOCK_LISTS = pd.DataFrame({"Ticker": ["DVN"], "Name": ["Devon Energy"], "Market": ["US"], "Sector": ["Energy"]})
+
+
+class _Queue:
+    def __init__(self):
+        self.submitted = []
+
+    def submit(self, kind, params, priority=0):
+        self.submitted.append((kind, params, priority))
+        return "job-1"
+
+
+def _post(server, body):
+    return asyncio.run(server.dispatch("POST", "/recommendations", {}, body))
+
+
+def test_post_body_must_be_a_json_object():
+    queue = _Queue()
+    server = ApiServer(types.SimpleNamespace(), job_queue=queue)
+    assert _post(server, b"[1, 2]")[0] == 400
+    assert _post(server, b'"text"')[0] == 400
+    assert _post(server, b'{"priority": "high"}')[0] == 400
+    status, body, _ = _post(server, b'{"sector": "Energy", "priority": 3}')
+    assert status == 202 and json.loads(body) == {"job_id": "job-1"}
+    assert queue.submitted == [("recommend", {"sector": "Energy"}, 3)]
+
+
+def test_oversized_body_is_rejected_before_reading():
+    server = ApiServer(types.SimpleNamespace(), job_queue=_Queue(), max_body=16)
+
+    async def roundtrip():
+        srv = await server.start("127.0.0.1", 0)
+        port = srv.sockets[0].getsockname()[1]
+        reader, writer = await asyncio.open_connection("127.0.0.1", port)
+        writer.write(b"POST /recommendations HTTP/1.1\r\nContent-Length: 1000000000\r\n\r\n")
+        await writer.drain()
+        reply = await asyncio.wait_for(reader.read(), 5)
+        writer.close()
+        srv.close()
+        await srv.wait_closed()
+        return reply
+
+    reply = asyncio.run(roundtrip())
+    assert reply.startswith(b"HTTP/1.1 413 ")
+    assert b"Connection: close" in reply
+
+
+def test_conditional_get_revalidates_on_trades_and_corporate_actions(portfolio):
+    portfolio.add_trade("c1", "DVN", "US", "BUY", 4, 50.0, datetime(2024, 1, 2))
+    manager = types.SimpleNamespace(clientManagement=portfolio, AImanage=portfolio.AImanage,
+                                    context=DataContext())
+    server = ApiServer(manager)
+
+    def get(path, etag=None):
+        headers = {"if-none-match": etag} if etag else {}
+        return asyncio.run(server.dispatch("GET", path, headers, b""))
+
+    for path in ("/clients/c1/holdings", "/clients/c1/realized"):
+        status, _, headers = get(path)
+        assert status == 200
+        assert get(path, headers["ETag"])[0] == 304
+
+        portfolio.add_trade("c1", "DVN", "US", "SELL", 1, 55.0, datetime(2024, 2, 1))
+        assert get(path, headers["ETag"])[0] == 200
+
+        status, _, headers = get(path)
+        portfolio.corporate_actions.add("DVN", "2024-03-01", "split", 2.0)
+        status, body, fresh = get(path, headers["ETag"])
+        assert status == 200 and fresh["ETag"] != headers["ETag"]
+
+    status, _, headers = get("/exposure")
+    assert get("/exposure", headers["ETag"])[0] == 304
+    manager.context.set("stock_lists", STOCK_LISTS)
+    assert get("/exposure", headers["ETag"])[0] == 200
@@ -0,0 +1,45 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from brokai.backtest import ForecastBacktester
+
+STOCK_LISTS = pd.DataFrame({"Ticker": ["UP", "DOWN"], "Name": ["Up Corp", "Down Corp"], "Market": "US"})
+
+
+def _close(fake_yahoo, symbol, day):
+    return fake_yahoo.close(symbol, np.array([day], dtype="datetime64[D]"))[0]
+
+
+def test_score_joins_forecasts_to_realised_prices(price_store, fake_yahoo):
+    fake_yahoo.wiggle = 0.0
+    fake_yahoo.drifts = {"UP": 0.003, "DOWN": -0.003}
+    table = pd.DataFrame({
+        "Serial number": ["S1", "S1", "S2", "S2"],
+        "Stocks Name": ["Up Corp", "DOWN", "Down Corp", "Up Corp"],
+        "Stock volatility forecast": [5.0, "Up a little", "Down", 5.0],
+        "Confidence level": [90, 60, 80, 95],
+        "Recommended stop-loss": [3.0, 3.0, 10.0, 3.0],
+        "Buy date": ["2024-03-02", "2024-03-04", "2024-03-04", "2024-04-01"],
+        "Sale date": ["2024-04-01", "2024-04-01", "2024-04-01", "2024-03-01"],  # last row: sale before buy
+    })
+    scored = ForecastBacktester(price_store, STOCK_LISTS).score(table, fetch_missing=True)
+
+    assert scored["symbol"].tolist() == ["UP", "DOWN", "DOWN", "UP"]
+    assert scored["valid"].tolist() == [True, True, True, False]
+    # Entry is the first session on/after a weekend buy date
+    assert scored["entry_price"][0] == pytest.approx(_close(fake_yahoo, "UP", "2024-03-04"))
+    assert scored["exit_price"][1] == pytest.approx(_close(fake_yahoo, "DOWN", "2024-04-01"))
+    assert scored["hit"].tolist() == [True, False, True, False]
+    assert scored["stop_triggered"].tolist() == [False, True, False, False]
+    assert scored["return_with_stop"][1] == pytest.approx(-0.03)
+
+    summary = ForecastBacktester.summary(scored)
+    assert summary["rows"] == 3
+    assert summary["hit_rate"] == pytest.approx(2 / 3)
+    assert summary["stop_trigger_rate"] == pytest.approx(1 / 3)
+    sweep = ForecastBacktester.threshold_sweep(scored, [70, 100]).set_index("threshold")
+    assert sweep.loc[70, "rows"] == 2 and sweep.loc[70, "hit_rate"] == 1.0
+    assert sweep.loc[100, "rows"] == 0 and np.isnan(sweep.loc[100, "hit_rate"])
+    buckets = ForecastBacktester.calibration(scored)
+    assert buckets["rows"].sum() == 3
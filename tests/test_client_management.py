@@ -0,0 +1,63 @@
+import types
+
+import pandas as pd
+import pytest
+
+from brokai.clientManagement import StreamingTopK, clientManagement
+from brokai.dataContext import DataContext
+
+
+def _row(name, forecast, confidence):
+    return {"Stocks Name": name, "Stock volatility forecast": forecast, "Confidence level": confidence}
+
+
+def test_streaming_top_k_keeps_best_rows_and_first_of_ties():
+    best = StreamingTopK(2, min_confidence=60)
+    assert best.push(_row("A", 5.0, 80))
+    assert not best.push(_row("LOW", 50.0, 40))   # below min_confidence
+    assert not best.push(None)                     # skipped forecast
+    assert best.push(_row("B", "Up strongly", 90))
+    assert best.push(_row("C", 7.0, 70))           # evicts B (rank 1 < 5)
+    assert not best.push(_row("D", 5.0, 80))       # tie with A: the earlier row stays
+    assert [r["Stocks Name"] for r in best.rows()] == ["C", "A"]
+    assert best.count_at_least(75) == 1 and len(best) == 2
+
+
+def _manager(tickers):
+    context = DataContext()
+    context.set("stock_lists", pd.DataFrame({"Ticker": tickers, "Name": tickers, "Market": "US",
+                                             "Sector": "Energy"}))
+    context.set("stocksTable", pd.DataFrame(columns=["Stocks Name", "Stock volatility forecast",
+                                                     "Confidence level"]))
+    asked = []
+
+    def get_forcast_stock(client, ticker, predict_time, sale_date, serial):
+        asked.append(ticker)
+        return _row(ticker, float(len(asked)), 90)
+
+    ai = types.SimpleNamespace(context=context, client=None, price_store=None,
+                               get_forcast_stock=get_forcast_stock)
+    return clientManagement(ai), asked
+
+
+def test_recommended_stocks_forecasts_every_match_by_default():
+    tickers = [f"T{i:02d}" for i in range(15)]
+    manager, asked = _manager(tickers)
+    top = manager.Recommended_stocks(sector="Energy", k=3)
+    assert asked == tickers
+    assert top["Stocks Name"].tolist() == ["T14", "T13", "T12"]
+
+
+def test_recommended_stocks_stops_once_enough_confident_candidates():
+    manager, asked = _manager([f"T{i:02d}" for i in range(15)])
+    top = manager.Recommended_stocks(k=2, enough_confidence=85)
+    assert len(asked) == 2 and len(top) == 2
+
+
+def test_tables_are_shared_with_the_ai_layer_or_rejected():
+    manager, _ = _manager(["DVN"])
+    assert manager.context is manager.AImanage.context
+    with pytest.raises(ValueError):
+        clientManagement(manager.AImanage, stocksTable="other.xlsx")
+    with pytest.raises(ValueError):
+        clientManagement(manager.AImanage, context=DataContext())
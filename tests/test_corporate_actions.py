@@ -0,0 +1,82 @@
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from brokai.corporateActions import ACTION_COLUMNS, CorporateActions, unadjust_dividends
+
+
+def _trades(rows):
+    return pd.DataFrame(rows, columns=["client_id", "ticker", "market", "side", "qty", "price", "trade_time"])
+
+
+def test_split_restates_qty_and_price_in_as_of_shares():
+    ca = CorporateActions(path=None)
+    ca.add("AAPL", "2020-08-31", "split", 4.0)
+    trades = _trades([
+        ("c1", "AAPL", "US", "BUY", 10.0, 400.0, pd.Timestamp("2020-01-02")),
+        ("c1", "AAPL", "US", "BUY", 5.0, 120.0, pd.Timestamp("2020-09-01")),
+    ])
+    adj = ca.adjust_trades(trades, as_of="2021-01-01")
+    assert adj["qty"].tolist() == [40.0, 5.0]
+    assert adj["price"].tolist() == [100.0, 120.0]
+    # Cost is unchanged by the restatement
+    assert np.allclose(adj["qty"] * adj["price"], trades["qty"] * trades["price"])
+    # Before the ex date nothing changes
+    before = ca.adjust_trades(trades.iloc[:1], as_of="2020-08-30")
+    assert before["qty"].tolist() == [10.0]
+
+
+def test_dividends_pay_shares_held_on_each_ex_date():
+    ca = CorporateActions(path=None)
+    ca.add("AAPL", "2020-05-08", "dividend", 0.82)   # per pre-split share
+    ca.add("AAPL", "2020-08-31", "split", 4.0)
+    ca.add("AAPL", "2020-11-06", "dividend", 0.205)  # per post-split share
+    trades = _trades([
+        ("c1", "AAPL", "US", "BUY", 10.0, 300.0, pd.Timestamp("2020-01-02")),
+        ("c1", "AAPL", "US", "SELL", 20.0, 110.0, pd.Timestamp("2020-10-01")),  # post-split shares
+    ])
+    rows = ca.dividends(trades, as_of="2021-01-01")
+    assert rows["trade_time"].tolist() == [pd.Timestamp("2020-05-08"), pd.Timestamp("2020-11-06")]
+    # 10 shares x 0.82, then 20 remaining post-split shares x 0.205
+    assert rows["realized_pnl"].tolist() == pytest.approx([8.2, 4.1])
+    assert (rows["qty_sold"] == 0).all() and (rows["cost"] == 0).all()
+
+
+def test_dividend_bought_after_ex_date_pays_nothing():
+    ca = CorporateActions(path=None)
+    ca.add("KO", "2021-03-12", "dividend", 0.42)
+    trades = _trades([("c1", "KO", "US", "BUY", 100.0, 50.0, pd.Timestamp("2021-03-12"))])
+    assert ca.dividends(trades, as_of="2021-12-31").empty
+
+
+def test_yahoo_dividends_are_unadjusted_to_ex_date_shares():
+    # Yahoo reports the pre-split dividend per today's share (0.82 / 4)
+    yahoo = pd.DataFrame([
+        ("AAPL", pd.Timestamp("2020-05-08"), "dividend", 0.205),
+        ("AAPL", pd.Timestamp("2020-08-31"), "split", 4.0),
+        ("AAPL", pd.Timestamp("2020-11-06"), "dividend", 0.205),
+    ], columns=ACTION_COLUMNS)
+    out = unadjust_dividends(yahoo)
+    assert out["value"].tolist() == pytest.approx([0.82, 4.0, 0.205])
+
+    ca = CorporateActions(path=None, actions=out)
+    trades = _trades([("c1", "AAPL", "US", "BUY", 10.0, 300.0, pd.Timestamp("2020-01-02"))])
+    cash = ca.dividends(trades, as_of="2021-01-01")["realized_pnl"].tolist()
+    # 10 pre-split shares x 0.82, then 40 post-split shares x 0.205
+    assert cash == pytest.approx([8.2, 8.2])
+
+
+def test_open_lots_are_split_adjusted_for_every_consumer(portfolio):
+    portfolio.corporate_actions.add("NVDA", "2024-06-10", "split", 10.0)
+    portfolio.add_trade("c1", "NVDA", "US", "BUY", 2, 1000.0, datetime(2024, 1, 5))
+    portfolio.add_trade("c1", "NVDA", "US", "SELL", 5, 120.0, datetime(2024, 7, 1))
+
+    lots = portfolio.open_lots("c1")["NVDA"]
+    assert [(l["qty"], l["price"]) for l in lots] == [(15.0, 100.0)]
+
+    holdings = portfolio.open_holdings("c1")
+    assert holdings[["ticker", "qty", "cost_basis", "avg_cost"]].values.tolist() == [["NVDA", 15.0, 1500.0, 100.0]]
+    # The default FIFO path (no trades passed) uses the same adjusted rows
+    assert portfolio._fifo_match("c1", "NVDA")["realized"]["realized_pnl"].tolist() == pytest.approx([100.0])
@@ -0,0 +1,13 @@
+import pandas as pd
+
+from brokai.deepLook import statements_fingerprint
+
+
+def test_fingerprint_is_none_without_statements():
+    empty = pd.DataFrame()
+    assert statements_fingerprint(empty, None, empty) is None
+
+    income = pd.DataFrame({"2024": [1.0, 2.0]}, index=["Revenue", "Net Income"])
+    fp = statements_fingerprint(income, empty, empty)
+    assert fp is not None and fp == statements_fingerprint(income.copy(), None, empty)
+    assert fp != statements_fingerprint(income * 2, empty, empty)
@@ -0,0 +1,52 @@
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from brokai.equityCurve import curve_summary
+
+
+@pytest.fixture
+def flat_store(price_store, fake_yahoo):
+    """Closes fixed at 100 (pre-split) for every symbol."""
+    fake_yahoo.drift = fake_yahoo.wiggle = 0.0
+    return price_store
+
+
+def _row(curve, day):
+    return curve[curve["date"] == np.datetime64(day)].iloc[0]
+
+
+def test_split_after_end_is_valued_in_the_store_basis(portfolio, flat_store, fake_yahoo):
+    # Yahoo-style history downloaded after a 2:1 split: May closes read 50
+    portfolio.AImanage.price_store = flat_store
+    portfolio.corporate_actions.add("SPLT", "2024-06-03", "split", 2.0)
+    fake_yahoo.splits["SPLT"] = 2.0
+    flat_store.ensure("SPLT", "2024-04-01")
+    portfolio.add_trade("c1", "SPLT", "US", "BUY", 10, 100.0, datetime(2024, 5, 1))
+
+    may = portfolio.equity_curve("c1", start="2024-05-01", end="2024-05-31")
+    row = _row(may, "2024-05-31")
+    assert row["market_value"] == 1000.0 and row["cost_basis"] == 1000.0 and row["total_pnl"] == 0.0
+
+    summer = portfolio.equity_curve("c1", start="2024-05-01", end="2024-07-31")
+    assert _row(summer, "2024-05-31")["total_pnl"] == 0.0
+    assert _row(summer, "2024-07-31")["market_value"] == 1000.0
+
+
+def test_curve_tracks_positions_realized_and_drawdown(portfolio, price_store, fake_yahoo):
+    portfolio.AImanage.price_store = price_store
+    price_store.ensure("AAPL", "2024-01-01")
+    portfolio.add_trade("c1", "AAPL", "US", "BUY", 10, 100.0, datetime(2024, 1, 2))
+    portfolio.add_trade("c1", "AAPL", "US", "SELL", 4, 110.0, datetime(2024, 2, 1))
+
+    curve = portfolio.equity_curve("c1", start="2024-01-02", end="2024-03-29")
+    closes = pd.Series(fake_yahoo.close("AAPL", curve["date"].values.astype("datetime64[D]")))
+    held = np.where(curve["date"] < np.datetime64("2024-02-01"), 10.0, 6.0)
+    np.testing.assert_allclose(curve["market_value"], (held * closes).round(2), atol=0.01)
+    assert _row(curve, "2024-03-29")["realized_pnl"] == 40.0
+    assert (curve["drawdown"] <= 0).all()
+
+    summary = curve_summary(curve)
+    assert summary["max_drawdown"].iloc[0] == curve["drawdown"].min()
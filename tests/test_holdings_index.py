@@ -0,0 +1,34 @@
+from datetime import datetime
+
+import pandas as pd
+
+from brokai.holdingsIndex import HoldingsIndex, UNKNOWN_SECTOR
+
+
+def test_index_holds_split_adjusted_quantities(portfolio):
+    portfolio.corporate_actions.add("NVDA", "2024-06-10", "split", 10.0)
+    portfolio.add_trade("c1", "NVDA", "US", "BUY", 10, 1000.0, datetime(2024, 1, 5))
+    portfolio.add_trade("c1", "NVDA", "US", "SELL", 50, 120.0, datetime(2024, 7, 1))
+    portfolio.add_trade("c2", "AAPL", "US", "BUY", 4, 150.0, datetime(2024, 7, 1))
+    assert portfolio.clients_holding("NVDA") == {"c1": 50.0}
+
+    # A split recorded later restates every existing holder
+    portfolio.corporate_actions.add("AAPL", "2024-08-30", "split", 4.0)
+    assert portfolio.clients_holding("AAPL") == {"c2": 16.0}
+    assert portfolio.holdings_index.exposure(market="US") == {"c1": {"NVDA": 50.0}, "c2": {"AAPL": 16.0}}
+
+    # Same numbers as the FIFO holdings
+    held = portfolio.get_client_holdings("c1").set_index("ticker")["qty"].to_dict()
+    assert held == portfolio.holdings_index.client_holdings("c1")
+
+
+def test_sectors_are_refiled_when_the_universe_changes():
+    index = HoldingsIndex()
+    index.apply("c1", "TEVA.TA", "IL", 5)
+    index.apply("c2", "TEVA.TA", "IL", 3)
+    index.apply("c2", "TEVA.TA", "IL", -3)
+    assert index.clients_in_sector(UNKNOWN_SECTOR) == {"c1"}
+    index.set_universe(pd.DataFrame({"Ticker": ["TEVA"], "Market": ["IL"], "Sector": ["Health"]}))
+    assert index.clients_in_sector("Health") == {"c1"} and not index.clients_in_sector(UNKNOWN_SECTOR)
+    assert index.exposure(sector="Health", market="IL") == {"c1": {"TEVA.TA": 5.0}}
+    assert index.holders("teva", "IL") == {"c1": 5.0}
@@ -0,0 +1,56 @@
+from datetime import datetime, timedelta
+
+import numpy as np
+import pandas as pd
+
+from brokai.influencers import InfluencerStudy, posts_from_news
+from brokai.newsFeed import NewsItem
+
+START = np.datetime64("2023-01-02", "D")
+
+
+def _posts(author, symbol, days):
+    return pd.DataFrame({"author": author, "symbol": symbol,
+                         "time": [datetime(2024, 1, 2, 10) + timedelta(days=7 * d) for d in days]})
+
+
+def test_settling_in_batches_matches_one_pass(price_store):
+    for sym in ("AAA", "BBB"):
+        price_store.ensure(sym, start=START)
+    early = pd.concat([_posts("alice", "AAA", range(0, 6)), _posts("bob", "BBB", range(0, 4))])
+    late = pd.concat([_posts("alice", "aaa", range(6, 12)), _posts("bob", "BBB", range(4, 10))])
+
+    batched = InfluencerStudy(price_store)
+    batched.add_posts(early)
+    first = batched.update()
+    batched.add_posts(late)
+    second = batched.update()
+    assert len(first) == 10 and len(second) == 12
+
+    once = InfluencerStudy(price_store)
+    once.add_posts(pd.concat([early, late]))
+    once.update()
+    pd.testing.assert_frame_equal(batched.rankings(min_events=1), once.rankings(min_events=1))
+    assert len(batched.event_table()) == 22
+
+    ranked = once.rankings(min_events=1).set_index("author")
+    assert ranked.loc["alice", "events"] == 12 and ranked.loc["bob", "events"] == 10
+    assert np.isfinite(ranked[["mean_car", "std_car", "t_stat", "corr_lag0"]].to_numpy()).all()
+
+
+def test_unready_and_history_less_events(price_store):
+    price_store.ensure("AAA", start=START)
+    study = InfluencerStudy(price_store)
+    today = datetime.combine(datetime.now().date(), datetime.min.time()) + timedelta(hours=10)
+    study.add_posts(pd.DataFrame({"author": "carol", "symbol": "AAA",
+                                  "time": [datetime(2023, 1, 10, 10), today]}))
+    assert study.update().empty
+    assert study.stats == {"queued": 2, "settled": 0, "skipped": 1}
+    assert study.rankings().empty
+
+
+def test_news_items_become_posts_per_symbol():
+    item = NewsItem("twitter", datetime(2024, 1, 2, 17), "AAA and BBB", author="",
+                    symbols=["AAA", "BBB"])
+    posts = posts_from_news([item])
+    assert posts.values.tolist() == [["twitter", item.time, "AAA"], ["twitter", item.time, "BBB"]]
@@ -0,0 +1,62 @@
+import numpy as np
+import pytest
+
+from brokai.intraday import MINUTE_DTYPE, IntradayCache, intraday_features
+
+OPEN = np.datetime64("2024-03-04T09:30", "m")
+
+
+class FakeMinutes:
+    """
+    One session of 1-minute bars: close = 100 + 0.1 * i, the newest bar still partial
+    (0.05 lower), volume 100 (1000 for the last five minutes of the session).
+    """
+
+    def __init__(self, available=30, session=60):
+        self.available = available
+        self.session = session
+        self.calls = []
+
+    def __call__(self, symbol, start):
+        self.calls.append(start)
+        i = np.arange(self.available)
+        bars = np.empty(i.size, dtype=MINUTE_DTYPE)
+        bars["ts"] = OPEN + i
+        bars["close"] = 100 + 0.1 * i
+        bars["close"][-1] -= 0.05
+        bars["open"] = bars["low"] = bars["close"] - 0.05
+        bars["high"] = bars["close"] + 0.05
+        bars["volume"] = np.where(i >= self.session - 5, 1000.0, 100.0)
+        if start is not None:
+            bars = bars[bars["ts"] >= np.datetime64(start, "m")]
+        return bars
+
+
+def test_cache_tops_up_the_tail_and_replaces_the_partial_minute():
+    fetch = FakeMinutes()
+    cache = IntradayCache(fetcher=fetch, ttl=0)
+    assert cache.bars("aapl").size == 30
+    fetch.available = 60
+    bars = cache.bars("AAPL")
+    assert fetch.calls[0] is None and np.datetime64(fetch.calls[1], "m") == OPEN + 29
+    assert bars.size == 60 and (np.diff(bars["ts"]) == np.timedelta64(1, "m")).all()
+    assert bars["close"][29] == pytest.approx(102.9)
+
+    f = cache.features("AAPL")
+    assert f["bars"] == 60 and f["last"] == pytest.approx(105.85)
+    assert f["ret_5m"] == pytest.approx(round((105.85 / 105.4 - 1) * 100, 3))
+    assert f["volume_5m"] == 5000.0 and f["volume_z"] > 0
+    assert "AAPL @ 2024-03-04T10:29" in cache.summary_text("AAPL")
+
+
+def test_features_are_reused_within_ttl_and_errors_keep_the_cache():
+    fetch = FakeMinutes()
+    cache = IntradayCache(fetcher=fetch, ttl=60)
+    first = cache.features("AAPL")
+    assert cache.features("AAPL") is first and len(fetch.calls) == 1
+
+    def broken(symbol, start):
+        raise ConnectionError("offline")
+    cache.fetcher = broken
+    assert cache.bars("AAPL").size == 30
+    assert intraday_features(np.empty(0, dtype=MINUTE_DTYPE)) == {"bars": 0}
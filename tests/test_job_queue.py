@@ -0,0 +1,27 @@
+import sqlite3
+
+from brokai import jobQueue
+from brokai.jobQueue import DONE, JobQueue
+
+
+def test_worker_survives_claim_errors(tmp_path, monkeypatch):
+    monkeypatch.setitem(jobQueue.TASKS, "echo", lambda manager, job_id, params, progress: params)
+    q = JobQueue(manager=None, db_path=str(tmp_path / "jobs.sqlite"), workers=1, poll_interval=0.01)
+
+    real_claim, failures = q._claim, []
+
+    def flaky_claim():
+        if len(failures) < 2:
+            failures.append(1)
+            raise sqlite3.OperationalError("database is locked")
+        return real_claim()
+
+    monkeypatch.setattr(q, "_claim", flaky_claim)
+    job_id = q.submit("echo", {"x": 1})
+    q.start()
+    try:
+        st = q.wait(job_id, timeout=10)
+    finally:
+        q.shutdown()
+    assert len(failures) == 2
+    assert st["status"] == DONE
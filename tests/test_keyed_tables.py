@@ -0,0 +1,18 @@
+import pandas as pd
+
+from brokai.keyedTables import KeyedTable
+
+
+def test_slices_by_key_prefix_keep_row_order():
+    frame = pd.DataFrame({
+        "client_id": ["c2", "c1", "c1", "c2", "c1"],
+        "ticker": ["MSFT", "AAPL", "MSFT", "MSFT", "AAPL"],
+        "qty": [1.0, 2.0, 3.0, 4.0, 5.0],
+    })
+    table = KeyedTable(frame, ("client_id", "ticker"))
+    assert list(table.groups()) == [("c1", "AAPL"), ("c1", "MSFT"), ("c2", "MSFT")]
+    assert list(table.groups(1)) == [("c1",), ("c2",)]
+    assert table.frame("c1", "AAPL")["qty"].tolist() == [2.0, 5.0]
+    assert table.frame("c2")["qty"].tolist() == [1.0, 4.0]
+    assert table.frame("c3").empty and table.bounds("c3") == (0, 0)
+    assert len(table) == 5
@@ -0,0 +1,58 @@
+import asyncio
+import json
+from datetime import datetime
+
+import pandas as pd
+
+from brokai.newsFeed import JsonlNewsSource, NewsIndex, NewsItem
+
+STOCK_LISTS = pd.DataFrame({"Ticker": ["TEVA", "ON", "AAPL"],
+                            "Name": ["Teva Pharmaceutical", "ON Semiconductor", "Apple"],
+                            "Market": ["IL", "US", "US"]})
+NOW = datetime(2024, 3, 5, 18, 0)
+
+
+def _item(title, hour, text="", author=""):
+    return NewsItem("test", datetime(2024, 3, 5, hour), title, text, author)
+
+
+def test_ingest_tags_dedups_and_keeps_time_order():
+    index = NewsIndex(STOCK_LISTS)
+    seen = []
+    index.subscribers.append(seen.append)
+
+    assert index.ingest(_item("Teva Pharmaceutical beats estimates", 10, author="wire"))
+    assert index.ingest(_item("$on rallies after earnings while AAPL drifts", 11))
+    assert not index.ingest(_item("On the other hand, markets fell", 12))       # short ticker: cashtag only
+    assert not index.ingest(_item("Teva Pharmaceutical beats estimates", 13))   # wire copy
+    assert index.ingest(_item("Early note on Teva Pharmaceutical guidance", 9))  # arrives late
+
+    assert [it.symbols for it in seen] == [["TEVA.TA"], ["AAPL", "ON"], ["TEVA.TA"]]
+    assert index.stats == {"ingested": 3, "duplicates": 1, "untagged": 1}
+    assert [it.time.hour for it in index.recent("TEVA.TA", now=NOW)] == [10, 9]
+    assert index.recent("teva.ta", n=1, now=datetime(2024, 3, 20)) == []  # aged out
+
+    block = index.prompt_block("AAPL", now=NOW)
+    assert block.startswith("\n=== Recent News ===\n- [2024-03-05 11:00] $on rallies")
+    assert index.prompt_block("MSFT", now=NOW) == ""
+
+
+def test_prompt_block_respects_the_token_budget():
+    index = NewsIndex(STOCK_LISTS)
+    topics = ["ships a headset", "settles a lawsuit", "raises its dividend", "opens a factory",
+              "hires a designer", "cuts laptop prices"]
+    for hour, topic in enumerate(topics, start=9):
+        assert index.ingest(_item(f"Apple {topic}", hour))
+    lines = index.prompt_block("AAPL", top_n=5, token_budget=30, now=NOW).strip().splitlines()[1:]
+    assert 1 <= len(lines) < 5 and lines[0].endswith("Apple cuts laptop prices")
+
+
+def test_jsonl_replay_feeds_the_index(tmp_path):
+    path = tmp_path / "news.jsonl"
+    rows = [{"time": "2024-03-05T10:00:00", "title": "Apple unveils a new chip", "author": "@tech"},
+            {"time": "2024-03-05T10:05:00", "title": "Weather is mild today"}]
+    path.write_text("\n".join(json.dumps(r) for r in rows) + "\n\n")
+    index = NewsIndex(STOCK_LISTS)
+    assert asyncio.run(index.run(JsonlNewsSource(str(path)))) == 2
+    [item] = index.recent("AAPL", now=NOW)
+    assert item.source == "replay" and item.author == "@tech"
@@ -0,0 +1,50 @@
+import numpy as np
+import pandas as pd
+
+from brokai.optimizer import PortfolioOptimizer, filled_covariance
+from brokai.riskCache import RiskCache
+
+TODAY = np.datetime64("today", "D")
+
+STOCK_LISTS = pd.DataFrame({"Ticker": ["CALM", "WILD", "NEW"],
+                            "Name": ["Calm Corp", "Wild Corp", "New Corp"], "Market": "US"})
+
+
+def _forecasts(moves):
+    return pd.DataFrame({"Stocks Name": list(moves), "Stock volatility forecast": list(moves.values()),
+                         "Confidence level": 80, "estimate forecast date": "2024-01-01",
+                         "Sale date": pd.NaT})
+
+
+def test_thin_history_is_filled_not_riskless():
+    rng = np.random.default_rng(0)
+    returns = rng.normal(0, 0.01, (100, 3))
+    returns[:-1, 2] = np.nan  # one observation only
+    cov, _ = filled_covariance(returns)
+    assert np.isclose(cov[2, 2], np.diag(cov)[:2].mean())
+    assert not cov[2, :2].any() and not cov[:2, 2].any()
+
+
+def test_allocation_prefers_the_calmer_name_and_cache_matches(price_store, fake_yahoo, tmp_path):
+    fake_yahoo.levels = {"CALM": 100.0, "WILD": 100.0}
+    fake_yahoo.wiggle = 0.0
+    fake_yahoo.drifts = {"CALM": 0.0005, "WILD": 0.0005}
+    start = TODAY - np.timedelta64(400, "D")
+    price_store.ensure("CALM", start=start)
+    fake_yahoo.wiggle = 0.05  # WILD swings 5x harder
+    price_store.ensure("WILD", start=start)
+    price_store.ensure("NEW", start=TODAY - np.timedelta64(3, "D"))
+
+    optimizer = PortfolioOptimizer(price_store, STOCK_LISTS, lookback_days=400)
+    alloc = optimizer.allocate(_forecasts({"Calm Corp": 5.0, "Wild Corp": 5.0}), method="risk_parity",
+                               horizon_days=20)
+    split = dict(zip(alloc["symbol"], alloc["portfolio split"]))
+    assert split["CALM"] > split["WILD"] and np.isclose(sum(split.values()), 100.0)
+
+    symbols = ["CALM", "WILD", "NEW"]
+    direct, _ = optimizer.covariance(symbols)
+    cache = RiskCache(price_store, STOCK_LISTS, root=str(tmp_path / "risk"), history_days=400, window_days=400)
+    cache.build("US")
+    cached, _ = PortfolioOptimizer(price_store, STOCK_LISTS, lookback_days=400, risk_cache=cache).covariance(symbols)
+    assert cached[2, 2] > 0
+    np.testing.assert_allclose(cached, direct, rtol=1e-9, atol=1e-15)
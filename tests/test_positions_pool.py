@@ -0,0 +1,53 @@
+from datetime import datetime, timedelta
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from brokai.positionsPool import parallel_fifo
+
+
+def _book(portfolio, n_clients=6, seed=0):
+    rng = np.random.default_rng(seed)
+    start = datetime(2024, 1, 2)
+    for c in range(n_clients):
+        for tkr in ("AAPL", "MSFT", "TEVA"):
+            held = 0.0
+            for day in range(12):
+                when = start + timedelta(days=day, hours=c)
+                if held > 0 and rng.random() < 0.4:
+                    qty = float(rng.integers(1, int(held) + 1))
+                    portfolio.add_trade(f"c{c}", tkr, "US", "SELL", qty, float(rng.uniform(90, 110)), when)
+                    held -= qty
+                else:
+                    qty = float(rng.integers(1, 20))
+                    portfolio.add_trade(f"c{c}", tkr, "US", "BUY", qty, float(rng.uniform(90, 110)), when)
+                    held += qty
+
+
+def test_parallel_positions_match_serial(portfolio):
+    _book(portfolio)
+
+    serial = portfolio.compute_positions(workers=1)
+    serial_ledger = portfolio.realized_pnl()
+    parallel = portfolio.compute_positions(workers=2)
+    parallel_ledger = portfolio.realized_pnl()
+
+    assert len(serial_ledger) > 0
+    pd.testing.assert_frame_equal(serial, parallel)
+    pd.testing.assert_frame_equal(serial_ledger.reset_index(drop=True), parallel_ledger.reset_index(drop=True),
+                                  check_dtype=False)
+
+
+def test_parallel_fifo_rejects_oversold_history():
+    trades = pd.DataFrame({
+        "client_id": ["c1", "c1", "c2", "c2"],
+        "ticker": ["AAPL", "AAPL", "AAPL", "AAPL"],
+        "market": ["US"] * 4,
+        "side": ["BUY", "SELL", "BUY", "SELL"],
+        "qty": [5.0, 3.0, 2.0, 4.0],
+        "price": [100.0] * 4,
+        "trade_time": pd.to_datetime(["2024-01-02", "2024-01-03", "2024-01-02", "2024-01-03"]),
+    })
+    with pytest.raises(ValueError, match="SELL exceeds available FIFO buys for AAPL \\(client c2\\)"):
+        parallel_fifo(trades, workers=2)
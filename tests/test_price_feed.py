@@ -0,0 +1,34 @@
+import asyncio
+from datetime import datetime
+
+import pytest
+
+from brokai.priceFeed import MarkToMarket, PriceFeed, PriceSource, Tick
+
+
+class _ListSource(PriceSource):
+    def __init__(self, ticks):
+        self._ticks = ticks
+
+    async def ticks(self):
+        for t in self._ticks:
+            yield t
+
+
+def test_price_source_is_abstract():
+    with pytest.raises(TypeError):
+        PriceSource()
+
+
+def test_non_finite_ticks_are_rejected():
+    mtm = MarkToMarket()
+    mtm.set_client_positions("c1", {"AAPL": {"qty": 10.0, "cost_basis": 1000.0}})
+    with pytest.raises(ValueError):
+        mtm.apply_tick("AAPL", float("nan"))
+
+    now = datetime(2024, 1, 2)
+    feed = PriceFeed(mtm)
+    ticks = [Tick("AAPL", 110.0, now), Tick("AAPL", float("inf"), now), Tick("AAPL", float("nan"), now)]
+    assert asyncio.run(feed.run(_ListSource(ticks))) == 1
+    assert feed.ticks_rejected == 2
+    assert mtm.unrealized("c1") == 100.0
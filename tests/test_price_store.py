@@ -0,0 +1,58 @@
+import threading
+
+import numpy as np
+
+from brokai.priceStore import PriceStore
+
+
+def test_ensure_downloads_only_missing_edges(price_store, fake_yahoo):
+    today = np.datetime64("today", "D")
+    start = today - np.timedelta64(60, "D")
+    assert price_store.ensure("AAPL", start) > 0
+    bars = price_store.read("AAPL")
+    assert bars["date"][0] >= start and np.all(np.diff(bars["date"].astype("i8")) > 0)
+
+    fake_yahoo.calls.clear()
+    price_store.ensure("AAPL", start - np.timedelta64(30, "D"))
+    head, tail = fake_yahoo.calls
+    assert head[2] < bars["date"][0]                  # head stops before the first stored bar
+    assert tail[1] >= bars["date"][-2]                # tail starts at the overlap bar
+    assert price_store.read("AAPL", end=start)["close"].size > 0
+    # Reads are views into the memory map
+    assert not price_store.read("AAPL")["close"].flags.owndata
+
+
+def test_split_after_first_fetch_rebases_the_whole_history(price_store, fake_yahoo):
+    start = np.datetime64("today", "D") - np.timedelta64(40, "D")
+    price_store.ensure("NVDA", start)
+    before = np.asarray(price_store.read("NVDA")["close"]).copy()
+
+    fake_yahoo.splits["NVDA"] = 10.0
+    price_store.ensure("NVDA")
+    after = price_store.read("NVDA")["close"]
+    # Old bars are restated in the new share basis: no -90% day in the return series
+    np.testing.assert_allclose(after[:before.size], before / 10.0)
+    assert np.all(np.abs(np.diff(np.log(after))) < 0.1)
+
+
+def test_concurrent_top_ups_of_one_symbol(tmp_path, fake_yahoo):
+    store = PriceStore(str(tmp_path), fetcher=fake_yahoo, tail_refresh_seconds=0)
+    start = np.datetime64("today", "D") - np.timedelta64(200, "D")
+    errors = []
+
+    def worker(offset):
+        try:
+            for i in range(5):
+                store.ensure("MSFT", start + np.timedelta64(offset * 10 + i, "D"))
+        except Exception as e:  # pragma: no cover - reported below
+            errors.append(e)
+
+    threads = [threading.Thread(target=worker, args=(k,)) for k in range(4)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert errors == []
+    assert not [f for f in (tmp_path).iterdir() if f.suffix == ".tmp"]
+    dates = store.read("MSFT")["date"]
+    assert np.all(np.diff(dates.astype("i8")) > 0)
@@ -0,0 +1,36 @@
+import os
+
+from brokai.provenance import ProvenanceStore, template_version
+
+
+def test_records_share_blobs_and_survive_a_reopen(tmp_path):
+    template = tmp_path / "forecast.txt"
+    template.write_text("Forecast {stock} until {date}")
+    root = str(tmp_path / "prov")
+    store = ProvenanceStore(root)
+
+    grounding = "=== Income Statement ===\n" + "revenue 1,000\n" * 200
+    first = store.record("forecast", "SN1", "DVN", grounding, "Forecast DVN", "up 5%",
+                         {"Stock volatility forecast": 5}, template=str(template), model="m1")
+    store.record("forecast", "SN1", "PZOL", grounding, "Forecast PZOL", "down 2%",
+                 {"Stock volatility forecast": -2}, template=str(template), model="m1")
+    store.record("deep_look", "SN2", "DVN", grounding, "Deep DVN", "A1: ...", {})
+    assert store.stats["blobs_deduped"] >= 2  # the grounding block is stored once
+
+    reopened = ProvenanceStore(root)
+    records = reopened.for_serial("SN1")
+    assert [r["symbol"] for r in records] == ["DVN", "PZOL"]
+    assert records[0]["id"] == first and records[0]["grounding"] == grounding
+    assert records[0]["response"] == "up 5%" and records[0]["parsed"] == {"Stock volatility forecast": 5}
+    assert records[0]["template_version"] == template_version(str(template))
+    assert reopened.for_serial("SN1", symbol="PZOL")[0]["prompt"] == "Forecast PZOL"
+    assert [e["kind"] for e in reopened.entries("SN2")] == ["deep_look"]
+    assert reopened.for_serial("SN2", kind="forecast") == []
+
+    # Editing the template gives later records a new version
+    old = template_version(str(template))
+    template.write_text("Forecast {stock} by {date}, with reasons")
+    mtime = os.path.getmtime(template) + 5
+    os.utime(template, (mtime, mtime))
+    assert template_version(str(template)) not in (None, old)
+    assert template_version(str(tmp_path / "missing.txt")) is None
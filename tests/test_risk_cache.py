@@ -0,0 +1,45 @@
+import numpy as np
+import pandas as pd
+
+from brokai.riskCache import RiskCache
+
+TODAY = np.datetime64("today", "D")
+STOCK_LISTS = pd.DataFrame({"Ticker": ["AAA", "BBB", "teva"], "Market": ["US", "US", "IL"]})
+
+
+def test_incremental_build_matches_a_full_rebuild(price_store, tmp_path):
+    start = TODAY - np.timedelta64(200, "D")
+    for sym in ("AAA", "BBB", "TEVA.TA"):
+        price_store.ensure(sym, start=start, end=TODAY - np.timedelta64(20, "D"))
+    cache = RiskCache(price_store, STOCK_LISTS, root=str(tmp_path / "risk"), history_days=200, window_days=60)
+    first = cache.build("US")
+    assert first["symbols"] == 2 and first["new_rows"] == first["rows"]
+
+    for sym in ("AAA", "BBB", "TEVA.TA"):
+        price_store.ensure(sym, start=start)
+    grown = cache.build("US")
+    assert 0 < grown["new_rows"] < grown["rows"]
+    dates, symbols, returns, cov = cache.load("US")
+
+    full = RiskCache(price_store, STOCK_LISTS, root=str(tmp_path / "full"), history_days=200, window_days=60)
+    full.build("US", rebuild=True)
+    f_dates, f_symbols, f_returns, f_cov = full.load("US")
+    assert symbols == f_symbols == ["AAA", "BBB"]
+    np.testing.assert_array_equal(dates, f_dates)
+    np.testing.assert_allclose(returns, f_returns)
+    np.testing.assert_allclose(cov, f_cov)
+
+
+def test_covariance_spans_markets_and_misses_unknown_symbols(price_store, tmp_path):
+    for sym in ("AAA", "BBB", "TEVA.TA"):
+        price_store.ensure(sym, start=TODAY - np.timedelta64(120, "D"))
+    cache = RiskCache(price_store, STOCK_LISTS, root=str(tmp_path / "risk"), history_days=120, window_days=60)
+    assert set(cache.build_all()) == {"US", "IL"}
+
+    cov = cache.covariance(["TEVA.TA", "AAA"])
+    assert cov.shape == (2, 2) and cov[0, 1] == 0.0 and (np.diag(cov) > 0).all()
+    assert np.isclose(cov[1, 1], cache.covariance(["AAA"])[0, 0])
+    assert cache.covariance(["AAA", "ZZZ"]) is None
+    assert cache.returns(["AAA", "TEVA.TA"]) is None  # different calendars
+    dates, block = cache.returns(["BBB", "AAA"])
+    assert block.shape == (dates.size, 2)
@@ -0,0 +1,30 @@
+import pandas as pd
+
+from brokai.screening import DEFAULT_WEIGHTS, UniverseScreener
+
+
+UNIVERSE = pd.DataFrame({"Ticker": ["UP", "FLAT", "DOWN", "NEW"], "Market": "US",
+                         "pe": [40.0, 8.0, 12.0, 5.0]})
+
+
+def test_top_k_ranks_on_price_factors_and_puts_unpriced_rows_last(price_store, fake_yahoo):
+    fake_yahoo.drifts = {"UP": 0.002, "FLAT": 0.0, "DOWN": -0.002}
+    for sym in ("UP", "FLAT", "DOWN"):
+        price_store.ensure(sym, start=pd.Timestamp.today().normalize() - pd.Timedelta(days=400))
+
+    screener = UniverseScreener(price_store, weights={"volatility": 0, "liquidity": 0})
+    top = screener.top_k(UNIVERSE, 4, fetch_missing=False)
+    assert top["Ticker"].tolist() == ["UP", "FLAT", "DOWN", "NEW"]
+    assert top["momentum"].iloc[0] > 0 > top["momentum"].iloc[2]
+    # Valuation columns are in the table but carry no default weight
+    assert "pe" not in DEFAULT_WEIGHTS
+    assert screener.top_k(UNIVERSE, 1, fetch_missing=False)["Ticker"].tolist() == ["UP"]
+
+
+def test_weighted_valuation_column_can_outrank_momentum(price_store, fake_yahoo):
+    fake_yahoo.drifts = {"UP": 0.002, "FLAT": 0.0, "DOWN": -0.002}
+    screener = UniverseScreener(price_store, weights={"volatility": 0, "liquidity": 0, "momentum": 0.1,
+                                                      "pe": -1.0})
+    top = screener.top_k(UNIVERSE[UNIVERSE["Ticker"] != "NEW"], 1)
+    assert top["Ticker"].tolist() == ["FLAT"]
+    assert {"momentum", "screen_score"} <= set(top.columns)
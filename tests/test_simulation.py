@@ -0,0 +1,20 @@
+import numpy as np
+import pandas as pd
+
+from brokai.simulation import PortfolioSimulator
+
+
+def test_stop_prices_resolve_names_and_use_avg_cost():
+    stock_lists = pd.DataFrame({"Ticker": ["PZOL"], "Name": ["Paz Oil Co."], "Market": ["IL"]})
+    stocks_table = pd.DataFrame({
+        "Stocks Name": ["Paz Oil Co."],
+        "estimate forecast date": ["2024-01-01"],
+        "Recommended stop-loss": [10.0],
+        "Stock volatility forecast": [1.0],
+        "Confidence level": [90],
+    })
+    sim = PortfolioSimulator(None, None, stocks_table, stock_lists=stock_lists)
+    holdings = pd.DataFrame({"ticker": ["PZOL.TA", "DVN"], "qty": [10.0, 1.0], "cost_basis": [4000.0, 5.0]})
+    stops = sim._stop_prices(holdings)
+    assert stops[0] == 360.0      # 10% below the 400 avg cost, not below today's price
+    assert np.isnan(stops[1])
@@ -0,0 +1,28 @@
+import pandas as pd
+
+from brokai.symbolMaster import SymbolMaster, symbol_map
+
+
+def test_suffix_rule_only_trusts_the_market_own_suffix():
+    master = SymbolMaster()
+    assert master.vendor_symbol("teva", "IL") == "TEVA.TA"
+    assert master.vendor_symbol("TEVA.TA", "IL") == "TEVA.TA"
+    # '.T' is Tokyo's suffix, not Tel Aviv's
+    assert master.vendor_symbol("ELAL.T", "IL") == "ELAL.T.TA"
+    assert master.vendor_symbol(" aapl ", "us") == "AAPL"
+
+
+def test_load_honours_symbol_override_and_replaces_cached_spellings():
+    master = SymbolMaster()
+    assert master.vendor_symbol("brk b", "US") == "BRK B"
+    master.load(pd.DataFrame({"Ticker": ["BRK B", "VOD"], "Market": ["US", "UK"],
+                              "Symbol": ["BRK-B", None]}))
+    assert master.vendor_symbol("brk b", "US") == "BRK-B"
+    assert master.vendor_symbol("VOD", "UK") == "VOD.L"
+
+
+def test_symbol_map_resolves_names_then_tickers():
+    stock_lists = pd.DataFrame({"Ticker": ["PZOL", "DVN"], "Name": ["Paz Oil Co.", "Devon Energy"],
+                                "Market": ["IL", "US"]})
+    assert symbol_map(stock_lists, ["Paz Oil Co.", "DVN", "unknown co"]) == {
+        "Paz Oil Co.": "PZOL.TA", "DVN": "DVN", "unknown co": "UNKNOWN CO"}
@@ -0,0 +1,112 @@
+import gc
+import json
+import threading
+import types
+import weakref
+from datetime import datetime
+
+import pandas as pd
+import pytest
+
+from brokai.tradeLog import TradeLog
+
+
+def _reopen(portfolio):
+    from brokai.client import NewModelClientPortfolio
+    fresh = NewModelClientPortfolio(types.SimpleNamespace(price_store=None))
+    fresh.corporate_actions = portfolio.corporate_actions
+    return fresh
+
+
+def _realized_by_ticker(portfolio, client_id):
+    portfolio.compute_positions(client_id)
+    ledger = portfolio.realized_pnl(client_id)
+    return ledger.groupby("ticker")["realized_pnl"].sum().round(6).to_dict()
+
+
+def test_snapshot_keeps_open_lots_and_carries_realized(portfolio):
+    portfolio.trade_log.snapshot_every = 4
+    portfolio.corporate_actions.add("NVDA", "2024-06-10", "split", 10.0)
+    portfolio.corporate_actions.add("NVDA", "2024-03-01", "dividend", 1.0)   # per pre-split share
+    portfolio.add_trade("c1", "NVDA", "US", "BUY", 2, 1000.0, datetime(2024, 1, 5))
+    portfolio.add_trade("c1", "NVDA", "US", "BUY", 1, 1100.0, datetime(2024, 2, 1))
+    portfolio.add_trade("c1", "NVDA", "US", "SELL", 15, 120.0, datetime(2024, 7, 1))
+    portfolio.add_trade("c1", "AAPL", "US", "BUY", 10, 150.0, datetime(2024, 7, 2))   # -> snapshot
+    portfolio.add_trade("c1", "AAPL", "US", "SELL", 4, 160.0, datetime(2024, 8, 1))   # log tail
+
+    before = portfolio.compute_positions("c1")
+    realized = _realized_by_ticker(portfolio, "c1")
+
+    with open(portfolio.trade_log.snapshot_path("c1")) as fh:
+        state = json.load(fh)
+    assert state["seq"] == 4 and "trades" not in state
+    # Only the remaining lots, in the share basis they were bought in
+    lots = pd.DataFrame(state["lots"]).sort_values(["ticker", "trade_time"])
+    assert lots[["ticker", "qty", "price"]].values.tolist() == [["AAPL", 10.0, 150.0], ["NVDA", 0.5, 1000.0],
+                                                                  ["NVDA", 1.0, 1100.0]]
+
+    portfolio.trade_log.close()
+    fresh = _reopen(portfolio)
+    after = fresh.compute_positions("c1")
+    pd.testing.assert_frame_equal(before[["ticker", "qty", "cost_basis"]], after[["ticker", "qty", "cost_basis"]])
+    assert _realized_by_ticker(fresh, "c1") == pytest.approx(realized)
+    # Full history stays available for replays
+    assert len(fresh.trade_log.history("c1")) == 5
+
+    # A second compaction on the recovered book still carries the earlier sales
+    fresh.trade_log.snapshot_every = 1
+    fresh.add_trade("c1", "AAPL", "US", "SELL", 1, 170.0, datetime(2024, 9, 1))
+    expected = _realized_by_ticker(fresh, "c1")
+    fresh.trade_log.close()
+    assert _realized_by_ticker(_reopen(fresh), "c1") == pytest.approx(expected)
+
+
+def test_compacted_client_views_show_every_trade(portfolio, tmp_path, capsys):
+    portfolio.trade_log.snapshot_every = 3
+    portfolio.add_trade("c1", "DVN", "US", "BUY", 4, 50.0, datetime(2024, 1, 2))
+    portfolio.add_trade("c1", "DVN", "US", "SELL", 4, 55.0, datetime(2024, 2, 1))
+    portfolio.add_trade("c1", "AAPL", "US", "BUY", 10, 150.0, datetime(2024, 3, 1))   # -> snapshot
+    portfolio.add_trade("c1", "AAPL", "US", "SELL", 2, 160.0, datetime(2024, 4, 1))
+    portfolio.trade_log.close()
+
+    fresh = _reopen(portfolio)
+    trades = fresh.get_client_trades("c1")
+    assert trades[["ticker", "side", "qty", "price"]].values.tolist() == [
+        ["DVN", "BUY", 4.0, 50.0], ["DVN", "SELL", 4.0, 55.0],
+        ["AAPL", "BUY", 10.0, 150.0], ["AAPL", "SELL", 2.0, 160.0]]
+    assert fresh.get_client_universe("c1") == ["AAPL", "DVN"]
+    assert len(fresh.get_client_trades("c1", "dvn")) == 2
+
+    path = str(tmp_path / "c1.xlsx")
+    fresh.save_client_excel("c1", path)
+    assert len(pd.read_excel(path, sheet_name="Trades")) == 4
+    capsys.readouterr()
+    fresh.pretty_portfolio_print("c1")
+    history = capsys.readouterr().out.split("--- TRADE HISTORY ---")[1].split("--- TOTALS ---")[0]
+    assert history.count("DVN") == 2
+
+
+def test_concurrent_appends_get_unique_seqs(tmp_path):
+    log = TradeLog(str(tmp_path))
+    row = {"client_id": "c1", "ticker": "AAPL", "market": "US", "side": "BUY",
+           "qty": 1.0, "price": 1.0, "trade_time": datetime(2024, 1, 2)}
+    seqs = []
+
+    def worker():
+        for _ in range(50):
+            seqs.append(log.append("c1", row))
+
+    threads = [threading.Thread(target=worker) for _ in range(4)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    log.close()
+    assert sorted(seqs) == list(range(1, 201))
+    assert len(log.recover("c1")) == 200
+
+
+def test_trade_logs_are_not_pinned_by_atexit(tmp_path):
+    ref = weakref.ref(TradeLog(str(tmp_path)))
+    gc.collect()
+    assert ref() is None
@@ -0,0 +1,347 @@
+from datetime import datetime
+from typing import Optional, Dict, Any, List, IO
+import pandas as pd
+import threading
+import weakref
+import atexit
+import json
+import time
+import os
+
+TRADE_COLUMNS = ["client_id", "ticker", "market", "side", "qty", "price", "trade_time"]
+REALIZED_COLUMNS = ["client_id", "ticker", "market", "trade_time", "qty_sold", "proceeds", "cost", "realized_pnl"]
+
+# Open logs are flushed once at interpreter exit; a WeakSet so the hook does not keep
+# every TradeLog (and its file handles) alive
+_OPEN_LOGS: "weakref.WeakSet[TradeLog]" = weakref.WeakSet()
+
+
+@atexit.register
+def _close_all() -> None:
+    for log in list(_OPEN_LOGS):
+        log.close()
+
+
+def _columns(frame: pd.DataFrame, columns: List[str]) -> Dict[str, list]:
+    """
+    {column: values} for JSON, timestamps as ISO-8601 strings.
+    """
+    out = {c: frame[c].tolist() for c in columns if c != "trade_time"}
+    out["trade_time"] = [pd.Timestamp(t).isoformat() for t in frame["trade_time"]]
+    return out
+
+
+def _frame(columns: Dict[str, list], names: List[str]) -> pd.DataFrame:
+    frame = pd.DataFrame(columns, columns=names)
+    frame["trade_time"] = pd.to_datetime(frame["trade_time"], format="ISO8601")
+    return frame
+
+
+def _fsync_replace(tmp: str, path: str) -> None:
+    """
+    Make tmp durable, then atomically move it over path (and persist the rename).
+    """
+    os.replace(tmp, path)
+    try:
+        fd = os.open(os.path.dirname(path) or ".", os.O_RDONLY)
+        try:
+            os.fsync(fd)
+        finally:
+            os.close(fd)
+    except OSError:  # directories cannot be fsynced on some platforms
+        pass
+
+
+class TradeLog:
+    """
+    Append-only, per-client trade event log with periodic snapshots.
+
+    Files (under root):
+      • <client>.log          -> one JSON event per line {"seq", "client_id", "ticker", ...}
+      • <client>.snap.json    -> {"seq", "lots": {column: [...]}, "realized": {column: [...]}}
+      • <client>.history.log  -> events moved out of the log by snapshots (cold archive)
+
+    - append() writes one short line; fsync is batched (every fsync_every events or
+      fsync_interval seconds, plus flush() / interpreter exit), so a trade costs one
+      small append instead of rewriting the client's workbook.
+    - Every snapshot_every events the client's book is compacted into a snapshot (tmp
+      file, fsync, atomic rename): its open FIFO lots as BUY rows in their original share
+      basis, plus realized PnL carried per ticker, at the log offset (seq) they cover.
+      The log segment is then moved to the history file, so a snapshot stays the size of
+      the open book and recovery is one snapshot read plus at most snapshot_every events.
+    - A torn last line (crash mid-append) is ignored on recovery and cut off.
+    - All methods take one re-entrant lock (trades arrive from API and job threads).
+    """
+
+    def __init__(self, root: str = "clients_portfolios/logs", fsync_every: int = 32,
+                 fsync_interval: float = 1.0, snapshot_every: int = 500):
+        """
+        Args:
+            root: folder for logs and snapshots (created if missing).
+            fsync_every: fsync after this many unsynced appends per client.
+            fsync_interval: ... or when the oldest unsynced append is this many seconds old.
+            snapshot_every: events between snapshots (bounds recovery replay).
+        """
+        self.root = root
+        self.fsync_every = fsync_every
+        self.fsync_interval = fsync_interval
+        self.snapshot_every = snapshot_every
+        os.makedirs(self.root, exist_ok=True)
+        self._files: Dict[str, IO[str]] = {}
+        self._seq: Dict[str, int] = {}
+        self._since_snapshot: Dict[str, int] = {}
+        self._unsynced: Dict[str, int] = {}
+        self._first_unsynced: Dict[str, float] = {}
+        self._carried: Dict[str, pd.DataFrame] = {}
+        self._lock = threading.RLock()
+        _OPEN_LOGS.add(self)
+
+    # ---------- Paths ----------
+    def _base(self, client_id: str) -> str:
+        safe = str(client_id).replace("/", "_").replace("\\", "_")
+        return os.path.join(self.root, safe)
+
+    def log_path(self, client_id: str) -> str:
+        return self._base(client_id) + ".log"
+
+    def snapshot_path(self, client_id: str) -> str:
+        return self._base(client_id) + ".snap.json"
+
+    def history_path(self, client_id: str) -> str:
+        return self._base(client_id) + ".history.log"
+
+    def exists(self, client_id: str) -> bool:
+        return os.path.exists(self.log_path(client_id)) or os.path.exists(self.snapshot_path(client_id))
+
+    # ---------- Writes ----------
+    def _file(self, client_id: str) -> IO[str]:
+        fh = self._files.get(client_id)
+        if fh is None:
+            if client_id not in self._seq:
+                self.recover(client_id)  # learn the last seq (and cut a torn tail)
+            fh = open(self.log_path(client_id), "a", encoding="utf-8")
+            self._files[client_id] = fh
+        return fh
+
+    def append(self, client_id: str, trade: Dict[str, Any]) -> int:
+        """
+        Append one trade event; returns its sequence number.
+        """
+        with self._lock:
+            fh = self._file(client_id)
+            seq = self._seq.get(client_id, 0) + 1
+            event = {"seq": seq}
+            event.update({k: trade[k] for k in TRADE_COLUMNS})
+            event["trade_time"] = pd.Timestamp(trade["trade_time"]).isoformat()
+            fh.write(json.dumps(event, default=str) + "\n")
+            fh.flush()
+            self._seq[client_id] = seq
+            self._since_snapshot[client_id] = self._since_snapshot.get(client_id, 0) + 1
+
+            self._unsynced[client_id] = self._unsynced.get(client_id, 0) + 1
+            first = self._first_unsynced.setdefault(client_id, time.monotonic())
+            if self._unsynced[client_id] >= self.fsync_every or time.monotonic() - first >= self.fsync_interval:
+                self.flush(client_id)
+            return seq
+
+    def append_many(self, client_id: str, trades: pd.DataFrame) -> None:
+        """
+        Append a batch of trades (e.g. a legacy workbook import) and fsync once.
+        """
+        with self._lock:
+            for row in trades[TRADE_COLUMNS].to_dict("records"):
+                self.append(client_id, row)
+            self.flush(client_id)
+
+    def flush(self, client_id: Optional[str] = None) -> None:
+        """
+        fsync pending appends (one client, or all).
+        """
+        with self._lock:
+            ids = [client_id] if client_id is not None else list(self._files)
+            for cid in ids:
+                fh = self._files.get(cid)
+                if fh is not None and self._unsynced.get(cid):
+                    fh.flush()
+                    os.fsync(fh.fileno())
+                self._unsynced[cid] = 0
+                self._first_unsynced.pop(cid, None)
+
+    def close(self) -> None:
+        with self._lock:
+            self.flush()
+            for fh in self._files.values():
+                fh.close()
+            self._files.clear()
+
+    def needs_snapshot(self, client_id: str) -> bool:
+        return self._since_snapshot.get(client_id, 0) >= self.snapshot_every
+
+    def _archive(self, client_id: str) -> None:
+        """
+        Append the log to the history file.
+        Lines may be archived twice after a crash; history() de-duplicates them.
+        """
+        log_path = self.log_path(client_id)
+        if not os.path.exists(log_path):
+            return
+        with open(log_path, "r", encoding="utf-8") as fh:
+            lines = [line for line in fh if line.strip()]
+        if not lines:
+            return
+        with open(self.history_path(client_id), "a", encoding="utf-8") as fh:
+            fh.writelines(lines)
+            fh.flush()
+            os.fsync(fh.fileno())
+
+    def snapshot(self, client_id: str, lots: pd.DataFrame,
+                 realized: Optional[pd.DataFrame] = None) -> None:
+        """
+        Compact the client's book at the current seq and move the log to the history file.
+
+        Args:
+            lots: open FIFO lots as BUY trades (TRADE_COLUMNS) in their original share
+                  basis, plus the raw trades of any ticker that could not be matched.
+            realized: realized PnL carried per ticker (REALIZED_COLUMNS) for every trade
+                      the lots no longer show (sold shares, their dividends).
+        """
+        with self._lock:
+            self.flush(client_id)
+            realized = realized if realized is not None else pd.DataFrame(columns=REALIZED_COLUMNS)
+            state = {
+                "seq": self._seq.get(client_id, 0),
+                "written_at": datetime.now().isoformat(timespec="seconds"),
+                "lots": _columns(lots, TRADE_COLUMNS),
+                "realized": _columns(realized, REALIZED_COLUMNS),
+            }
+            self._archive(client_id)
+
+            path = self.snapshot_path(client_id)
+            tmp = f"{path}.tmp"
+            with open(tmp, "w", encoding="utf-8") as fh:
+                json.dump(state, fh, default=str)
+                fh.flush()
+                os.fsync(fh.fileno())
+            _fsync_replace(tmp, path)
+
+            # Events <= seq are in the snapshot; a crash before this point only leaves
+            # events that recovery skips by seq
+            fh = self._files.pop(client_id, None)
+            if fh is not None:
+                fh.close()
+            with open(self.log_path(client_id), "w", encoding="utf-8") as fh:
+                fh.flush()
+                os.fsync(fh.fileno())
+            self._since_snapshot[client_id] = 0
+
+    # ---------- Recovery ----------
+    @staticmethod
+    def _read_events(path: str, after: int = 0) -> List[Dict[str, Any]]:
+        events = []
+        with open(path, "rb") as fh:
+            for raw in fh:
+                try:
+                    event = json.loads(raw)
+                except ValueError:
+                    break
+                if event["seq"] > after:
+                    events.append(event)
+        return events
+
+    def recover(self, client_id: str) -> Optional[pd.DataFrame]:
+        """
+        Rebuild the client's book from snapshot + log tail: the snapshot's open lots
+        followed by every event after its seq (carried realized PnL -> carried()).
+
+        Returns:
+            DataFrame with TRADE_COLUMNS, or None if the client has no log/snapshot.
+        """
+        with self._lock:
+            snap_path, log_path = self.snapshot_path(client_id), self.log_path(client_id)
+            if not os.path.exists(snap_path) and not os.path.exists(log_path):
+                self._seq.setdefault(client_id, 0)
+                return None
+
+            seq = 0
+            frames = []
+            carried = pd.DataFrame(columns=REALIZED_COLUMNS)
+            if os.path.exists(snap_path):
+                with open(snap_path, "r", encoding="utf-8") as fh:
+                    state = json.load(fh)
+                seq = int(state["seq"])
+                frames.append(pd.DataFrame(state["lots"], columns=TRADE_COLUMNS))
+                carried = _frame(state["realized"], REALIZED_COLUMNS)
+            self._carried[client_id] = carried
+
+            tail: List[Dict[str, Any]] = []
+            good_bytes = 0
+            if os.path.exists(log_path):
+                with open(log_path, "rb") as fh:
+                    for raw in fh:
+                        try:
+                            event = json.loads(raw)
+                        except ValueError:
+                            break  # torn write: everything after it is discarded
+                        good_bytes += len(raw)
+                        if event["seq"] > seq:
+                            tail.append(event)
+                            seq = event["seq"]
+                if good_bytes < os.path.getsize(log_path):
+                    with open(log_path, "r+b") as fh:
+                        fh.truncate(good_bytes)
+            if tail:
+                frames.append(pd.DataFrame(tail, columns=TRADE_COLUMNS))
+
+            self._seq[client_id] = seq
+            self._since_snapshot[client_id] = len(tail)
+            trades = pd.concat(frames, ignore_index=True) if frames else pd.DataFrame(columns=TRADE_COLUMNS)
+            trades["trade_time"] = pd.to_datetime(trades["trade_time"], format="ISO8601")
+            trades["qty"] = trades["qty"].astype(float)
+            trades["price"] = trades["price"].astype(float)
+            return trades
+
+    def carried(self, client_id: str) -> pd.DataFrame:
+        """
+        Realized PnL rows (REALIZED_COLUMNS) carried by the snapshot that recover() loaded
+        for the trades it no longer replays; empty for logs without a compacted snapshot.
+        """
+        with self._lock:
+            hit = self._carried.get(client_id)
+            return hit if hit is not None else pd.DataFrame(columns=REALIZED_COLUMNS)
+
+    def history(self, client_id: str) -> pd.DataFrame:
+        """
+        Every trade ever logged for the client (history file + current log), oldest first.
+        Slow path for full-history views (equity curves, audits); recovery never reads it.
+        """
+        with self._lock:
+            self.flush(client_id)
+            events: List[Dict[str, Any]] = []
+            for path in (self.history_path(client_id), self.log_path(client_id)):
+                if os.path.exists(path):
+                    events += self._read_events(path)
+            frame = pd.DataFrame(events, columns=["seq"] + TRADE_COLUMNS).drop_duplicates()
+            frame = frame.sort_values("seq", kind="stable")[TRADE_COLUMNS].reset_index(drop=True)
+            frame["trade_time"] = pd.to_datetime(frame["trade_time"], format="ISO8601")
+            frame["qty"] = frame["qty"].astype(float)
+            frame["price"] = frame["price"].astype(float)
+            return frame
+
+    def lots(self, client_id: str) -> Dict[str, List[List[Any]]]:
+        """
+        Open lots from the last snapshot, {ticker: [[qty, price, trade_time], ...]} in their
+        original share basis (cheap holdings view without a FIFO replay).
+        """
+        with self._lock:
+            path = self.snapshot_path(client_id)
+            if not os.path.exists(path):
+                return {}
+            with open(path, "r", encoding="utf-8") as fh:
+                state = json.load(fh)
+            out: Dict[str, List[List[Any]]] = {}
+            lots = state["lots"]
+            for tkr, side, qty, price, when in zip(lots["ticker"], lots["side"], lots["qty"],
+                                                   lots["price"], lots["trade_time"]):
+                if side == "BUY":
+                    out.setdefault(tkr, []).append([qty, price, when])
+            return out